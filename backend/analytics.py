@@ -0,0 +1,196 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import STATS_RESULT_CACHE_SIZE
+from models import AwardItem
+
+try:
+    import numpy as np
+except ImportError:  # 可選依賴，未安裝時以純Python彙總
+    np = None
+
+# 可分組彙總的欄位
+GROUP_FIELDS = ("pi_name", "organ", "award_year", "award_code")
+SORT_KEYS = ("total", "count", "mean", "key")
+
+
+class AwardColumns:
+    """
+    以欄位式配置保存獎項資料，供經費彙總使用
+
+    分組欄位以字典編碼成整數代碼，金額存於int64陣列；有安裝NumPy時以
+    bincount向量化彙總。彙總結果依資料版本快取，資料異動後自動失效；快取以
+    (欄位, 篩選, 排序) 為鍵、最多 cache_size 組（LRU），limit 在讀取時套用，
+    不存在的篩選值不快取，查詢參數不會讓快取無限增長。
+    """
+
+    def __init__(self, cache_size: int = STATS_RESULT_CACHE_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._codes: Dict[str, array] = {field: array("q") for field in GROUP_FIELDS}
+        self._lookup: Dict[str, Dict[str, int]] = {field: {} for field in GROUP_FIELDS}
+        self._values: Dict[str, List[str]] = {field: [] for field in GROUP_FIELDS}
+        self._amount = array("q")
+        self._has_amount = array("b")
+        self.version = 0
+        self.cache_size = max(1, cache_size)
+        self._results: "OrderedDict[Tuple, List[dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._amount)
+
+    def _encode(self, field: str, value: str) -> int:
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._values[field])
+            self._values[field].append(value)
+        return code
+
+    def add(self, award: AwardItem, award_code: str = "") -> None:
+        """新增或更新一筆獎項，沒有計畫編號的資料不納入彙總"""
+        if not award.project_no:
+            return
+        values = {
+            "pi_name": award.pi_name,
+            "organ": award.organ,
+            "award_year": award.award_year,
+            "award_code": award_code,
+        }
+        with self._lock:
+            row = self._rows.get(award.project_no)
+            if row is not None and not award_code:
+                # 未提供獎項代碼時保留原本的代碼
+                values["award_code"] = self._values["award_code"][
+                    self._codes["award_code"][row]
+                ]
+            codes = {
+                field: self._encode(field, values[field]) for field in GROUP_FIELDS
+            }
+            amount = award.amount
+            if row is None:
+                self._rows[award.project_no] = len(self._amount)
+                for field in GROUP_FIELDS:
+                    self._codes[field].append(codes[field])
+                self._amount.append(amount or 0)
+                self._has_amount.append(amount is not None)
+            else:
+                unchanged = all(
+                    self._codes[field][row] == codes[field] for field in GROUP_FIELDS
+                ) and self._amount[row] == (amount or 0)
+                if unchanged:
+                    return
+                for field in GROUP_FIELDS:
+                    self._codes[field][row] = codes[field]
+                self._amount[row] = amount or 0
+                self._has_amount[row] = amount is not None
+            self.version += 1
+            self._results.clear()
+
+    def group_by(
+        self,
+        field: str,
+        *,
+        award_year: Optional[str] = None,
+        award_code: Optional[str] = None,
+        sort: str = "total",
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        依欄位分組計算經費總額、平均與件數
+
+        Args:
+            field: 分組欄位（GROUP_FIELDS之一）
+            award_year, award_code: 只彙總符合的獎項（可選）
+            sort: 排序依據（SORT_KEYS之一，key以外由大到小）
+            limit: 回傳組數上限（可選）
+
+        Returns:
+            [{"key", "count", "total", "mean"}]，mean 只計入有金額的獎項
+        """
+        if field not in GROUP_FIELDS:
+            raise ValueError(f"不支援的分組欄位: {field}")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支援的排序方式: {sort}")
+        if limit is not None and limit < 1:
+            raise ValueError(f"回傳組數上限需為正整數: {limit}")
+
+        cache_key = (field, award_year, award_code, sort)
+        with self._lock:
+            groups = self._results.get(cache_key)
+            if groups is not None:
+                self._results.move_to_end(cache_key)
+                return groups[:limit]
+
+            filters = []
+            for name, value in (("award_year", award_year), ("award_code", award_code)):
+                if value is None:
+                    continue
+                code = self._lookup[name].get(value)
+                if code is None:
+                    return []
+                filters.append((self._codes[name], code))
+
+            n_groups = len(self._values[field])
+            counts, totals, priced = _aggregate(
+                self._codes[field], self._amount, self._has_amount, filters, n_groups
+            )
+            groups = [
+                {
+                    "key": self._values[field][i],
+                    "count": counts[i],
+                    "total": totals[i],
+                    "mean": round(totals[i] / priced[i], 1) if priced[i] else None,
+                }
+                for i in range(n_groups)
+                if counts[i]
+            ]
+            if sort == "key":
+                groups.sort(key=lambda g: g["key"])
+            else:
+                groups.sort(key=lambda g: g[sort] or 0, reverse=True)
+            self._results[cache_key] = groups
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+            return groups[:limit]
+
+
+def _aggregate(
+    keys: array,
+    amount: array,
+    has_amount: array,
+    filters: Sequence[Tuple[array, int]],
+    n_groups: int,
+) -> Tuple[List[int], List[int], List[int]]:
+    """回傳每組的件數、金額總和與有金額的件數"""
+    if np is not None and len(keys):
+        k = np.frombuffer(keys, dtype=np.int64)
+        a = np.frombuffer(amount, dtype=np.int64)
+        p = np.frombuffer(has_amount, dtype=np.int8)
+        if filters:
+            mask = np.ones(len(k), dtype=bool)
+            for column, code in filters:
+                mask &= np.frombuffer(column, dtype=np.int64) == code
+            k, a, p = k[mask], a[mask], p[mask]
+        counts = np.bincount(k, minlength=n_groups)
+        totals = np.bincount(k, weights=a, minlength=n_groups)
+        priced = np.bincount(k, weights=p, minlength=n_groups)
+        return (
+            counts.tolist(),
+            [int(t) for t in totals.tolist()],
+            [int(c) for c in priced.tolist()],
+        )
+
+    counts = [0] * n_groups
+    totals = [0] * n_groups
+    priced = [0] * n_groups
+    for row, key in enumerate(keys):
+        if filters and any(column[row] != code for column, code in filters):
+            continue
+        counts[key] += 1
+        if has_amount[row]:
+            totals[key] += amount[row]
+            priced[key] += 1
+    return counts, totals, priced
@@ -0,0 +1,533 @@
+"""
+非同步NSTC獎項查詢客戶端
+
+FastAPI端點以 AsyncNSTCAwardClient 查詢，等待NSTC網站回應時不佔用事件迴圈，
+單一worker可同時處理大量查詢；HTML解析交給解析階段（見 parse_pool.py）。列表頁與概述快取、
+解析結果記憶、條件式請求的驗證值、限速、斷路器與上游健康狀態都與同步的
+NSTCAwardClient 共用，兩者的查詢結果相同，對NSTC網站的請求也一併限速；
+TLS 1.2 設定與工作階段重用沿用 connection.py 的SSLContext。
+
+過期快取的背景重新整理由同步客戶端在背景執行緒中執行（見 refresher.py）。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import replace
+from functools import partial
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+from cache import TTLCache
+from config import (
+    CRAWLER_CONNECT_TIMEOUT,
+    DETAIL_FETCH_CONCURRENCY,
+    HTTP_POOL_MAXSIZE,
+    LIST_MAX_PAGES,
+    LIST_PAGE_CONCURRENCY,
+)
+from connection import default_ca_bundle, keepalive_socket_options, tls12_context
+from crawler import (
+    DEFAULT_HEADERS,
+    ListTruncatedError,
+    NSTCAwardClient,
+    list_params,
+    observe_upstream,
+    parse_memo_key,
+)
+from detail_parser import parse_impact_detail
+from grid_parser import GridPage, GridRow, parse_award_page
+from models import IMPACT_FULL, AwardItem
+from refresher import in_background
+from resilience import is_retryable
+from singleflight import AsyncSingleFlight, request_key
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable_async(error: BaseException) -> bool:
+    """httpx的連線失敗、逾時與 429/5xx 回應為可重試的暫時性錯誤"""
+    return isinstance(error, httpx.TransportError) or is_retryable(error)
+
+
+class _LoopState(NamedTuple):
+    """綁定在單一事件迴圈上的連線池、合併請求與並行上限"""
+
+    loop: asyncio.AbstractEventLoop
+    http: httpx.AsyncClient
+    flight: AsyncSingleFlight
+    detail_slots: asyncio.Semaphore
+    page_slots: asyncio.Semaphore
+    closer: AsyncGenerator[None, None]
+
+
+async def _close_with_loop(http: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    """
+    事件迴圈結束時關閉連線池
+
+    在事件迴圈中開始迭代後，事件迴圈會記錄這個async generator；asyncio.run、
+    uvicorn與TestClient結束事件迴圈前呼叫 shutdown_asyncgens 關閉它，
+    此時事件迴圈仍可執行 aclose，連線不會留到迴圈關閉之後。
+    """
+    try:
+        yield
+    finally:
+        await http.aclose()
+
+
+def _discard(tasks: Iterable[asyncio.Future]) -> None:
+    """取消尚未完成的task，並取回已完成task的例外以免被記錄為未處理"""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+
+class AsyncNSTCAwardClient:
+    """NSTC獎項查詢的非同步客戶端，與同步客戶端共用快取與限速狀態"""
+
+    def __init__(
+        self,
+        client: Optional[NSTCAwardClient] = None,
+        detail_concurrency: int = DETAIL_FETCH_CONCURRENCY,
+        page_concurrency: int = LIST_PAGE_CONCURRENCY,
+    ):
+        """
+        Args:
+            client: 共用快取、限速與上游網址的同步客戶端，預設建立新的
+            detail_concurrency: 同時抓取計畫概述全文的請求數上限
+            page_concurrency: 同一次查詢並行換頁的請求數上限
+        """
+        self.client = client or NSTCAwardClient()
+        self.detail_concurrency = max(1, detail_concurrency)
+        self.page_concurrency = max(1, page_concurrency)
+        # 與同步客戶端相同的TLS 1.2設定與CA憑證，交握統計寫入同一份 conn_stats
+        self._ssl_context = tls12_context(self.client.conn_stats)
+        self._ssl_context.load_verify_locations(default_ca_bundle())
+        # 每個事件迴圈各自的連線池與同步原語
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self._states_lock = threading.Lock()
+
+    @property
+    def list_cache(self) -> TTLCache:
+        return self.client.list_cache
+
+    @property
+    def detail_cache(self) -> TTLCache:
+        return self.client.detail_cache
+
+    def _loop_state(self) -> _LoopState:
+        """
+        回傳目前事件迴圈的連線池與同步原語，第一次在該迴圈使用時建立
+
+        httpx的連線與asyncio的Semaphore只能在建立它們的事件迴圈中使用；
+        測試客戶端每個請求可能使用新的事件迴圈。連線池在該迴圈結束前關閉
+        （見 _close_with_loop），已關閉的迴圈的狀態在下次建立時移除。
+        """
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is not None:
+            return state
+        with self._states_lock:
+            for old in [old for old in self._states if old.is_closed()]:
+                del self._states[old]
+            state = self._states.get(loop)
+            if state is None:
+                http = self._new_http()
+                state = self._states[loop] = _LoopState(
+                    loop,
+                    http,
+                    AsyncSingleFlight(),
+                    asyncio.Semaphore(self.detail_concurrency),
+                    asyncio.Semaphore(self.page_concurrency),
+                    _close_with_loop(http),
+                )
+                # 開始迭代，讓事件迴圈記錄此async generator
+                asyncio.ensure_future(state.closer.__anext__())
+        return state
+
+    def _new_http(self) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(
+            verify=self._ssl_context,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            ),
+            socket_options=keepalive_socket_options(),
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(self.client.timeout, connect=CRAWLER_CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+
+    async def aclose(self) -> None:
+        """關閉目前事件迴圈的連線池；其他事件迴圈的連線池在各自結束時關閉"""
+        with self._states_lock:
+            state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.http.aclose()
+            await state.closer.aclose()
+
+    async def search_awards(
+        self,
+        *,
+        year: int,
+        code: str,
+        name: str,
+        organ: str = "",
+        include_impact: str = IMPACT_FULL,
+    ) -> List[AwardItem]:
+        """
+        查詢符合條件的獎項資料，參數與結果同 NSTCAwardClient.search_awards
+        """
+        rows = await self.search_award_rows(
+            year=year, code=code, name=name, organ=organ
+        )
+        if include_impact != IMPACT_FULL:
+            return [row.item for row in rows]
+        return await self.attach_impact_details(rows)
+
+    async def attach_impact_details(self, rows: Iterable[GridRow]) -> List[AwardItem]:
+        """為列表頁資料補上概述全文，抓取失敗時保留預覽文字"""
+        rows = list(rows)
+        details = await self.fetch_impact_details(
+            award.project_no for award, has_detail in rows if has_detail
+        )
+        items: List[AwardItem] = []
+        for award, has_detail in rows:
+            full = details.get(award.project_no) if has_detail else None
+            items.append(replace(award, impact=full) if full else award)
+        return items
+
+    async def search_award_rows(
+        self, *, year: int, code: str, name: str, organ: str = ""
+    ) -> List[GridRow]:
+        """查詢並解析獎項列表頁的所有頁面（不抓取概述全文）"""
+        key = (str(year), code, name, organ)
+        rows = self.list_cache.get(key)
+        metrics.cache_lookup("list", rows is not None)
+        if rows is not None:
+            return rows
+        params = list_params(year, code, name, organ)
+
+        async def fetch() -> List[GridRow]:
+            try:
+                rows = [row async for page in self._iter_pages(params) for row in page]
+            except Exception as e:
+                stale = self.list_cache.get(key, allow_stale=True)
+                if stale is None:
+                    raise
+                logger.warning("列表頁查詢失敗，改用過期快取 %s: %s", key, e)
+                return stale
+            self.list_cache.set(key, rows)
+            return rows
+
+        flight_key = request_key(self.client.list_endpoint, params)
+        rows = self._serve_stale(
+            self.list_cache,
+            key,
+            flight_key,
+            partial(
+                self.client.search_award_rows,
+                year=year,
+                code=code,
+                name=name,
+                organ=organ,
+                refresh=True,
+            ),
+        )
+        if rows is None:
+            rows = await self._loop_state().flight.do(flight_key, fetch)
+        return rows
+
+    async def iter_award_pages(
+        self, *, year: int, code: str, name: str, organ: str = ""
+    ) -> AsyncIterator[List[GridRow]]:
+        """逐頁查詢並解析獎項列表頁（不經過列表快取），依頁碼順序產出"""
+        async for rows in self._iter_pages(list_params(year, code, name, organ)):
+            yield rows
+
+    async def _iter_pages(self, params: Dict[str, str]) -> AsyncIterator[List[GridRow]]:
+        """換頁方式同 NSTCAwardClient._iter_pages"""
+        page: GridPage = await self._fetch_parsed(
+            self.client.list_endpoint, params, "list", parse_award_page
+        )
+        yield page.rows
+        fetched = 1
+        sequential = self.page_concurrency <= 1
+        while page.pager is not None:
+            targets = sorted(n for n in page.pager.pages if n > page.pager.current)
+            if not targets:
+                break
+            if fetched >= LIST_MAX_PAGES:
+                raise ListTruncatedError(params, LIST_MAX_PAGES)
+            if sequential:
+                targets = targets[:1]
+            targets = targets[: LIST_MAX_PAGES - fetched]
+
+            tasks = [asyncio.ensure_future(self._fetch_page(page, n)) for n in targets]
+            last: Optional[GridPage] = None
+            mismatch = False
+            try:
+                for n, task in zip(targets, tasks):
+                    result: GridPage = await task
+                    if result.pager is not None and result.pager.current != n:
+                        mismatch = True
+                        break
+                    yield result.rows
+                    fetched += 1
+                    last = result
+            finally:
+                _discard(tasks)
+
+            if last is None:
+                logger.warning(
+                    "換頁結果與要求的頁碼不符，停止於第 %d 頁 %s",
+                    page.pager.current,
+                    params,
+                )
+                break
+            if mismatch and not sequential:
+                logger.info("上游不接受並行換頁，改為逐頁抓取 %s", params)
+                sequential = True
+            page = last
+
+    async def _fetch_page(self, page: GridPage, n: int) -> GridPage:
+        url, data = self.client.page_postback(page, n)
+        async with self._loop_state().page_slots:
+            metrics.incr("list_pages")
+            # 換頁回傳可安全重送，見 NSTCAwardClient._fetch_page
+            return await self._fetch_parsed(
+                url, {}, "list", parse_award_page, data, idempotent=True
+            )
+
+    async def fetch_impact_details(self, project_nos: Iterable[str]) -> Dict[str, str]:
+        """
+        並行獲取多個計畫的概述全文
+
+        Returns:
+            計畫編號對應概述全文的字典；抓取失敗或無內容的計畫不會出現在結果中
+        """
+        unique = list(dict.fromkeys(no for no in project_nos if no))
+        if not unique:
+            return {}
+        metrics.DETAIL_FANOUT.inc(len(unique))
+        metrics.incr("detail_fanout", len(unique))
+
+        results = await asyncio.gather(
+            *(self.fetch_impact_detail(no) for no in unique), return_exceptions=True
+        )
+        details: Dict[str, str] = {}
+        for no, result in zip(unique, results):
+            if isinstance(result, Exception):
+                logger.warning("獲取計畫概述失敗 %s: %s", no, result)
+            elif result:
+                details[no] = result
+        return details
+
+    async def fetch_impact_detail(self, project_no: str) -> str:
+        """獲取計畫概述的完整版本"""
+        text = self.detail_cache.get(project_no)
+        metrics.cache_lookup("detail", text is not None)
+        if text is not None:
+            return text
+
+        async def fetch() -> str:
+            try:
+                async with self._loop_state().detail_slots:
+                    text = await self._fetch_parsed(
+                        self.client.impact_detail_endpoint,
+                        {"no": project_no},
+                        "detail",
+                        parse_impact_detail,
+                    )
+            except Exception as e:
+                stale = self.detail_cache.get(project_no, allow_stale=True)
+                if stale is None:
+                    raise
+                logger.warning("概述全文查詢失敗，改用過期快取 %s: %s", project_no, e)
+                return stale
+            self.detail_cache.set(project_no, text)
+            return text
+
+        key = request_key(self.client.impact_detail_endpoint, {"no": project_no})
+        text = self._serve_stale(
+            self.detail_cache,
+            project_no,
+            key,
+            partial(self.client.fetch_impact_detail, project_no),
+        )
+        if text is None:
+            text = await self._loop_state().flight.do(key, fetch)
+        return text
+
+    def _serve_stale(
+        self,
+        cache: TTLCache,
+        key: Hashable,
+        flight_key: Hashable,
+        refresh: Callable[[], Any],
+    ) -> Any:
+        """
+        有背景重新整理器時回傳過期的快取，並在背景以同步客戶端的refresh重新抓取
+
+        背景工作以合併請求的鍵值去重，與同步客戶端排入的工作不會重複。
+
+        Returns:
+            過期的快取值；沒有可用的快取時回傳None
+        """
+        refresher = self.client.refresher
+        if refresher is None or in_background():
+            return None
+        stale = cache.get(key, allow_stale=True)
+        if stale is not None:
+            metrics.incr("stale_served")
+            refresher.submit(flight_key, refresh)
+        return stale
+
+    async def _fetch_parsed(
+        self,
+        url: str,
+        params: Dict[str, str],
+        page: str,
+        parse: Callable[[str], Any],
+        data: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> Any:
+        """請求頁面並解析，條件式請求與解析結果記憶同 NSTCAwardClient._fetch_parsed"""
+        if data is not None:
+            r = await self._request(
+                "POST", url, params, data=data, idempotent=idempotent
+            )
+            return await self._parse_response(r, page, parse)
+
+        key = request_key(url, params)
+        headers, memo_key = self.client.conditional_headers(key)
+        if headers is not None:
+            r = await self._request("GET", url, params, headers)
+            if r.status_code == 304:
+                parsed = self.client.parse_memo.get(memo_key)
+                metrics.cache_lookup("not_modified", parsed is not None)
+                if parsed is not None:
+                    return parsed
+                r = await self._request("GET", url, params)
+        else:
+            r = await self._request("GET", url, params)
+
+        parsed = await self._parse_response(r, page, parse)
+        self.client.remember_validators(key, page, r.headers, r.content)
+        return parsed
+
+    async def _parse_response(
+        self, r: httpx.Response, page: str, parse: Callable[[str], Any]
+    ) -> Any:
+        """
+        以解析階段解析回應，相同內容與編碼的頁面沿用記憶的解析結果
+
+        編碼以 crawler.response_encoding 判斷而非 httpx 的 r.encoding，
+        與同步客戶端共用的解析結果記憶才會一致。
+        """
+        memo_key = parse_memo_key(page, r.headers, r.content)
+        parsed = self.client.parse_memo.get(memo_key)
+        metrics.cache_lookup("parse_memo", parsed is not None)
+        if parsed is None:
+            with metrics.stage(f"parse_{page}", metrics.PARSE_SECONDS, page):
+                parsed = await self.client.parse_stage.run_async(
+                    parse, r.content, memo_key[2]
+                )
+            self.client.parse_memo.set(memo_key, parsed)
+        return parsed
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        params: Dict[str, str],
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> httpx.Response:
+        """
+        送出HTTP請求，限速、節流、重試與斷路同 NSTCAwardClient._request，
+        等待時讓出事件迴圈；POST只有標示 idempotent 時才重試
+        """
+        client = self.client
+        endpoint = urlsplit(url).path.rsplit("/", 1)[-1]
+        http = self._loop_state().http
+        retry = method == "GET" or idempotent
+        delays = client.retry.delays() if retry else iter(())
+        while True:
+            probe = client.breaker.before_call()
+            try:
+                waited = client.rate_limiter.reserve(url)
+                if waited:
+                    await asyncio.sleep(waited)
+                    metrics.record("rate_limit_wait", waited)
+                    metrics.UPSTREAM_WAIT_SECONDS.inc(waited, "rate_limit")
+                pacing = client.health.pacing_delay()
+                if pacing:
+                    await asyncio.sleep(pacing)
+                    metrics.record("pacing_wait", pacing)
+                    metrics.UPSTREAM_WAIT_SECONDS.inc(pacing, "pacing")
+
+                started = time.monotonic()
+                try:
+                    r = await http.request(
+                        method, url, params=params, data=data, headers=headers
+                    )
+                    # httpx 對 304 等3xx回應也會拋出例外，只檢查 4xx/5xx
+                    if r.status_code >= 400:
+                        r.raise_for_status()
+                except httpx.HTTPError as e:
+                    observe_upstream(endpoint, started, "error")
+                    if not is_retryable_async(e):
+                        # 4xx 表示請求本身有誤，上游仍正常運作
+                        client.health.record(time.monotonic() - started, ok=True)
+                        client.breaker.record_success()
+                        raise
+                    client.health.record(time.monotonic() - started, ok=False)
+                    client.breaker.record_failure()
+                    delay = next(delays, None)
+                    if delay is None:
+                        raise
+                    logger.info("上游請求失敗，%.2f 秒後重試 %s: %s", delay, url, e)
+                    metrics.incr("upstream_retries")
+                    await asyncio.sleep(delay)
+                    continue
+
+                observe_upstream(endpoint, started, "ok", len(r.content))
+                client.health.record(time.monotonic() - started, ok=True)
+                client.breaker.record_success()
+                return r
+            finally:
+                # 試探請求被取消或以非上游錯誤結束時釋放名額
+                client.breaker.release_probe(probe)
+
+    def stats(self) -> Dict[str, dict]:
+        """同步客戶端的統計，加上非同步請求的合併統計"""
+        try:
+            state = self._states.get(asyncio.get_running_loop())
+        except RuntimeError:
+            state = None
+        return {
+            **self.client.stats(),
+            "singleflight_async": state.flight.stats() if state else None,
+        }
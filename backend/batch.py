@@ -0,0 +1,126 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+import metrics
+from grid_parser import GridRow
+from models import AwardItem
+from scheduler import merge_awards
+
+
+class BatchResult(NamedTuple):
+    """單一主持人的批次查詢結果"""
+
+    name: str
+    items: List[AwardItem]
+    errors: List[str]
+
+
+class BatchJob:
+    """
+    多位主持人的批次查詢
+
+    先規劃所有 (主持人, 年度, 獎項代碼) 的列表頁查詢並交給共用的執行緒池，
+    某位主持人的列表頁全部完成後立即抓取其概述全文。對NSTC網站的請求量由
+    客戶端的每主機限速控制，重複的列表頁與概述頁由快取與合併請求去除。
+    """
+
+    def __init__(
+        self,
+        client,
+        pool: Executor,
+        *,
+        names: Sequence[str],
+        years: Sequence[int],
+        codes: Sequence[str],
+        organ: str = "",
+    ):
+        """
+        Args:
+            client: NSTCAwardClient
+            pool: 共用的執行緒池
+            names: 主持人姓名列表，重複的姓名只查詢一次
+            years: 民國年份列表，結果依此順序合併
+            codes: 獎項代碼列表
+            organ: 機構名稱（可選）
+        """
+        self.client = client
+        self.pool = pool
+        self.names = list(dict.fromkeys(n.strip() for n in names if n.strip()))
+        self.years = list(years)
+        self.codes = list(codes)
+        self.organ = organ
+
+    def plan(self) -> List[Tuple[str, int, str]]:
+        """回傳所有需要查詢的 (主持人, 年度, 獎項代碼)"""
+        return [
+            (name, year, code)
+            for name in self.names
+            for year in self.years
+            for code in self.codes
+        ]
+
+    def run(self) -> Dict[str, BatchResult]:
+        """執行批次查詢，回傳以主持人姓名為鍵的結果"""
+        return {result.name: result for result in self.iter_results()}
+
+    def iter_results(self) -> Iterator[BatchResult]:
+        """執行批次查詢，每位主持人查詢完成即產出其結果"""
+        remaining = {name: len(self.years) * len(self.codes) for name in self.names}
+        rows: Dict[str, Dict[Tuple[int, str], List[GridRow]]] = {
+            name: {} for name in self.names
+        }
+        errors: Dict[str, List[str]] = {name: [] for name in self.names}
+
+        futures: Dict[Future, Tuple[str, int, str]] = {}
+        for name, year, code in self.plan():
+            future = metrics.submit(
+                self.pool,
+                self.client.search_award_rows,
+                year=year,
+                code=code,
+                name=name,
+                organ=self.organ,
+            )
+            futures[future] = (name, year, code)
+
+        finishing: Dict[Future, str] = {}
+        for name, count in remaining.items():
+            if not count:
+                finishing[metrics.submit(self.pool, self._finish, {})] = name
+
+        try:
+            while futures or finishing:
+                done, _ = wait([*futures, *finishing], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in finishing:
+                        name = finishing.pop(future)
+                        try:
+                            items = future.result()
+                        except Exception as e:
+                            errors[name].append(f"概述全文抓取失敗: {e}")
+                            items = []
+                        yield BatchResult(name, items, errors[name])
+                        continue
+
+                    name, year, code = futures.pop(future)
+                    try:
+                        rows[name][(year, code)] = future.result()
+                    except Exception as e:
+                        errors[name].append(f"{year} {code} 查詢失敗: {e}")
+                    remaining[name] -= 1
+                    if not remaining[name]:
+                        finish = metrics.submit(self.pool, self._finish, rows.pop(name))
+                        finishing[finish] = name
+        finally:
+            for future in [*futures, *finishing]:
+                future.cancel()
+
+    def _finish(self, rows: Dict[Tuple[int, str], List[GridRow]]) -> List[AwardItem]:
+        """依年度與獎項代碼順序合併列表頁並補上概述全文"""
+        ordered = [
+            row
+            for year in self.years
+            for code in self.codes
+            for row in rows.get((year, code), [])
+        ]
+        return merge_awards([self.client.attach_impact_details(ordered)])
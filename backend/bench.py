@@ -0,0 +1,162 @@
+"""
+效能基準量測
+
+以 fixtures/ 的HTML量測列表頁解析與概述擷取的吞吐量，並透過重播伺服器量測
+/api/awards 端對端延遲；結果與 bench_baseline.json 比較，退步超過容許範圍時
+以非零狀態碼結束。
+
+用法:
+    python bench.py                    # 量測並與基準比較
+    python bench.py --update-baseline  # 以本次結果更新基準
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence
+
+# 量測時不讀寫持久化儲存
+os.environ["AWARD_STORE_PATH"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from crawler import NSTCAwardClient, parse_impact_detail  # noqa: E402
+from grid_parser import parse_award_grid  # noqa: E402
+from main import create_app  # noqa: E402
+from ratelimit import RateLimiter  # noqa: E402
+from replay_server import FIXTURES_DIR, ReplayServer  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+LIST_HTML = (FIXTURES_DIR / "award_list.html").read_text(encoding="utf-8")
+DETAIL_HTML = (FIXTURES_DIR / "award_detail.html").read_text(encoding="utf-8")
+
+# 指標 -> 數值越大越好
+METRICS = {
+    "grid_parse_rows_per_sec": True,
+    "detail_extract_per_sec": True,
+    "awards_p50_ms": False,
+    "awards_p95_ms": False,
+}
+
+# 重播伺服器設定，端對端延遲只在相同設定下可比較
+REPLAY_LATENCY = 0.05
+REPLAY_JITTER = 0.01
+
+
+def throughput(
+    func: Callable[[], object], units: int, seconds: float = 0.5, rounds: int = 3
+) -> float:
+    """每輪重複執行func至少seconds秒，回傳各輪中最佳的每秒處理單位數"""
+    func()
+    best = 0.0
+    for _ in range(rounds):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+        best = max(best, units * runs / elapsed)
+    return best
+
+
+def bench_grid_parse() -> float:
+    rows = len(parse_award_grid(LIST_HTML))
+    return throughput(lambda: parse_award_grid(LIST_HTML), rows)
+
+
+def bench_detail_extract() -> float:
+    return throughput(lambda: parse_impact_detail(DETAIL_HTML), 1)
+
+
+def bench_awards_latency(requests: int = 20) -> Dict[str, float]:
+    """
+    每次查詢不同主持人，量測快取未命中時 /api/awards 的延遲
+
+    不套用每主機限速，量測的是程式本身而不是限速設定。
+    """
+    with ReplayServer(latency=REPLAY_LATENCY, jitter=REPLAY_JITTER) as server:
+        crawler = NSTCAwardClient(base=server.url, rate_limiter=RateLimiter(0, 0))
+        client = TestClient(create_app(crawler))
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            r = client.get("/api/awards", params={"pi_name": f"bench-{i}"})
+            latencies.append((time.perf_counter() - start) * 1000)
+            r.raise_for_status()
+    latencies.sort()
+    return {
+        "awards_p50_ms": statistics.median(latencies),
+        "awards_p95_ms": latencies[max(0, round(len(latencies) * 0.95) - 1)],
+    }
+
+
+def run() -> Dict[str, float]:
+    results = {
+        "grid_parse_rows_per_sec": bench_grid_parse(),
+        "detail_extract_per_sec": bench_detail_extract(),
+        **bench_awards_latency(),
+    }
+    return {name: round(value, 1) for name, value in results.items()}
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> bool:
+    """印出與基準的比較，回傳是否沒有退步"""
+    ok = True
+    for name, higher_is_better in METRICS.items():
+        value = results[name]
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:26} {value:>12,.1f}")
+            continue
+        change = (value - base) / base if base else 0.0
+        regressed = -change > tolerance if higher_is_better else change > tolerance
+        mark = "❌" if regressed else "✅"
+        print(f"{mark} {name:26} {value:>12,.1f}  基準 {base:>12,.1f}  ({change:+.0%})")
+        ok = ok and not regressed
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="量測解析與API效能並與基準比較")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="容許的退步比例（預設 0.25）"
+    )
+    args = parser.parse_args(argv)
+
+    results = run()
+    if args.update_baseline or not BASELINE_PATH.exists():
+        BASELINE_PATH.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "replay": {"latency": REPLAY_LATENCY, "jitter": REPLAY_JITTER},
+                    "metrics": results,
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        print(f"已更新基準: {BASELINE_PATH.name}")
+        compare(results, {}, args.tolerance)
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    ok = compare(results, baseline["metrics"], args.tolerance)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+冷啟動時間量測
+
+每次以全新的Python程序模擬Lambda容器冷啟動，量測 lambda_handler 載入、
+第一個健康檢查與第一個API請求的耗時，並檢查健康檢查路徑沒有載入FastAPI、
+requests與解析器。任一指標的中位數超過預算或載入了不該載入的模組時以非零
+狀態碼結束。
+
+用法:
+    python bench_startup.py              # 量測並與預算比較
+    python bench_startup.py --runs 10    # 增加量測次數
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+BACKEND_DIR = Path(__file__).parent
+
+# 指標 -> 預算（毫秒）。python3.11 / x86_64 上 handler_import_ms 與 health_ms 不到
+# 預算的一成；first_request_ms 與 eager_init_ms 約 700-770 ms，大部分是載入FastAPI
+# 的時間，只剩約三成餘裕，新增模組層級的import前先確認仍在預算內
+BUDGET_MS = {
+    "handler_import_ms": 20,
+    "health_ms": 5,
+    "first_request_ms": 1000,
+    "eager_init_ms": 1000,
+}
+
+# 健康檢查路徑不應載入的模組；應用程式載入後仍不應載入的解析器、匯出模組
+# 與非同步客戶端（httpx於第一次向NSTC網站查詢時才載入）
+HEALTH_FORBIDDEN = ("fastapi", "requests", "mangum", "bs4", "lxml")
+APP_FORBIDDEN = ("bs4", "lxml", "pyarrow", "httpx", "async_crawler")
+
+
+def api_event(path: str, method: str = "GET") -> dict:
+    """HTTP API（payload 2.0）事件"""
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": "",
+        "headers": {"host": "localhost"},
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": "bench-startup",
+            },
+            "stage": "$default",
+            "requestId": "bench",
+            "routeKey": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+
+
+# 在全新程序中執行，以JSON輸出各階段耗時與已載入的模組
+PROBE = """
+import json, sys, time
+
+def loaded(names):
+    return [name for name in names if name in sys.modules]
+
+started = time.perf_counter()
+import lambda_handler
+result = {"handler_import_ms": (time.perf_counter() - started) * 1000}
+if lambda_handler.LAMBDA_LAZY_INIT:
+    result["health_forbidden"] = loaded(HEALTH_FORBIDDEN)
+
+    started = time.perf_counter()
+    response = lambda_handler.handler(HEALTH_EVENT, None)
+    result["health_ms"] = (time.perf_counter() - started) * 1000
+    assert response["statusCode"] == 200, response
+    result["health_forbidden"] += loaded(HEALTH_FORBIDDEN)
+
+    started = time.perf_counter()
+    response = lambda_handler.handler(FIRST_EVENT, None)
+    result["first_request_ms"] = (time.perf_counter() - started) * 1000
+    assert response["statusCode"] == 200, response
+result["app_forbidden"] = loaded(APP_FORBIDDEN)
+print(json.dumps(result))
+"""
+
+
+def probe(lazy: bool, store_dir: str) -> Dict[str, object]:
+    """以全新程序執行一次冷啟動量測"""
+    code = "\n".join(
+        [
+            f"HEALTH_FORBIDDEN = {HEALTH_FORBIDDEN!r}",
+            f"APP_FORBIDDEN = {APP_FORBIDDEN!r}",
+            f"HEALTH_EVENT = {api_event('/api/health')!r}",
+            f"FIRST_EVENT = {api_event('/api/cache/stats')!r}",
+            PROBE,
+        ]
+    )
+    env = {
+        **os.environ,
+        "LAMBDA_LAZY_INIT": "1" if lazy else "0",
+        # 每次使用新的SQLite檔案，與新容器的 /tmp 相同
+        "AWARD_STORE_PATH": os.path.join(store_dir, "awards.sqlite3"),
+    }
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(runs: int) -> Dict[str, object]:
+    samples: Dict[str, List[float]] = {name: [] for name in BUDGET_MS}
+    forbidden = set()
+    for _ in range(runs):
+        for lazy in (True, False):
+            with tempfile.TemporaryDirectory() as store_dir:
+                result = probe(lazy, store_dir)
+            forbidden.update(result.pop("health_forbidden", []))
+            forbidden.update(result.pop("app_forbidden", []))
+            if not lazy:
+                result = {"eager_init_ms": result["handler_import_ms"]}
+            for name, value in result.items():
+                samples[name].append(value)
+    return {
+        "metrics": {
+            name: round(statistics.median(values), 1)
+            for name, values in samples.items()
+        },
+        "forbidden": sorted(forbidden),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="量測Lambda冷啟動時間並與預算比較")
+    parser.add_argument("--runs", type=int, default=5, help="量測次數（取中位數）")
+    args = parser.parse_args(argv)
+
+    results = run(max(1, args.runs))
+    ok = True
+    for name, budget in BUDGET_MS.items():
+        value = results["metrics"][name]
+        over = value > budget
+        mark = "❌" if over else "✅"
+        print(f"{mark} {name:20} {value:>8,.1f} ms  預算 {budget:>6,} ms")
+        ok = ok and not over
+    if results["forbidden"]:
+        print(f"❌ 冷啟動路徑載入了不該載入的模組: {', '.join(results['forbidden'])}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
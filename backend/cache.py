@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    具TTL過期與LRU淘汰的執行緒安全快取
+
+    過期的記錄不會立即刪除，直到被LRU淘汰或覆寫前，仍可在上游故障時以
+    allow_stale=True 讀取。
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        """
+        Args:
+            ttl: 快取過期時間（秒）
+            maxsize: 最大快取記錄數，超過時淘汰最久未使用的記錄
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def get(
+        self, key: Hashable, default: Any = None, allow_stale: bool = False
+    ) -> Any:
+        """
+        取得快取值，並將其標記為最近使用
+
+        Args:
+            key: 快取鍵值
+            default: 沒有可用記錄時的回傳值
+            allow_stale: 是否接受已過期的記錄
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                if not allow_stale:
+                    self.expirations += 1
+                    self.misses += 1
+                    return default
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """寫入快取，必要時淘汰最久未使用的記錄"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """回傳快取命中統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_hits": self.stale_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -1,13 +1,43 @@
 # 後端 API 配置檔案範例
 
+import os
+
 # 服務器配置
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
 DEBUG = True
 
 # 爬蟲配置
+# NSTC獎項查詢網站根網址，可指向本機的 replay_server.py 以重播固定的HTML
+NSTC_BASE_URL = os.environ.get(
+    "NSTC_BASE_URL", "https://wsts.nstc.gov.tw/STSWeb/Award/"
+)
 CRAWLER_TIMEOUT = 30  # 秒
+CRAWLER_CONNECT_TIMEOUT = 5  # 建立連線逾時（秒）
 CRAWLER_RETRY = 3  # 重試次數
+CRAWLER_BACKOFF_BASE = 0.5  # 第一次重試的退避上限（秒），之後每次加倍並加上隨機抖動
+CRAWLER_BACKOFF_MAX = 5.0  # 單次退避與節流延遲上限（秒）
+CRAWLER_SLOW_THRESHOLD = 3.0  # 上游平均延遲超過此值（秒）即開始節流
+CIRCUIT_FAILURE_THRESHOLD = 5  # 連續失敗次數達此值即開啟斷路器
+CIRCUIT_RECOVERY_TIMEOUT = 30  # 斷路器開啟後多久放行試探請求（秒）
+AWARD_YEAR_CONCURRENCY = 5  # 同時查詢的年度數上限
+DETAIL_FETCH_CONCURRENCY = 4  # 同時抓取計畫概述全文的請求數上限
+LIST_PAGE_CONCURRENCY = 4  # 同一次查詢並行換頁的請求數上限（1 表示逐頁）
+LIST_MAX_PAGES = 200  # 單次查詢最多抓取的列表頁數
+HOST_RATE_LIMIT = 10.0  # 每個主機每秒請求數上限（0 表示不限速）
+HOST_RATE_BURST = 20  # 限速令牌桶可累積的突發請求數
+
+# HTTP連線池配置（所有對NSTC網站的請求共用）
+HTTP_POOL_CONNECTIONS = 4  # 保留連線池的主機數
+HTTP_POOL_MAXSIZE = 16  # 每個主機保留的連線數，應不小於同時請求數
+HTTP_POOL_BLOCK = True  # 連線用盡時等待歸還，不另開每次都要完整TLS交握的拋棄式連線
+HTTP_KEEPALIVE_IDLE = 60  # TCP keepalive 閒置多久開始探測（秒，0 表示停用）
+HTTP_KEEPALIVE_INTERVAL = 15  # TCP keepalive 探測間隔（秒）
+HTTP_KEEPALIVE_COUNT = 4  # TCP keepalive 探測失敗幾次視為斷線
+
+# 批次查詢配置
+BATCH_MAX_NAMES = 200  # 單次批次查詢的主持人數上限
+BATCH_WORKERS = 8  # 批次查詢共用的列表頁抓取執行緒數
 
 # CORS 配置
 CORS_ORIGINS = ["*"]  # 生產環境應設置為具體的前端域名
@@ -16,6 +46,53 @@ CORS_ORIGINS = ["*"]  # 生產環境應設置為具體的前端域名
 # 快取配置
 CACHE_TTL = 3600  # 快取過期時間（秒）
 MAX_CACHE_SIZE = 1000  # 最大快取記錄數
+PARSE_MEMO_SIZE = 2000  # 以內容雜湊記憶的頁面解析結果數
+PARSE_MEMO_TTL = 7 * 86400  # 解析結果不會過時，TTL只用來回收長期未使用的記錄（秒）
+AWARD_REPOSITORY_SIZE = 20000  # 程序內獎項資料庫最多保存的獎項數
+STATS_RESULT_CACHE_SIZE = 256  # 經費彙總結果快取的組合數（LRU）
+
+# HTML解析配置（parse_pool.py）
+# 解析行程數：大於1時以行程池解析，0或1時在執行緒中解析（API服務預設）；
+# 離線收錄（harvest.py）未設定時使用CPU核心數
+PARSE_PROCESSES = int(os.environ.get("PARSE_PROCESSES", 0))
+
+# 持久化儲存配置（SQLite，留空則停用；Lambda 可設為 /tmp/awards.sqlite3）
+AWARD_STORE_PATH = os.environ.get("AWARD_STORE_PATH", "")
+AWARD_STORE_MAX_AGE = 86400  # 持久化資料保鮮時間（秒）
+
+# 離線收錄配置（harvest.py）
+OPEN_AWARD_YEAR = 114  # 仍可能異動的年度，較早年度收錄完成後即不再更新
+HARVEST_OPEN_YEAR_MAX_AGE = 86400  # 開放年度收錄資料的保鮮時間（秒）
+HARVEST_ORGANS: list = []  # 網站不允許空白姓名查詢時，改以這些機構分區收錄
+
+# 匯出配置（export.py 與 /api/export）
+EXPORT_BATCH_ROWS = 1000  # 每次從儲存讀取的筆數，也是JSONL/CSV每段輸出的筆數
+EXPORT_ROW_GROUP_SIZE = 10000  # Parquet 每個 row group 的筆數
+
+# 背景重新整理與預熱配置（refresher.py）
+STALE_MAX_AGE = 7 * 86400  # 持久化資料過期後仍先回傳、並於背景重新整理的期限（秒）
+REFRESH_WORKERS = 2  # 背景重新整理的執行緒數
+REFRESH_MAX_PENDING = 100  # 排隊中的背景重新整理工作數上限
+REFRESH_RATE_LIMIT = 2.0  # 背景工作每個主機每秒請求數上限（另受 HOST_RATE_LIMIT 限制）
+REFRESH_RATE_BURST = 4  # 背景工作可累積的突發請求數
+# 0 時不先回傳過期資料再於背景重新查詢，改為前景重新查詢（失敗時仍回傳過期資料）；
+# Lambda 回應後即凍結容器，背景執行緒不會在回應後繼續執行
+REFRESH_IN_BACKGROUND = os.environ.get("REFRESH_IN_BACKGROUND", "1") == "1"
+# 離峰時段預熱的熱門主持人（逗號分隔）與年度
+PREWARM_PI_NAMES = [
+    name.strip()
+    for name in os.environ.get("PREWARM_PI_NAMES", "").split(",")
+    if name.strip()
+]
+PREWARM_YEARS = [OPEN_AWARD_YEAR]
+PREWARM_HOURS = (2, 6)  # 離峰時段 [開始, 結束) 時
+PREWARM_UTC_OFFSET = 8  # 離峰時段的時區（台灣時間）
+PREWARM_INTERVAL = 600  # 常駐服務檢查是否進入離峰時段的間隔（秒）
+PREWARM_LAMBDA_RESERVE = 8  # Lambda排程預熱保留的執行時間（秒），剩餘不足時不再開始新工作
+
+# Lambda冷啟動配置（lambda_handler.py）
+# 1 時容器初始化不載入FastAPI應用程式，第一個非健康檢查請求才載入
+LAMBDA_LAZY_INIT = os.environ.get("LAMBDA_LAZY_INIT", "0") == "1"
 
 # 日誌配置
 LOG_LEVEL = "INFO"
@@ -0,0 +1,45 @@
+"""
+pytest 共用的測試工具：重播伺服器fixture、不節流不重試的客戶端與測試用獎項
+
+測試模組以 from conftest import ... 取用常數與輔助函式
+"""
+
+import pytest
+
+from crawler import IMPACT_DETAIL_PAGE, LIST_PAGE, NSTCAwardClient
+from models import AwardItem
+from ratelimit import RateLimiter
+from replay_server import ReplayServer
+
+# 重播伺服器 server.requests 以頁面名稱計數
+DETAIL_PAGE = IMPACT_DETAIL_PAGE
+
+__all__ = ["DETAIL_PAGE", "LIST_PAGE", "make_award", "make_client"]
+
+
+@pytest.fixture
+def server():
+    with ReplayServer() as server:
+        yield server
+
+
+def make_client(server, **kwargs):
+    """連線重播伺服器、不節流也不重試的同步客戶端"""
+    return NSTCAwardClient(
+        base=server.url, rate_limiter=RateLimiter(0), retries=0, **kwargs
+    )
+
+
+def make_award(project_no, impact="", **fields):
+    """測試用獎項，未指定的年度、主持人、機構與計畫名稱使用預設值"""
+    return AwardItem.from_dict(
+        dict(
+            project_no=project_no,
+            award_year=fields.pop("award_year", "113"),
+            pi_name=fields.pop("pi_name", "李文廷"),
+            organ=fields.pop("organ", "國立臺灣大學"),
+            plan_name=fields.pop("plan_name", "測試計畫"),
+            impact=impact,
+            **fields,
+        )
+    )
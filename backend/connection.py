@@ -0,0 +1,299 @@
+"""
+對NSTC網站的HTTP連線池與TLS工作階段重用
+
+NSTC網站只接受TLS 1.2與較舊的加密套件，每條新連線都要完整交握。這裡讓連線池
+大小、連線用盡時是否等待與TCP keepalive可由設定調整，跨連線重用TLS工作階段，
+並統計取得連線的等待時間與連線、工作階段的重用比例。
+"""
+
+import os
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import metrics
+from config import (
+    HTTP_KEEPALIVE_COUNT,
+    HTTP_KEEPALIVE_IDLE,
+    HTTP_KEEPALIVE_INTERVAL,
+    HTTP_POOL_BLOCK,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+)
+
+
+class ConnectionStats:
+    """取得連線與TLS交握的統計（執行緒安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.new_connections = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.handshakes = 0
+        self.resumed = 0
+
+    def checkout(self, waited: float, reused: bool) -> None:
+        """記錄一次從連線池取得連線，reused 表示沿用已建立的連線"""
+        with self._lock:
+            self.checkouts += 1
+            self.new_connections += not reused
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+        metrics.POOL_CHECKOUT_SECONDS.observe(waited)
+        metrics.POOL_CHECKOUTS.inc(1, "reused" if reused else "new")
+        metrics.record("pool_wait", waited)
+        if not reused:
+            metrics.incr("new_connections")
+
+    def handshake(self, seconds: float, resumed: bool) -> None:
+        """記錄一次TLS交握，resumed 表示重用了先前的工作階段"""
+        mode = "resumed" if resumed else "full"
+        with self._lock:
+            self.handshakes += 1
+            self.resumed += resumed
+        metrics.TLS_HANDSHAKE_SECONDS.observe(seconds, mode)
+        metrics.record("tls_handshake", seconds)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "new_connections": self.new_connections,
+                "reuse_ratio": (
+                    round(1 - self.new_connections / self.checkouts, 4)
+                    if self.checkouts
+                    else None
+                ),
+                "wait_seconds": round(self.wait_seconds, 3),
+                "max_wait_seconds": round(self.max_wait, 3),
+                "tls_handshakes": self.handshakes,
+                "tls_resumed": self.resumed,
+                "tls_resume_ratio": (
+                    round(self.resumed / self.handshakes, 4)
+                    if self.handshakes
+                    else None
+                ),
+            }
+
+
+class _TrackedSSLObject(ssl.SSLObject):
+    """
+    記憶體BIO上的TLS連線（httpx等非同步客戶端），交握完成後記錄統計與工作階段
+
+    非同步客戶端會重複呼叫 do_handshake 直到不再需要等待網路資料，
+    交握時間從第一次呼叫起算。
+    """
+
+    _handshake_started: Optional[float] = None
+
+    def do_handshake(self) -> None:
+        if self._handshake_started is None:
+            self._handshake_started = time.perf_counter()
+        super().do_handshake()
+        if not self.server_side and self.server_hostname:
+            self.context._handshake_done(
+                self, time.perf_counter() - self._handshake_started
+            )
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    依主機重用TLS工作階段的SSLContext
+
+    保存每個主機最近一次交握的工作階段，新連線帶入後伺服器可略過完整交握
+    （TLS 1.2 session ID / session ticket）；requests的socket連線與httpx的
+    記憶體BIO連線共用同一份工作階段。CA憑證相同來源只載入一次：
+    requests會為每條新連線要求載入CA檔，多執行緒下也不會重複修改共用的設定。
+    """
+
+    sslobject_class = _TrackedSSLObject
+
+    def __init__(self, protocol: int, stats: Optional[ConnectionStats] = None):
+        self.stats = stats or ConnectionStats()
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self._verify_locations: Set[Tuple] = set()
+
+    def load_verify_locations(self, cafile=None, capath=None, cadata=None) -> None:
+        key = (
+            os.fspath(cafile) if cafile else None,
+            os.fspath(capath) if capath else None,
+            cadata,
+        )
+        with self._lock:
+            if key in self._verify_locations:
+                return
+            super().load_verify_locations(cafile, capath, cadata)
+            self._verify_locations.add(key)
+
+    def wrap_socket(
+        self,
+        sock,
+        server_side=False,
+        do_handshake_on_connect=True,
+        suppress_ragged_eofs=True,
+        server_hostname=None,
+        session=None,
+    ):
+        client = not server_side and server_hostname and do_handshake_on_connect
+        if client and session is None:
+            with self._lock:
+                session = self._sessions.get(server_hostname)
+        started = time.perf_counter()
+        ssock = super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+        if client:
+            self._handshake_done(ssock, time.perf_counter() - started)
+        return ssock
+
+    def wrap_bio(
+        self,
+        incoming,
+        outgoing,
+        server_side=False,
+        server_hostname=None,
+        session=None,
+    ):
+        if not server_side and server_hostname and session is None:
+            # anyio/asyncio可能以bytes傳入主機名稱，工作階段以str保存
+            host = server_hostname
+            if isinstance(host, bytes):
+                host = host.decode("ascii")
+            with self._lock:
+                session = self._sessions.get(host)
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+    def _handshake_done(self, conn, seconds: float) -> None:
+        """記錄交握統計並保存工作階段，conn 為SSLSocket或SSLObject"""
+        self.stats.handshake(seconds, conn.session_reused)
+        if conn.session is not None:
+            with self._lock:
+                self._sessions[conn.server_hostname] = conn.session
+
+
+def tls12_context(stats: Optional[ConnectionStats] = None) -> ResumingSSLContext:
+    """只允許TLS 1.2並放寬加密套件等級的SSLContext（NSTC網站需要）"""
+    ctx = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT, stats)
+    ctx.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+    ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
+    if hasattr(ssl, "VERIFY_X509_STRICT"):
+        ctx.verify_flags &= ~ssl.VERIFY_X509_STRICT
+    return ctx
+
+
+def default_ca_bundle() -> str:
+    """requests驗證憑證所用的CA檔：REQUESTS_CA_BUNDLE、CURL_CA_BUNDLE 或 certifi"""
+    return (
+        os.environ.get("REQUESTS_CA_BUNDLE")
+        or os.environ.get("CURL_CA_BUNDLE")
+        or DEFAULT_CA_BUNDLE_PATH
+    )
+
+
+def keepalive_socket_options() -> List[Tuple[int, int, int]]:
+    """urllib3預設的socket選項加上TCP keepalive，避免閒置連線被中間設備切斷"""
+    options = list(HTTPConnection.default_socket_options)
+    if HTTP_KEEPALIVE_IDLE > 0:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        for name, value in (
+            ("TCP_KEEPIDLE", HTTP_KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", HTTP_KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", HTTP_KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class _TrackedPool:
+    """記錄取得連線等待時間與是否沿用既有連線的連線池"""
+
+    conn_stats: ConnectionStats
+
+    def _get_conn(self, timeout=None):
+        started = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        # 尚未連線（新建立或閒置後被關閉）的連線需要重新TCP連線與TLS交握
+        self.conn_stats.checkout(
+            time.perf_counter() - started, reused=conn.sock is not None
+        )
+        return conn
+
+
+def tracked_pool_classes(stats: ConnectionStats) -> Dict[str, Type]:
+    """回傳統計寫入stats的 http/https 連線池類別"""
+    return {
+        scheme: type(
+            f"Tracked{base.__name__}", (_TrackedPool, base), {"conn_stats": stats}
+        )
+        for scheme, base in (
+            ("http", HTTPConnectionPool),
+            ("https", HTTPSConnectionPool),
+        )
+    }
+
+
+class TLS12Adapter(HTTPAdapter):
+    """
+    自訂HTTP(S)適配器，強制使用TLS 1.2
+
+    連線池大小、用盡時是否等待歸還與TCP keepalive取自設定；同一個適配器可由
+    多個執行緒共用，統計寫入 conn_stats。
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        pool_block: bool = HTTP_POOL_BLOCK,
+        stats: Optional[ConnectionStats] = None,
+    ) -> None:
+        """
+        Args:
+            pool_connections: 保留連線池的主機數
+            pool_maxsize: 每個主機保留的連線數上限
+            pool_block: 連線用盡時是否等待歸還；否則另開用完即丟的連線
+            stats: 統計寫入的對象，預設建立新的
+        """
+        self.conn_stats = stats or ConnectionStats()
+        self._ssl_context = tls12_context(self.conn_stats)
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs["ssl_context"] = self._ssl_context
+        pool_kwargs["socket_options"] = keepalive_socket_options()
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = tracked_pool_classes(
+            self.conn_stats
+        )
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs["ssl_context"] = self._ssl_context
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
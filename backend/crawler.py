@@ -1,61 +1,218 @@
-import re
-import ssl
-from typing import Optional, List
-from urllib.parse import urljoin
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urljoin, urlsplit
 
 import requests
-from requests.adapters import HTTPAdapter
-from bs4 import BeautifulSoup
 
-from models import AwardItem
-
-
-BASE = "https://wsts.nstc.gov.tw/STSWeb/Award/"
-LIST_ENDPOINT = urljoin(BASE, "AwardMultiQuery.aspx")
-IMPACT_DETAIL_ENDPOINT = urljoin(BASE, "AwardDialog3.aspx")
-
-
-class TLS12Adapter(HTTPAdapter):
-    """自訂HTTPS適配器，強制使用TLS 1.2"""
-
-    def __init__(self) -> None:
-        ctx = ssl.create_default_context()
-        ctx.minimum_version = ssl.TLSVersion.TLSv1_2
-        ctx.maximum_version = ssl.TLSVersion.TLSv1_2
-        ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
-        if hasattr(ssl, "VERIFY_X509_STRICT"):
-            ctx.verify_flags &= ~ssl.VERIFY_X509_STRICT
-        self._ssl_context = ctx
-        super().__init__()
-
-    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
-        pool_kwargs["ssl_context"] = self._ssl_context
-        return super().init_poolmanager(
-            connections, maxsize, block=block, **pool_kwargs
-        )
-
-    def proxy_manager_for(self, proxy, **proxy_kwargs):
-        proxy_kwargs["ssl_context"] = self._ssl_context
-        return super().proxy_manager_for(proxy, **proxy_kwargs)
+from cache import TTLCache
+from config import (
+    CACHE_TTL,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_TIMEOUT,
+    CRAWLER_BACKOFF_BASE,
+    CRAWLER_BACKOFF_MAX,
+    CRAWLER_CONNECT_TIMEOUT,
+    CRAWLER_RETRY,
+    CRAWLER_SLOW_THRESHOLD,
+    CRAWLER_TIMEOUT,
+    DETAIL_FETCH_CONCURRENCY,
+    HOST_RATE_BURST,
+    HOST_RATE_LIMIT,
+    LIST_MAX_PAGES,
+    LIST_PAGE_CONCURRENCY,
+    MAX_CACHE_SIZE,
+    NSTC_BASE_URL,
+    PARSE_MEMO_SIZE,
+    PARSE_MEMO_TTL,
+)
+import metrics
+from connection import ConnectionStats, TLS12Adapter
+from detail_parser import parse_impact_detail
+from grid_parser import GridPage, GridRow, parse_award_page
+from models import IMPACT_FULL, AwardItem
+from parse_pool import ParseStage, default_parse_stage
+from ratelimit import RateLimiter, acquire_budget
+from refresher import BackgroundRefresher, in_background
+from resilience import (
+    CircuitBreaker,
+    RetryPolicy,
+    UpstreamHealth,
+    is_retryable,
+)
+from singleflight import SingleFlight, request_key
+
+logger = logging.getLogger(__name__)
+
+
+BASE = NSTC_BASE_URL
+LIST_PAGE = "AwardMultiQuery.aspx"
+IMPACT_DETAIL_PAGE = "AwardDialog3.aspx"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
+    "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8",
+}
+
+
+class ListTruncatedError(Exception):
+    """查詢結果超過 LIST_MAX_PAGES 頁，只取得部分資料；部分結果不可快取或視為完整"""
+
+    def __init__(self, params: Dict[str, str], pages: int):
+        super().__init__(f"列表頁超過 {pages} 頁，查詢結果不完整，請縮小查詢範圍")
+        self.params = params
+        self.pages = pages
+
+
+def list_params(year: int, code: str, name: str, organ: str) -> Dict[str, str]:
+    """列表頁的查詢參數"""
+    return {"year": str(year), "code": code, "organ": organ, "name": name}
+
+
+def observe_upstream(
+    endpoint: str, started: float, outcome: str, size: int = 0
+) -> None:
+    """記錄單次上游請求的耗時與回應大小"""
+    elapsed = time.monotonic() - started
+    metrics.UPSTREAM_REQUEST_SECONDS.observe(elapsed, endpoint, outcome)
+    metrics.record("upstream", elapsed)
+    metrics.incr("upstream_requests")
+    if size:
+        metrics.UPSTREAM_RESPONSE_BYTES.inc(size, endpoint)
+        metrics.incr("upstream_bytes", size)
+
+
+def content_digest(content: bytes) -> bytes:
+    """回應內容的雜湊，作為解析結果記憶的鍵值"""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def response_encoding(headers: Mapping[str, str]) -> Optional[str]:
+    """
+    回應的字元編碼，同步與非同步客戶端以同一方式判斷
+
+    只採用 Content-Type 宣告的 charset，沒有宣告時回傳None，以UTF-8解碼
+    （NSTC網站的編碼）。requests 對沒有 charset 的 text/html 預設 ISO-8859-1、
+    httpx 預設 UTF-8，沿用各自的判斷會把相同內容解成不同文字。
+    """
+    for param in headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("\"'").lower() or None
+    return None
+
+
+def parse_memo_key(
+    page: str, headers: Mapping[str, str], content: bytes
+) -> Tuple[str, bytes, Optional[str]]:
+    """解析結果記憶的鍵值：頁面種類、內容雜湊與解碼所用的編碼"""
+    return page, content_digest(content), response_encoding(headers)
 
 
 class NSTCAwardClient:
     """NSTC獎項查詢客戶端"""
 
-    def __init__(self, timeout: int = 30):
-        self.s = requests.Session()
-        self.s.mount("https://", TLS12Adapter())
-        self.s.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
-                "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8",
-            }
-        )
+    def __init__(
+        self,
+        timeout: int = CRAWLER_TIMEOUT,
+        detail_workers: int = DETAIL_FETCH_CONCURRENCY,
+        cache_ttl: float = CACHE_TTL,
+        cache_size: int = MAX_CACHE_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+        retries: int = CRAWLER_RETRY,
+        base: str = BASE,
+        refresher: Optional[BackgroundRefresher] = None,
+        parse_stage: Optional[ParseStage] = None,
+    ):
+        """
+        Args:
+            base: NSTC獎項查詢網站的根網址，可指向本機的重播伺服器
+            refresher: 提供時，過期的快取先回傳再於背景重新抓取
+            parse_stage: HTML解析階段，預設依 PARSE_PROCESSES 使用行程池或執行緒
+        """
+        base = base.rstrip("/") + "/"
+        self.list_endpoint = urljoin(base, LIST_PAGE)
+        self.impact_detail_endpoint = urljoin(base, IMPACT_DETAIL_PAGE)
+        # HTTP工作階段與TLS設定延後到第一次請求時才建立，縮短冷啟動時間
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self.conn_stats = ConnectionStats()
         self.timeout = timeout
+        # 所有查詢共用的計畫概述抓取池，限制對NSTC網站的同時請求數
+        self._detail_pool = ThreadPoolExecutor(
+            max_workers=max(1, detail_workers), thread_name_prefix="nstc-detail"
+        )
+        # 同一次查詢的後續頁面以此池並行換頁
+        self._page_pool = ThreadPoolExecutor(
+            max_workers=max(1, LIST_PAGE_CONCURRENCY), thread_name_prefix="nstc-page"
+        )
+        # 列表頁以 (year, code, name, organ) 為鍵，概述全文以計畫編號為鍵
+        self.list_cache = TTLCache(cache_ttl, cache_size)
+        self.detail_cache = TTLCache(cache_ttl, cache_size)
+        # 以回應內容雜湊為鍵的解析結果，內容未變的頁面不必重新解析；
+        # 並記錄每個URL的ETag/Last-Modified，上游支援時改送條件式請求
+        self.parse_memo = TTLCache(PARSE_MEMO_TTL, PARSE_MEMO_SIZE)
+        self.validators = TTLCache(PARSE_MEMO_TTL, PARSE_MEMO_SIZE)
+        # 未記憶的頁面交給解析階段，多核心時在行程池中解析
+        self.parse_stage = parse_stage or default_parse_stage()
+        # 合併相同URL與參數的同時請求，只向NSTC網站發出一次
+        self._flight = SingleFlight()
+        # 所有對外請求共用的每主機每秒請求數上限
+        self.rate_limiter = rate_limiter or RateLimiter(
+            HOST_RATE_LIMIT, HOST_RATE_BURST
+        )
+        # 暫時性錯誤以退避重試；上游吃力時放慢，持續失敗時斷路快速失敗
+        self.retry = RetryPolicy(retries, CRAWLER_BACKOFF_BASE, CRAWLER_BACKOFF_MAX)
+        self.breaker = CircuitBreaker(
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT
+        )
+        self.health = UpstreamHealth(CRAWLER_SLOW_THRESHOLD, CRAWLER_BACKOFF_MAX)
+        self.refresher = refresher
+
+    @property
+    def s(self) -> requests.Session:
+        """共用的HTTP工作階段，第一次使用時才建立"""
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._new_session()
+                session = self._session
+        return session
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = TLS12Adapter(stats=self.conn_stats)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session
 
     def search_awards(
-        self, *, year: int, code: str, name: str, organ: str = ""
+        self,
+        *,
+        year: int,
+        code: str,
+        name: str,
+        organ: str = "",
+        include_impact: str = IMPACT_FULL,
+        refresh: bool = False,
     ) -> List[AwardItem]:
         """
         查詢符合條件的獎項資料
@@ -65,70 +222,201 @@ class NSTCAwardClient:
             code: 獎項代碼 (e.g., QS01)
             name: 主持人姓名（可中文）
             organ: 機構名稱（可選）
+            include_impact: full 時逐筆抓取概述全文，其餘只保留列表頁預覽
+            refresh: 略過列表頁快取重新查詢（概述全文仍使用快取）
 
         Returns:
             AwardItem列表
         """
-        params = {
-            "year": str(year),
-            "code": code,
-            "organ": organ,
-            "name": name,
-        }
-        r = self.s.get(LIST_ENDPOINT, params=params, timeout=self.timeout)
-        r.raise_for_status()
+        rows = self.search_award_rows(
+            year=year, code=code, name=name, organ=organ, refresh=refresh
+        )
+        if include_impact != IMPACT_FULL:
+            return [row.item for row in rows]
+        return self.attach_impact_details(rows)
+
+    def attach_impact_details(self, rows: Iterable[GridRow]) -> List[AwardItem]:
+        """
+        為列表頁資料補上概述全文
 
-        soup = BeautifulSoup(r.text, "lxml")
-        grid = soup.select_one("#wUctlAwardQueryPage_grdResult")
-        if not grid:
-            return []
+        先收集所有需要全文的計畫編號，再一次並行抓取；抓取失敗時保留預覽文字。
+        """
+        rows = list(rows)
+        details = self.fetch_impact_details(
+            award.project_no for award, has_detail in rows if has_detail
+        )
 
         items: List[AwardItem] = []
-        for tr in grid.select("tr.Grid_Row"):
-            tds = tr.find_all("td", recursive=False)
-            if len(tds) < 4:
-                continue
+        for award, has_detail in rows:
+            full = details.get(award.project_no) if has_detail else None
+            items.append(replace(award, impact=full) if full else award)
+        return items
+
+    def search_award_rows(
+        self,
+        *,
+        year: int,
+        code: str,
+        name: str,
+        organ: str = "",
+        refresh: bool = False,
+    ) -> List[GridRow]:
+        """
+        查詢並解析獎項列表頁的所有頁面（不抓取概述全文）
 
-            award_year = tds[0].get_text(strip=True)
-            pi_name = tds[1].get_text(strip=True)
-            organ_text = tds[2].get_text(strip=True)
-            content_td = tds[3]
-
-            def span_by_id_contains(key: str) -> str:
-                sp = content_td.find("span", id=re.compile(re.escape(key)))
-                return sp.get_text(strip=True) if sp else ""
-
-            plan_name = span_by_id_contains("lblAWARD_PLAN_CHI_DESCc_")
-            period = span_by_id_contains("lblAWARD_ST_ENDc_")
-            total_amount = span_by_id_contains("lblAWARD_TOT_AUD_AMTc_")
-            impact_preview = span_by_id_contains("lblIMPACT_Sc_")
-            keywords_zh = span_by_id_contains("lblKEYS_CHIc_")
-            keywords_en = span_by_id_contains("lblKEYS_ENGc_")
-
-            project_no = self._extract_project_no(content_td)
-
-            impact_full = impact_preview
-            if project_no and self._has_impact_detail_link(content_td):
-                full = self.fetch_impact_detail(project_no)
-                if full:
-                    impact_full = full
-
-            items.append(
-                AwardItem(
-                    award_year=award_year,
-                    pi_name=pi_name,
-                    organ=organ_text,
-                    plan_name=plan_name,
-                    period=period,
-                    total_amount=total_amount,
-                    impact=impact_full,
-                    keywords_zh=keywords_zh,
-                    keywords_en=keywords_en,
-                    project_no=project_no,
+        Args:
+            refresh: 略過快取重新查詢
+
+        Returns:
+            GridRow列表，impact 為列表頁上的預覽文字
+        """
+        key = (str(year), code, name, organ)
+        rows = None
+        if not refresh:
+            rows = self.list_cache.get(key)
+            metrics.cache_lookup("list", rows is not None)
+        if rows is None:
+            params = list_params(year, code, name, organ)
+
+            def fetch() -> List[GridRow]:
+                try:
+                    rows = [row for page in self._iter_pages(params) for row in page]
+                except Exception as e:
+                    stale = self.list_cache.get(key, allow_stale=True)
+                    if stale is None:
+                        raise
+                    logger.warning("列表頁查詢失敗，改用過期快取 %s: %s", key, e)
+                    return stale
+                self.list_cache.set(key, rows)
+                return rows
+
+            flight_key = request_key(self.list_endpoint, params)
+            if not refresh:
+                rows = self._serve_stale(self.list_cache, key, flight_key, fetch)
+            if rows is None:
+                rows = self._flight.do(flight_key, fetch)
+        return rows
+
+    def iter_award_pages(
+        self, *, year: int, code: str, name: str, organ: str = ""
+    ) -> Iterator[List[GridRow]]:
+        """
+        逐頁查詢並解析獎項列表頁（不經過列表快取），呼叫端可逐頁處理而不必
+        一次保存所有結果
+
+        Yields:
+            每一頁的GridRow列表，依頁碼順序
+        """
+        return self._iter_pages(list_params(year, code, name, organ))
+
+    def _iter_pages(self, params: Dict[str, str]) -> Iterator[List[GridRow]]:
+        """
+        第一頁以GET取得，其餘頁面以ASP.NET換頁回傳取得
+
+        換頁回傳帶上前一頁表單的 __VIEWSTATE、__EVENTVALIDATION 等欄位與
+        __EVENTTARGET/__EVENTARGUMENT (Page$N)。同一份表單狀態的分頁列可前往
+        的頁面（通常是接下來的十頁）並行抓取，再以其中頁碼最大的一頁繼續；
+        回傳的頁碼與要求的不符時，表示上游不接受同一份狀態的多個換頁，改為逐頁。
+        已產出 LIST_MAX_PAGES 頁後仍有後續頁面時拋出 ListTruncatedError。
+        """
+        page: GridPage = self._fetch_parsed(
+            self.list_endpoint, params, "list", parse_award_page
+        )
+        yield page.rows
+        fetched = 1
+        sequential = LIST_PAGE_CONCURRENCY <= 1
+        while page.pager is not None:
+            targets = sorted(n for n in page.pager.pages if n > page.pager.current)
+            if not targets:
+                break
+            if fetched >= LIST_MAX_PAGES:
+                raise ListTruncatedError(params, LIST_MAX_PAGES)
+            if sequential:
+                targets = targets[:1]
+            targets = targets[: LIST_MAX_PAGES - fetched]
+
+            futures = [
+                metrics.submit(self._page_pool, self._fetch_page, page, n)
+                for n in targets
+            ]
+            last: Optional[GridPage] = None
+            mismatch = False
+            try:
+                for n, future in zip(targets, futures):
+                    result: GridPage = future.result()
+                    if result.pager is not None and result.pager.current != n:
+                        mismatch = True
+                        break
+                    yield result.rows
+                    fetched += 1
+                    last = result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+            if last is None:
+                logger.warning(
+                    "換頁結果與要求的頁碼不符，停止於第 %d 頁 %s",
+                    page.pager.current,
+                    params,
                 )
-            )
+                break
+            if mismatch and not sequential:
+                logger.info("上游不接受並行換頁，改為逐頁抓取 %s", params)
+                sequential = True
+            page = last
+
+    def _fetch_page(self, page: GridPage, n: int) -> GridPage:
+        """以page的表單狀態換頁到第n頁"""
+        url, data = self.page_postback(page, n)
+        metrics.incr("list_pages")
+        # 換頁回傳只是以表單狀態讀取另一頁，上游不保存狀態，重送與並行換頁送出
+        # 同一份 __VIEWSTATE 相同；回到錯誤頁面時由 _iter_pages 的頁碼檢查處理
+        return self._fetch_parsed(
+            url, {}, "list", parse_award_page, data=data, idempotent=True
+        )
 
-        return items
+    def page_postback(self, page: GridPage, n: int) -> Tuple[str, Dict[str, str]]:
+        """回傳以page的表單狀態換頁到第n頁的 (網址, 表單欄位)"""
+        url = urljoin(self.list_endpoint, page.action or LIST_PAGE)
+        data = {
+            **page.form,
+            "__EVENTTARGET": page.pager.event_target,
+            "__EVENTARGUMENT": page.pager.pages[n],
+        }
+        return url, data
+
+    def fetch_impact_details(self, project_nos: Iterable[str]) -> Dict[str, str]:
+        """
+        並行獲取多個計畫的概述全文
+
+        Args:
+            project_nos: 計畫編號，重複的編號只會抓取一次
+
+        Returns:
+            計畫編號對應概述全文的字典；抓取失敗或無內容的計畫不會出現在結果中
+        """
+        unique = list(dict.fromkeys(no for no in project_nos if no))
+        if not unique:
+            return {}
+        metrics.DETAIL_FANOUT.inc(len(unique))
+        metrics.incr("detail_fanout", len(unique))
+
+        futures = {
+            metrics.submit(self._detail_pool, self.fetch_impact_detail, no): no
+            for no in unique
+        }
+        details: Dict[str, str] = {}
+        for future in as_completed(futures):
+            no = futures[future]
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.warning("獲取計畫概述失敗 %s: %s", no, e)
+                continue
+            if text:
+                details[no] = text
+        return details
 
     def fetch_impact_detail(self, project_no: str) -> str:
         """
@@ -140,51 +428,226 @@ class NSTCAwardClient:
         Returns:
             計畫概述完整文本
         """
-        r = self.s.get(
-            IMPACT_DETAIL_ENDPOINT, params={"no": project_no}, timeout=self.timeout
+        text = self.detail_cache.get(project_no)
+        metrics.cache_lookup("detail", text is not None)
+        if text is None:
+
+            def fetch() -> str:
+                try:
+                    text = self._fetch_impact_detail(project_no)
+                except Exception as e:
+                    stale = self.detail_cache.get(project_no, allow_stale=True)
+                    if stale is None:
+                        raise
+                    logger.warning("概述全文查詢失敗，改用過期快取 %s: %s", project_no, e)
+                    return stale
+                self.detail_cache.set(project_no, text)
+                return text
+
+            params = {"no": project_no}
+            key = request_key(self.impact_detail_endpoint, params)
+            text = self._serve_stale(self.detail_cache, project_no, key, fetch)
+            if text is None:
+                text = self._flight.do(key, fetch)
+        return text
+
+    def _serve_stale(
+        self, cache: TTLCache, key: Hashable, flight_key: Hashable, fetch: Callable
+    ) -> Any:
+        """
+        有背景重新整理器時回傳過期的快取，並在背景以fetch重新抓取
+
+        背景抓取與同時的前景請求共用合併請求的鍵值，不會重複向上游請求；
+        背景工作本身需要的是新資料，不回傳過期的快取。
+
+        Returns:
+            過期的快取值；沒有可用的快取時回傳None
+        """
+        if self.refresher is None or in_background():
+            return None
+        stale = cache.get(key, allow_stale=True)
+        if stale is not None:
+            metrics.incr("stale_served")
+            self.refresher.submit(flight_key, self._flight.do, flight_key, fetch)
+        return stale
+
+    def _fetch_impact_detail(self, project_no: str) -> str:
+        """向NSTC網站請求計畫概述頁並擷取全文"""
+        return self._fetch_parsed(
+            self.impact_detail_endpoint,
+            {"no": project_no},
+            "detail",
+            parse_impact_detail,
         )
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "lxml")
-
-        # 優先嘗試常見的ID
-        for pat in [r"lblIMPACT", r"IMPACT_S", r"Impact", r"impact"]:
-            node = soup.find(id=re.compile(pat))
-            if node:
-                text = node.get_text(" ", strip=True)
-                if text:
-                    return text
-
-        # fallback：找最像「內文」的td/div（文字最多的那個）
-        candidates = soup.find_all(["td", "div"])
-        best = ""
-        for c in candidates:
-            text = c.get_text(" ", strip=True)
-            if len(text) > len(best):
-                best = text
-
-        best = re.sub(r"\s+", " ", best).strip()
-        return best
-
-    @staticmethod
-    def _has_impact_detail_link(content_td) -> bool:
-        a = content_td.find("a", id=re.compile(r"lnkZIMPACT_S_"))
-        return a is not None
-
-    @staticmethod
-    def _extract_project_no(content_td) -> Optional[str]:
-        """
-        從onclick屬性中提取計畫編號
+
+    def _fetch_parsed(
+        self,
+        url: str,
+        params: Dict[str, str],
+        page: str,
+        parse: Callable[[str], Any],
+        data: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> Any:
+        """
+        請求頁面並解析，內容與先前相同時直接沿用解析結果
+
+        先前的回應帶有ETag或Last-Modified時送出條件式請求；收到304且解析結果
+        仍在記憶中即不必下載與解析，否則改送一般請求。
+
+        Args:
+            page: 頁面種類（list/detail），用於解析結果的鍵值與指標標籤
+            parse: 模組層級的解析函式，其結果會被共用，呼叫端不可修改
+            data: 表單欄位，提供時以POST送出且不使用條件式請求
+            idempotent: POST可安全重送，失敗時與GET一樣重試
+        """
+        if data is not None:
+            r = self._request("POST", url, params, data=data, idempotent=idempotent)
+            return self._parse_response(r, page, parse)
+
+        key = request_key(url, params)
+        headers, memo_key = self.conditional_headers(key)
+        if headers is not None:
+            r = self._request("GET", url, params, headers)
+            if r.status_code == 304:
+                parsed = self.parse_memo.get(memo_key)
+                metrics.cache_lookup("not_modified", parsed is not None)
+                if parsed is not None:
+                    return parsed
+                r = self._request("GET", url, params)
+        else:
+            r = self._request("GET", url, params)
+
+        parsed = self._parse_response(r, page, parse)
+        self.remember_validators(key, page, r.headers, r.content)
+        return parsed
+
+    def conditional_headers(
+        self, key: Hashable
+    ) -> Tuple[Optional[Dict[str, str]], Optional[Tuple]]:
+        """
+        回傳條件式請求的標頭與先前回應的解析結果記憶鍵值
 
         Returns:
-            計畫編號 (e.g., 113WFA2110082)
-        """
-        onclick_nodes = content_td.find_all(["a", "input"])
-        for node in onclick_nodes:
-            onclick = node.get("onclick") or ""
-            m = re.search(
-                r"(?:AwardDialog3\.aspx\?no=|AwardDialog\.aspx\?year=\d+&sys=[^&]+&no=)([A-Za-z0-9]+)",
-                onclick,
-            )
-            if m:
-                return m.group(1)
-        return None
+            (If-None-Match/If-Modified-Since 標頭, 記憶鍵值)；沒有驗證值時為 (None, None)
+        """
+        validator = self.validators.get(key)
+        if validator is None:
+            return None, None
+        etag, last_modified, memo_key = validator
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers, memo_key
+
+    def remember_validators(
+        self, key: Hashable, page: str, headers: Mapping[str, str], content: bytes
+    ) -> None:
+        """回應帶有ETag或Last-Modified時記錄下來，下次改送條件式請求"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            memo_key = parse_memo_key(page, headers, content)
+            self.validators.set(key, (etag, last_modified, memo_key))
+
+    def _parse_response(
+        self, r: requests.Response, page: str, parse: Callable[[str], Any]
+    ) -> Any:
+        """解析回應，相同內容與編碼的頁面沿用記憶的解析結果"""
+        memo_key = parse_memo_key(page, r.headers, r.content)
+        parsed = self.parse_memo.get(memo_key)
+        metrics.cache_lookup("parse_memo", parsed is not None)
+        if parsed is None:
+            with metrics.stage(f"parse_{page}", metrics.PARSE_SECONDS, page):
+                parsed = self.parse_stage.run(parse, r.content, memo_key[2])
+            self.parse_memo.set(memo_key, parsed)
+        return parsed
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        params: Dict[str, str],
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> requests.Response:
+        """
+        送出HTTP請求（GET或換頁回傳的POST）
+
+        依每主機限速與上游健康狀況節流；連線失敗、逾時與 429/5xx 以帶抖動的
+        指數退避重試。POST可能已被上游處理，只有呼叫端標示 idempotent 時才重試。
+        斷路器開啟時直接拋出CircuitOpenError。
+        """
+        endpoint = urlsplit(url).path.rsplit("/", 1)[-1]
+        delays = self.retry.delays() if method == "GET" or idempotent else iter(())
+        while True:
+            probe = self.breaker.before_call()
+            try:
+                budget_wait = acquire_budget(url)
+                if budget_wait:
+                    metrics.UPSTREAM_WAIT_SECONDS.inc(budget_wait, "background_budget")
+                waited = self.rate_limiter.acquire(url)
+                if waited:
+                    metrics.record("rate_limit_wait", waited)
+                    metrics.UPSTREAM_WAIT_SECONDS.inc(waited, "rate_limit")
+                pacing = self.health.pacing_delay()
+                if pacing:
+                    time.sleep(pacing)
+                    metrics.record("pacing_wait", pacing)
+                    metrics.UPSTREAM_WAIT_SECONDS.inc(pacing, "pacing")
+
+                started = time.monotonic()
+                try:
+                    r = self.s.request(
+                        method,
+                        url,
+                        params=params,
+                        data=data,
+                        headers=headers,
+                        timeout=(CRAWLER_CONNECT_TIMEOUT, self.timeout),
+                    )
+                    r.raise_for_status()
+                except requests.RequestException as e:
+                    observe_upstream(endpoint, started, "error")
+                    if not is_retryable(e):
+                        # 4xx 表示請求本身有誤，上游仍正常運作
+                        self.health.record(time.monotonic() - started, ok=True)
+                        self.breaker.record_success()
+                        raise
+                    self.health.record(time.monotonic() - started, ok=False)
+                    self.breaker.record_failure()
+                    delay = next(delays, None)
+                    if delay is None:
+                        raise
+                    logger.info("上游請求失敗，%.2f 秒後重試 %s: %s", delay, url, e)
+                    metrics.incr("upstream_retries")
+                    time.sleep(delay)
+                    continue
+
+                observe_upstream(endpoint, started, "ok", len(r.content))
+                self.health.record(time.monotonic() - started, ok=True)
+                self.breaker.record_success()
+                return r
+            finally:
+                # 試探請求被取消或以非上游錯誤結束時釋放名額
+                self.breaker.release_probe(probe)
+
+    def stats(self) -> Dict[str, dict]:
+        """回傳快取命中、合併請求、限速與上游健康統計"""
+        return {
+            "list": self.list_cache.stats(),
+            "detail": self.detail_cache.stats(),
+            "parse_memo": self.parse_memo.stats(),
+            "parse": self.parse_stage.stats(),
+            "singleflight": self._flight.stats(),
+            "refresh": self.refresher.stats() if self.refresher else None,
+            "connections": self.conn_stats.stats(),
+            "rate_limit": self.rate_limiter.stats(),
+            "upstream": {
+                **self.health.stats(),
+                "circuit": self.breaker.stats(),
+            },
+        }
@@ -0,0 +1,128 @@
+"""
+計畫概述頁（AwardDialog3.aspx）解析器
+
+以lxml解析整頁後，單次走訪找出id符合常見命名的節點並取其文字；找不到時改以
+文字密度挑選內文區塊：每段文字只計入最近的td/div祖先（連結文字不計），
+文字最多的區塊即為內文。每個節點只走訪一次，耗時與頁面大小成正比，
+不會因巢狀的td/div重複擷取文字。
+"""
+
+import re
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from grid_parser import parse_html
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+# 依序嘗試的id樣式，前面的優先
+IMPACT_ID_PATTERNS = [
+    re.compile(pattern) for pattern in (r"lblIMPACT", r"IMPACT_S", r"Impact", r"impact")
+]
+
+BLOCK_TAGS = frozenset(("td", "div"))
+SKIP_TAGS = frozenset(("script", "style", "noscript", "template"))
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def parse_impact_detail(text: str) -> str:
+    """從計畫概述頁擷取全文"""
+    from lxml import etree
+
+    try:
+        doc = parse_html(text)
+    except etree.ParserError:
+        # 空白或只有註解的回應
+        return ""
+
+    # 每個id樣式第一個符合的節點
+    matches: Dict[int, "etree._Element"] = {}
+    for node in doc.iter():
+        node_id = node.get("id") if isinstance(node.tag, str) else None
+        if not node_id:
+            continue
+        for i, pattern in enumerate(IMPACT_ID_PATTERNS):
+            if i not in matches and pattern.search(node_id):
+                matches[i] = node
+        if len(matches) == len(IMPACT_ID_PATTERNS):
+            break
+    for i in sorted(matches):
+        found = block_text(matches[i])
+        if found:
+            return found
+
+    # fallback：文字密度最高的td/div
+    best = densest_block(doc)
+    if best is None:
+        return ""
+    return WHITESPACE_RE.sub(" ", block_text(best)).strip()
+
+
+def block_text(node: "etree._Element") -> str:
+    """等同BeautifulSoup的 get_text(" ", strip=True)（不含script/style與註解）"""
+    parts = []
+    for s, _ in iter_text(node):
+        s = s.strip()
+        if s:
+            parts.append(s)
+    return " ".join(parts)
+
+
+def densest_block(doc: "etree._Element") -> Optional["etree._Element"]:
+    """回傳直屬文字（不含連結）最多的td/div，相同時取文件中較前面的"""
+    scores: Dict["etree._Element", int] = {}
+    for s, block in iter_text(doc):
+        if block is not None:
+            size = len(s.strip())
+            if size:
+                scores[block] = scores.get(block, 0) + size
+    if not scores:
+        return None
+    return max(scores, key=scores.__getitem__)
+
+
+# 走訪堆疊的一層: (節點, 所屬區塊, 是否略過文字, 是否在連結內)
+_Frame = Tuple["etree._Element", Optional["etree._Element"], bool, bool]
+
+
+def iter_text(
+    root: "etree._Element",
+) -> Iterator[Tuple[str, Optional["etree._Element"]]]:
+    """
+    依文件順序產生 (文字, 所屬區塊)
+
+    所屬區塊為最近的td/div祖先（含自身），連結內的文字為None；略過註解與
+    script/style的內容。以堆疊記錄祖先，每個節點只進出堆疊一次。
+    """
+    stack: List[_Frame] = []
+    for node in root.iter():
+        parent = node.getparent()
+        while stack and stack[-1][0] is not parent:
+            yield from _tail(stack.pop(), stack)
+
+        _, block, skip, link = stack[-1] if stack else (None, None, False, False)
+        tag = node.tag
+        if isinstance(tag, str):
+            skip = skip or tag in SKIP_TAGS
+            link = link or tag == "a"
+            if tag in BLOCK_TAGS:
+                block = node
+            if node.text and not skip:
+                yield node.text, None if link else block
+        # 註解等非元素節點沒有內文，只有其後的tail文字屬於父節點
+        stack.append((node, block, skip, link))
+
+    while stack:
+        yield from _tail(stack.pop(), stack)
+
+
+def _tail(
+    frame: _Frame, stack: List[_Frame]
+) -> Iterator[Tuple[str, Optional["etree._Element"]]]:
+    """離開節點時產生其tail文字；tail屬於父節點，走訪起點的tail不在範圍內"""
+    node = frame[0]
+    if not stack or not node.tail:
+        return
+    _, block, skip, link = stack[-1]
+    if not skip:
+        yield node.tail, None if link else block
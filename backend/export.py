@@ -0,0 +1,334 @@
+"""
+匯出獎項資料為 JSONL、CSV 或 Parquet
+
+從持久化儲存或NSTC網站逐筆取得獎項資料（generator），依序編碼後輸出；有安裝
+pyarrow 時可寫成 Parquet（每 EXPORT_ROW_GROUP_SIZE 筆一個 row group）。每次只
+保留一段輸出（EXPORT_BATCH_ROWS 筆或一個 row group），記憶體用量與資料量無關；
+/api/export 以同樣的輸出段落作為分塊回應。
+
+用法:
+    python export.py --year 113 --format csv -o awards_113.csv
+    python export.py --year 113 --year 112 --format parquet -o awards.parquet
+    python export.py --source crawler --year 114 --name 李文廷 --format jsonl
+"""
+
+import argparse
+import csv
+import io
+import logging
+import sys
+import time
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import fastjson
+import metrics
+from config import (
+    AWARD_STORE_MAX_AGE,
+    AWARD_STORE_PATH,
+    EXPORT_BATCH_ROWS,
+    EXPORT_ROW_GROUP_SIZE,
+    LOG_LEVEL,
+)
+from models import IMPACT_FULL, IMPACT_PREVIEW, RECORD_FIELDS, AwardItem
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+EXPORT_MEDIA_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+@lru_cache(maxsize=None)
+def _pyarrow():
+    """回傳 (pyarrow, pyarrow.parquet)；延後到第一次匯出Parquet才載入"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # 可選依賴，未安裝時不支援Parquet
+        return None
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_available() -> bool:
+    return _pyarrow() is not None
+
+
+class ExportStats:
+    """匯出筆數、輸出位元組數與每秒筆數"""
+
+    def __init__(self, fmt: str):
+        self.format = fmt
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, rows: int, size: int) -> None:
+        self.rows += rows
+        self.bytes += size
+        self.elapsed = time.perf_counter() - self.started
+        metrics.EXPORTED_ROWS.inc(rows, self.format)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "format": self.format,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "elapsed_s": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+        }
+
+
+def iter_store_awards(
+    store,
+    *,
+    years: Sequence[Optional[int]] = (None,),
+    code: Optional[str] = None,
+    pi_name: str = "",
+    organ: str = "",
+) -> Iterator[AwardItem]:
+    """
+    逐批讀出已保存的獎項資料
+
+    Args:
+        store: AwardStore
+        years: 年度列表，None 表示不限年度
+        code: 獎項代碼（可選）
+        pi_name, organ: 主持人姓名與機構名稱（可選）
+    """
+    for year in years:
+        yield from store.scan_awards(
+            year=year,
+            code=code,
+            pi_name=pi_name,
+            organ=organ,
+            batch_size=EXPORT_BATCH_ROWS,
+        )
+
+
+def iter_crawled_awards(
+    client,
+    *,
+    years: Sequence[int],
+    code: str,
+    name: str,
+    organ: str = "",
+    include_impact: str = IMPACT_FULL,
+) -> Iterator[AwardItem]:
+    """
+    逐頁向NSTC網站查詢（不經過列表頁快取），每頁補上概述全文後即送出
+
+    Args:
+        client: NSTCAwardClient
+        include_impact: full 時逐筆抓取概述全文，其餘只保留列表頁預覽
+    """
+    for year in years:
+        for rows in client.iter_award_pages(
+            year=year, code=code, name=name, organ=organ
+        ):
+            if include_impact == IMPACT_FULL:
+                yield from client.attach_impact_details(rows)
+            else:
+                yield from (row.item for row in rows)
+
+
+def iter_export(
+    items: Iterable[AwardItem],
+    fmt: str,
+    *,
+    fields: Optional[Sequence[str]] = None,
+    stats: Optional[ExportStats] = None,
+) -> Iterator[bytes]:
+    """
+    將獎項資料編碼為匯出格式，逐段產生輸出
+
+    Args:
+        items: 獎項資料（可為generator，只走訪一次）
+        fmt: jsonl、csv 或 parquet
+        fields: 輸出的欄位與順序，預設為所有欄位
+        stats: 統計寫入的對象
+
+    Yields:
+        輸出的位元組段落
+    """
+    encode = {"jsonl": _iter_jsonl, "csv": _iter_csv, "parquet": _iter_parquet}[fmt]
+    stats = stats or ExportStats(fmt)
+    fields = list(fields or RECORD_FIELDS)
+    records = (
+        {field: record[field] for field in fields}
+        for record in (item.to_dict() for item in items)
+    )
+    for chunk, rows in encode(records, fields):
+        stats.add(rows, len(chunk))
+        yield chunk
+
+
+def _batched(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    it = iter(records)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_jsonl(
+    records: Iterable[dict], fields: List[str]
+) -> Iterator[Tuple[bytes, int]]:
+    for batch in _batched(records, EXPORT_BATCH_ROWS):
+        text = "".join(fastjson.dumps(record) + "\n" for record in batch)
+        yield text.encode("utf-8"), len(batch)
+
+
+def _iter_csv(
+    records: Iterable[dict], fields: List[str]
+) -> Iterator[Tuple[bytes, int]]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fields)
+    writer.writeheader()
+    for batch in _batched(records, EXPORT_BATCH_ROWS):
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8"), len(batch)
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        # 沒有任何資料時仍輸出標題列
+        yield buf.getvalue().encode("utf-8"), 0
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    收集Parquet寫入的位元組，每寫完一個 row group 即取出送出
+
+    tell() 回傳累計位置，Parquet檔尾的metadata才能記錄正確的位移。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_parquet(
+    records: Iterable[dict], fields: List[str]
+) -> Iterator[Tuple[bytes, int]]:
+    modules = _pyarrow()
+    if modules is None:
+        raise RuntimeError("匯出Parquet需要安裝 pyarrow")
+    pa, pq = modules
+    schema = pa.schema([(field, pa.string()) for field in fields])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in _batched(records, EXPORT_ROW_GROUP_SIZE):
+        writer.write_table(
+            pa.Table.from_pylist(batch, schema=schema), row_group_size=len(batch)
+        )
+        yield sink.take(), len(batch)
+    writer.close()
+    yield sink.take(), 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="匯出獎項資料為 JSONL、CSV 或 Parquet")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    parser.add_argument("-o", "--output", help="輸出檔案，預設為標準輸出")
+    parser.add_argument(
+        "--source",
+        choices=("store", "crawler"),
+        default="store",
+        help="store 讀取已保存的資料，crawler 即時向NSTC網站查詢",
+    )
+    parser.add_argument("--year", type=int, action="append", default=[])
+    parser.add_argument("--code", help="獎項代碼（crawler 預設 QS01）")
+    parser.add_argument("--name", default="", help="主持人姓名")
+    parser.add_argument("--organ", default="", help="機構名稱")
+    parser.add_argument("--fields", help="輸出欄位（逗號分隔）")
+    parser.add_argument(
+        "--preview-impact",
+        action="store_true",
+        help="crawler 只輸出列表頁的概述預覽，不逐筆抓取全文",
+    )
+    parser.add_argument("--db", default=AWARD_STORE_PATH, help="SQLite檔案路徑")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(message)s")
+    fields = None
+    if args.fields:
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in RECORD_FIELDS]
+        if unknown or not fields:
+            parser.error(f"不支援的欄位: {','.join(unknown) or args.fields}")
+    if args.format == "parquet" and not parquet_available():
+        parser.error("匯出Parquet需要安裝 pyarrow")
+
+    if args.source == "store":
+        if not args.db:
+            parser.error("請以 --db 或環境變數 AWARD_STORE_PATH 指定SQLite檔案")
+        from store import AwardStore
+
+        items = iter_store_awards(
+            AwardStore(args.db, AWARD_STORE_MAX_AGE),
+            years=args.year or [None],
+            code=args.code,
+            pi_name=args.name,
+            organ=args.organ,
+        )
+    else:
+        if not args.year:
+            parser.error("--source crawler 需要以 --year 指定年度")
+        from crawler import NSTCAwardClient
+
+        items = iter_crawled_awards(
+            NSTCAwardClient(),
+            years=args.year,
+            code=args.code or "QS01",
+            name=args.name,
+            organ=args.organ,
+            include_impact=IMPACT_PREVIEW if args.preview_impact else IMPACT_FULL,
+        )
+
+    stats = ExportStats(args.format)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in iter_export(items, args.format, fields=fields, stats=stats):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+    summary = stats.to_dict()
+    print(
+        f"匯出 {summary['rows']:,} 筆、{summary['bytes']:,} 位元組，"
+        f"耗時 {summary['elapsed_s']} 秒（{summary['rows_per_sec']:,} 筆/秒）",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
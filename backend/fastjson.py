@@ -0,0 +1,20 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時使用標準函式庫
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """序列化為JSON文字（保留中文字元），有安裝orjson時使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
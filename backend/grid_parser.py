@@ -0,0 +1,261 @@
+"""
+獎項列表頁（#wUctlAwardQueryPage_grdResult）解析器
+
+以lxml解析整頁後，每一列只走訪一次內容欄位，依span id字尾對應欄位；
+正規表達式於載入時編譯；lxml與XPath延後到第一次解析時才載入與編譯，
+避免只需健康檢查的冷啟動付出解析器的載入成本。
+
+結果超過一頁時，表格最後會有ASP.NET分頁列（__doPostBack(..., 'Page$N')），
+parse_award_page 一併擷取分頁連結與回傳表單所需的欄位。
+"""
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from models import AwardItem
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+GRID_ID = "wUctlAwardQueryPage_grdResult"
+
+# span id字尾 -> AwardItem欄位
+SPAN_FIELDS = {
+    "lblAWARD_PLAN_CHI_DESCc_": "plan_name",
+    "lblAWARD_ST_ENDc_": "period",
+    "lblAWARD_TOT_AUD_AMTc_": "total_amount",
+    "lblIMPACT_Sc_": "impact",
+    "lblKEYS_CHIc_": "keywords_zh",
+    "lblKEYS_ENGc_": "keywords_en",
+}
+
+SPAN_ID_RE = re.compile("|".join(re.escape(key) for key in SPAN_FIELDS))
+IMPACT_LINK_RE = re.compile(r"lnkZIMPACT_S_")
+POSTBACK_RE = re.compile(r"__doPostBack\('([^']+)','(Page\$[^']+)'\)")
+PROJECT_NO_RE = re.compile(
+    r"(?:AwardDialog3\.aspx\?no=|AwardDialog\.aspx\?year=\d+&sys=[^&]+&no=)"
+    r"([A-Za-z0-9]+)"
+)
+
+
+@lru_cache(maxsize=None)
+def _xpaths() -> Tuple["etree.XPath", "etree.XPath"]:
+    """回傳 (結果表格, 資料列) 的已編譯XPath"""
+    from lxml import etree
+
+    return (
+        etree.XPath("//*[@id=$grid_id][1]"),
+        etree.XPath(
+            ".//tr[contains(concat(' ', normalize-space(@class), ' '), ' Grid_Row ')]"
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def _pager_xpaths() -> Tuple["etree.XPath", "etree.XPath"]:
+    """回傳 (分頁連結, 表單欄位) 的已編譯XPath"""
+    from lxml import etree
+
+    return (
+        etree.XPath(".//a[contains(@href, 'Page$')]"),
+        etree.XPath("//form[1]//input[@name] | //form[1]//select[@name]"),
+    )
+
+
+class GridRow(NamedTuple):
+    """列表頁的一列資料"""
+
+    item: AwardItem  # impact 為列表頁上的預覽文字
+    has_impact_detail: bool  # 是否有概述全文連結
+
+
+class GridPager(NamedTuple):
+    """列表頁的分頁列"""
+
+    current: int  # 目前頁碼（分頁列中沒有連結的數字）
+    event_target: str  # 換頁回傳的 __EVENTTARGET
+    pages: Dict[int, str]  # 可從本頁前往的頁碼 -> __EVENTARGUMENT (e.g., Page$2)
+
+
+class GridPage(NamedTuple):
+    """列表頁的一頁資料與換頁所需的表單狀態"""
+
+    rows: List[GridRow]
+    pager: Optional[GridPager]  # 只有一頁時為None
+    form: Dict[str, str]  # 回傳表單的欄位（含 __VIEWSTATE、__EVENTVALIDATION）
+    action: str  # 表單送出的相對網址
+
+
+def parse_html(text: str) -> "etree._Element":
+    """解析HTML字串，帶有XML編碼宣告的文件改以UTF-8位元組解析"""
+    from lxml import html
+
+    try:
+        return html.document_fromstring(text)
+    except ValueError:
+        return html.document_fromstring(
+            text.encode("utf-8"), parser=html.HTMLParser(encoding="utf-8")
+        )
+
+
+def node_text(node: "etree._Element") -> str:
+    """等同BeautifulSoup的 get_text(strip=True)"""
+    parts = []
+    for s in node.itertext():
+        s = s.strip()
+        if s:
+            parts.append(s)
+    return "".join(parts)
+
+
+def parse_award_grid(text: str) -> List[GridRow]:
+    """
+    解析獎項列表頁
+
+    Args:
+        text: AwardMultiQuery.aspx 回應的HTML
+
+    Returns:
+        GridRow列表；找不到結果表格時回傳空列表
+    """
+    grid_xpath, _ = _xpaths()
+    grids = grid_xpath(parse_html(text), grid_id=GRID_ID)
+    return _parse_rows(grids[0]) if grids else []
+
+
+def parse_award_page(text: str) -> GridPage:
+    """
+    解析獎項列表頁，包含分頁列與回傳表單的欄位
+
+    Args:
+        text: AwardMultiQuery.aspx 回應的HTML（第一頁或換頁回傳的結果）
+
+    Returns:
+        GridPage；找不到結果表格時 rows 為空列表、pager 為None
+    """
+    doc = parse_html(text)
+    grid_xpath, _ = _xpaths()
+    grids = grid_xpath(doc, grid_id=GRID_ID)
+    if not grids:
+        return GridPage([], None, {}, "")
+    forms = doc.xpath("//form[1]/@action")
+    return GridPage(
+        _parse_rows(grids[0]),
+        _parse_pager(grids[0]),
+        _form_fields(doc),
+        forms[0] if forms else "",
+    )
+
+
+def _parse_rows(grid: "etree._Element") -> List[GridRow]:
+    _, row_xpath = _xpaths()
+    rows: List[GridRow] = []
+    for tr in row_xpath(grid):
+        tds = [child for child in tr if child.tag == "td"]
+        if len(tds) < 4:
+            continue
+        rows.append(_parse_row(tds))
+    return rows
+
+
+def _parse_pager(grid: "etree._Element") -> Optional[GridPager]:
+    """
+    擷取分頁連結
+
+    數字連結與「...」都帶有頁碼；上一頁/下一頁模式（Page$Next）以目前頁碼推算。
+    """
+    link_xpath, _ = _pager_xpaths()
+    links = link_xpath(grid)
+    if not links:
+        return None
+
+    # 目前頁碼在同一個分頁列中，是沒有連結的數字
+    current = 1
+    pager_row = links[0].getparent()
+    while pager_row is not None and pager_row.tag != "tr":
+        pager_row = pager_row.getparent()
+    if pager_row is not None:
+        for span in pager_row.iter("span"):
+            text = node_text(span)
+            if text.isdigit():
+                current = int(text)
+                break
+
+    target = ""
+    pages: Dict[int, str] = {}
+    for link in links:
+        m = POSTBACK_RE.search(link.get("href") or "")
+        if not m:
+            continue
+        target, argument = m.groups()
+        value = argument.split("$", 1)[1]
+        if value.isdigit():
+            pages[int(value)] = argument
+        elif value == "Next":
+            pages.setdefault(current + 1, argument)
+        elif value in ("Prev", "Previous") and current > 1:
+            pages.setdefault(current - 1, argument)
+    if not pages:
+        return None
+    return GridPager(current, target, pages)
+
+
+def _form_fields(doc: "etree._Element") -> Dict[str, str]:
+    """回傳瀏覽器送出表單時會帶的欄位（不含按鈕與未勾選的選項）"""
+    _, field_xpath = _pager_xpaths()
+    fields: Dict[str, str] = {}
+    for node in field_xpath(doc):
+        name = node.get("name")
+        if node.tag == "select":
+            selected = node.xpath(".//option[@selected]") or node.xpath(".//option")
+            if selected:
+                fields[name] = selected[0].get("value", node_text(selected[0]))
+            continue
+        kind = (node.get("type") or "text").lower()
+        if kind in ("submit", "button", "image", "reset", "file"):
+            continue
+        if kind in ("checkbox", "radio") and node.get("checked") is None:
+            continue
+        fields[name] = node.get("value", "")
+    return fields
+
+
+def _parse_row(tds: List["etree._Element"]) -> GridRow:
+    fields: Dict[str, str] = {}
+    project_no: Optional[str] = None
+    has_link = False
+
+    # 單次走訪內容欄位：span對應欄位、a/input擷取計畫編號與概述連結
+    for node in tds[3].iter("span", "a", "input"):
+        tag = node.tag
+        if tag == "span":
+            node_id = node.get("id")
+            if not node_id:
+                continue
+            m = SPAN_ID_RE.search(node_id)
+            if m:
+                field = SPAN_FIELDS[m.group(0)]
+                if field not in fields:
+                    fields[field] = node_text(node)
+            continue
+
+        if tag == "a" and not has_link:
+            node_id = node.get("id")
+            if node_id and IMPACT_LINK_RE.search(node_id):
+                has_link = True
+        if project_no is None:
+            m = PROJECT_NO_RE.search(node.get("onclick") or "")
+            if m:
+                project_no = m.group(1)
+
+    item = AwardItem.from_dict(
+        {
+            **fields,
+            "award_year": node_text(tds[0]),
+            "pi_name": node_text(tds[1]),
+            "organ": node_text(tds[2]),
+            "project_no": project_no,
+        }
+    )
+    return GridRow(item, bool(project_no) and has_link)
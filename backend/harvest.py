@@ -0,0 +1,229 @@
+"""
+離線收錄：將整個年度與獎項代碼的獎項資料抓取到持久化儲存
+
+已結案的年度收錄完成後不再更新；開放年度（OPEN_AWARD_YEAR 之後）只重新抓取
+超過 HARVEST_OPEN_YEAR_MAX_AGE 的分區。中斷後重新執行會從未完成的分區繼續。
+預設只保存列表頁的概述預覽，--impact full 時逐筆抓取概述全文一併保存。
+
+用法:
+    python harvest.py --year 113 --code QS01
+    python harvest.py --year 114 --organ 國立臺灣大學 --organ 國立清華大學
+    python harvest.py --year 112 --organ-file organs.txt --db /data/awards.sqlite3
+    python harvest.py --year 113 --impact full
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+from config import (
+    AWARD_STORE_MAX_AGE,
+    AWARD_STORE_PATH,
+    HARVEST_OPEN_YEAR_MAX_AGE,
+    HARVEST_ORGANS,
+    LOG_LEVEL,
+    OPEN_AWARD_YEAR,
+)
+from crawler import ListTruncatedError, NSTCAwardClient
+from models import IMPACT_FULL, IMPACT_PREVIEW, AwardItem
+from parse_pool import offline_parse_stage
+from store import AwardStore
+
+logger = logging.getLogger(__name__)
+
+# 以空白姓名與機構查詢整個年度的分區鍵值
+FULL_PARTITION = ""
+
+
+def is_open_year(year: int) -> bool:
+    """開放年度的資料仍可能異動"""
+    return year >= OPEN_AWARD_YEAR
+
+
+def index_is_fresh(store: AwardStore, *, year: int, code: str) -> bool:
+    """某年度與獎項代碼是否已完整收錄，且開放年度的收錄仍在保鮮期內"""
+    completed_at = store.harvest_completed_at(year=year, code=code)
+    if completed_at is None:
+        return False
+    if not is_open_year(year):
+        return True
+    return time.time() - completed_at < HARVEST_OPEN_YEAR_MAX_AGE
+
+
+class Harvester:
+    """以NSTCAwardClient收錄整個年度的獎項資料"""
+
+    def __init__(
+        self,
+        client,
+        store: AwardStore,
+        organs: Sequence[str] = (),
+        include_impact: str = IMPACT_PREVIEW,
+    ):
+        """
+        Args:
+            client: NSTCAwardClient
+            store: 收錄資料的持久化儲存
+            organs: 網站不允許空白姓名查詢時，用來分區收錄的機構名稱
+            include_impact: full 時逐筆抓取概述全文，預設只保存列表頁預覽
+        """
+        self.client = client
+        self.store = store
+        self.organs = list(dict.fromkeys(o.strip() for o in organs if o.strip()))
+        self.include_impact = include_impact
+
+    def _search(self, *, year: int, code: str, organ: str) -> List[AwardItem]:
+        """以空白姓名查詢一個分區"""
+        return self.client.search_awards(
+            year=year,
+            code=code,
+            name="",
+            organ=organ,
+            include_impact=self.include_impact,
+        )
+
+    def _save(
+        self, *, year: int, code: str, organ: str, items: List[AwardItem]
+    ) -> None:
+        """保存一個分區，收錄全文時一併寫入概述"""
+        self.store.put_harvest_partition(
+            year=year,
+            code=code,
+            organ=organ,
+            items=items,
+            full_impact=self.include_impact == IMPACT_FULL,
+        )
+
+    def harvest(self, *, year: int, code: str, refresh: bool = False) -> Dict:
+        """
+        收錄一個年度與獎項代碼
+
+        Args:
+            year: 民國年份
+            code: 獎項代碼
+            refresh: 忽略已完成的分區，全部重新抓取
+
+        Returns:
+            收錄摘要
+        """
+        started = time.monotonic()
+        if not refresh and index_is_fresh(self.store, year=year, code=code):
+            logger.info("%s 年 %s 已收錄且仍在保鮮期內，略過", year, code)
+            return {"year": year, "code": code, "skipped": True}
+
+        if refresh:
+            since = float("inf")
+        elif is_open_year(year):
+            since = time.time() - HARVEST_OPEN_YEAR_MAX_AGE
+        else:
+            since = 0.0
+        done = self.store.harvested_partitions(year=year, code=code, since=since)
+        resumed = set(done)
+
+        partitions = self._partitions(year, code, done)
+        for organ in partitions:
+            if organ in done:
+                continue
+            items = self._search(year=year, code=code, organ=organ)
+            self._save(year=year, code=code, organ=organ, items=items)
+            done[organ] = len(items)
+            logger.info(
+                "%s 年 %s 分區 '%s' 收錄 %d 筆（%d/%d）",
+                year,
+                code,
+                organ or "全部",
+                len(items),
+                len(done),
+                len(partitions),
+            )
+
+        rows = sum(done[organ] for organ in partitions)
+        self.store.complete_harvest(
+            year=year, code=code, partitions=len(partitions), rows=rows
+        )
+        return {
+            "year": year,
+            "code": code,
+            "skipped": False,
+            "partitions": len(partitions),
+            "fetched_partitions": len(set(partitions) - resumed),
+            "rows": rows,
+            "elapsed_s": round(time.monotonic() - started, 1),
+        }
+
+    def _partitions(self, year: int, code: str, done: Dict[str, int]) -> List[str]:
+        """
+        決定收錄分區
+
+        先以空白姓名與機構查詢整個年度；網站不回傳資料，或整個年度超過
+        LIST_MAX_PAGES 頁時改以機構分區。機構分區仍超過上限時拋出
+        ListTruncatedError，該年度不會標記為收錄完成。
+        """
+        if FULL_PARTITION in done:
+            return [FULL_PARTITION]
+        reason = "網站不允許空白姓名查詢"
+        if not self.organs or not any(organ in done for organ in self.organs):
+            try:
+                items = self._search(year=year, code=code, organ=FULL_PARTITION)
+            except ListTruncatedError as e:
+                logger.warning("%s 年 %s 整個年度%s，改以機構分區", year, code, e)
+                reason = str(e)
+                items = []
+            if items:
+                self._save(year=year, code=code, organ=FULL_PARTITION, items=items)
+                done[FULL_PARTITION] = len(items)
+                return [FULL_PARTITION]
+        if not self.organs:
+            raise ValueError(
+                f"{reason}，請以 --organ、--organ-file 或 HARVEST_ORGANS 指定分區機構"
+            )
+        return self.organs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="收錄整個年度的NSTC獎項資料")
+    parser.add_argument("--year", type=int, action="append", required=True)
+    parser.add_argument("--code", default="QS01")
+    parser.add_argument("--organ", action="append", default=[])
+    parser.add_argument("--organ-file", help="每行一個機構名稱")
+    parser.add_argument("--db", default=AWARD_STORE_PATH, help="SQLite檔案路徑")
+    parser.add_argument("--refresh", action="store_true", help="忽略已完成的分區")
+    parser.add_argument(
+        "--impact",
+        choices=(IMPACT_PREVIEW, IMPACT_FULL),
+        default=IMPACT_PREVIEW,
+        help="概述的收錄方式：列表頁預覽（預設）或逐筆抓取全文",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        help="解析行程數，預設為 PARSE_PROCESSES 或CPU核心數，0為在執行緒中解析",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(message)s")
+    if not args.db:
+        parser.error("請以 --db 或環境變數 AWARD_STORE_PATH 指定SQLite檔案")
+
+    organs = list(HARVEST_ORGANS) + args.organ
+    if args.organ_file:
+        with open(args.organ_file, encoding="utf-8") as f:
+            organs += [line.strip() for line in f]
+
+    parse_stage = offline_parse_stage(args.parse_processes)
+    harvester = Harvester(
+        NSTCAwardClient(parse_stage=parse_stage),
+        AwardStore(args.db, AWARD_STORE_MAX_AGE),
+        organs,
+        include_impact=args.impact,
+    )
+    try:
+        for year in args.year:
+            print(harvester.harvest(year=year, code=args.code, refresh=args.refresh))
+    finally:
+        parse_stage.shutdown()
+
+
+if __name__ == "__main__":
+    main()
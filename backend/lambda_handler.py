@@ -1,5 +1,90 @@
-from mangum import Mangum
+"""
+AWS Lambda 進入點
 
-from main import app
+GET /api/health 不載入FastAPI、爬蟲與解析器即直接回應，讓健康檢查不受冷啟動
+影響；其餘請求交給 Mangum 包裝的FastAPI應用程式。LAMBDA_LAZY_INIT=1 時
+應用程式延後到第一個非健康檢查請求才載入。
 
-handler = Mangum(app)
+EventBridge 排程事件會在剩餘執行時間內預熱熱門主持人的查詢（見 refresher.py）。
+"""
+
+import json
+import logging
+import time
+
+from config import LAMBDA_LAZY_INIT, PREWARM_LAMBDA_RESERVE
+
+HEALTH_PATH = "/api/health"
+
+logger = logging.getLogger(__name__)
+
+_app_handler = None
+
+
+def app_handler():
+    """回傳 Mangum 處理器，第一次呼叫時才載入應用程式"""
+    global _app_handler
+    if _app_handler is None:
+        from mangum import Mangum
+
+        from main import app
+
+        # 預熱由排程事件觸發，不在lifespan啟動常駐的預熱執行緒
+        _app_handler = Mangum(app, lifespan="off")
+    return _app_handler
+
+
+def is_health_check(event: dict) -> bool:
+    """判斷是否為健康檢查請求（HTTP API 2.0 與 REST API 1.0 事件格式）"""
+    http = event.get("requestContext", {}).get("http", {})
+    method = http.get("method") or event.get("httpMethod")
+    path = event.get("rawPath") or event.get("path")
+    return method == "GET" and path == HEALTH_PATH
+
+
+def is_scheduled_event(event: dict) -> bool:
+    """判斷是否為EventBridge排程事件"""
+    return (
+        event.get("source") == "aws.events"
+        or event.get("detail-type") == "Scheduled Event"
+    )
+
+
+def prewarm(context) -> dict:
+    """在Lambda剩餘執行時間內預熱，保留 PREWARM_LAMBDA_RESERVE 秒收尾"""
+    app_handler()
+    from main import app
+
+    if not app.state.prewarmer.names:
+        logger.warning(
+            "未設定 PREWARM_PI_NAMES（template.yaml 的 PrewarmPiNames），略過預熱"
+        )
+    timeout = None
+    if context is not None:
+        remaining = context.get_remaining_time_in_millis() / 1000
+        timeout = max(0.0, remaining - PREWARM_LAMBDA_RESERVE)
+    return app.state.prewarmer.run(timeout=timeout)
+
+
+def handler(event, context):
+    started = time.perf_counter()
+    if is_scheduled_event(event):
+        return prewarm(context)
+    if is_health_check(event):
+        # 與應用程式的回應相同帶有Server-Timing標頭（只有total）
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return {
+            "statusCode": 200,
+            "headers": {
+                "content-type": "application/json",
+                "Server-Timing": f"total;dur={elapsed_ms:.1f}",
+                "Timing-Allow-Origin": "*",
+            },
+            "body": json.dumps({"status": "healthy"}),
+            "isBase64Encoded": False,
+        }
+    return app_handler()(event, context)
+
+
+if not LAMBDA_LAZY_INIT:
+    app_handler()
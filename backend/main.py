@@ -1,21 +1,215 @@
-from fastapi import FastAPI, HTTPException, Query, Path
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import partial
+
+from fastapi import FastAPI, HTTPException, Query, Path, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
+import fastjson
+import metrics
+from analytics import GROUP_FIELDS, SORT_KEYS, AwardColumns
+from batch import BatchJob
+from config import (
+    AWARD_STORE_MAX_AGE,
+    AWARD_REPOSITORY_SIZE,
+    AWARD_STORE_PATH,
+    AWARD_YEAR_CONCURRENCY,
+    BATCH_WORKERS,
+    LOG_LEVEL,
+    PREWARM_PI_NAMES,
+    PREWARM_YEARS,
+    REFRESH_IN_BACKGROUND,
+    STALE_MAX_AGE,
+)
 from crawler import NSTCAwardClient
-from models import AwardItem
+from export import (
+    EXPORT_FORMATS,
+    EXPORT_MEDIA_TYPES,
+    ExportStats,
+    iter_crawled_awards,
+    iter_export,
+    iter_store_awards,
+    parquet_available,
+)
+from harvest import index_is_fresh
+from refresher import BackgroundRefresher, Prewarmer
+from models import (
+    IMPACT_FULL,
+    IMPACT_MODES,
+    IMPACT_NONE,
+    RESPONSE_FIELDS,
+    AwardItem,
+    BatchAwardQuery,
+)
+from repository import AwardRepository
+from resilience import CircuitOpenError
+from scheduler import iter_years_async, search_years_async
+from search_index import SearchIndex
+from store import AwardStore
+
+if TYPE_CHECKING:
+    from async_crawler import AsyncNSTCAwardClient
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger(f"{__name__}.timing")
 
 # API default query params
 DEFAULT_AWARD_YEARS = [114, 113, 112, 111, 110]
 DEFAULT_AWARD_CODE = "QS01"
 DEFAULT_AWARD_ORGAN = ""
 
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def stream_timings() -> dict:
+    """
+    目前請求的分段耗時，放在串流回應的summary事件中
+
+    Server-Timing標頭在第一筆資料送出前就已寫入，之後的階段只能由此取得。
+    """
+    timings = metrics.current()
+    return timings.summary() if timings is not None else {}
+
+
+def parse_years(years: Optional[str]) -> List[int]:
+    """
+    解析逗號分隔的年度參數
+
+    Returns:
+        由新到舊排序且不重複的民國年份列表；未指定時回傳預設年度
+    """
+    if not years:
+        return list(DEFAULT_AWARD_YEARS)
+    try:
+        parsed = {int(y) for y in years.split(",") if y.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"年度格式錯誤: {years}")
+    if not parsed:
+        raise HTTPException(status_code=400, detail=f"年度格式錯誤: {years}")
+    return sorted(parsed, reverse=True)
+
+
+def parse_projection(
+    fields: Optional[str], include_impact: Optional[str]
+) -> Tuple[Optional[List[str]], str]:
+    """
+    解析欄位選取與計畫概述載入方式
+
+    未指定 include_impact 時，fields 沒有選取 impact 就不抓取概述全文。
+
+    Returns:
+        (選取的欄位列表或None, 計畫概述載入方式)
+    """
+    selected = None
+    if fields:
+        selected = list(
+            dict.fromkeys(f.strip() for f in fields.split(",") if f.strip())
+        )
+        unknown = [f for f in selected if f not in RESPONSE_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400, detail=f"不支援的欄位: {','.join(unknown) or fields}"
+            )
+    if include_impact is None:
+        include_impact = (
+            IMPACT_FULL if selected is None or "impact" in selected else IMPACT_NONE
+        )
+    elif include_impact not in IMPACT_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"不支援的概述載入方式: {include_impact}"
+        )
+    return selected, include_impact
+
+
+def award_response(
+    award: AwardItem, fields: Optional[List[str]], include_impact: str
+) -> dict:
+    """
+    轉換為API回應格式
+
+    未載入概述全文時附上 impact_detail_url，供前端需要時再取得全文。
+    """
+    data = award.to_response()
+    if include_impact == IMPACT_NONE:
+        data.pop("impact")
+    if fields is not None:
+        data = {field: data[field] for field in fields if field in data}
+    if include_impact != IMPACT_FULL and award.project_no:
+        data["impact_detail_url"] = f"/api/awards/detail/{award.project_no}"
+    return data
+
+
+def upstream_error(errors: Iterable[Exception], prefix: str) -> HTTPException:
+    """
+    將上游錯誤轉換為HTTP錯誤
+
+    斷路器開啟時回傳503，其餘上游錯誤回傳502。
+    """
+    errors = list(errors)
+    if errors and all(isinstance(e, CircuitOpenError) for e in errors):
+        return HTTPException(status_code=503, detail=f"{prefix}: {errors[0]}")
+    detail = errors[0] if errors else "未知錯誤"
+    return HTTPException(status_code=502, detail=f"{prefix}: {detail}")
+
+
+def async_http_errors() -> Tuple[type, ...]:
+    """
+    非同步客戶端的上游HTTP錯誤類別
+
+    只在 except 子句中呼叫：httpx延後到建立非同步客戶端時才載入，
+    會拋出這些錯誤時已經載入。
+    """
+    import httpx
+
+    return (httpx.HTTPError,)
+
+
+def encode_event(fmt: str, event: str, data: dict) -> str:
+    """將串流事件編碼為NDJSON行或Server-Sent Events訊息"""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {fastjson.dumps(data)}\n\n"
+    return fastjson.dumps({"type": event, **data}) + "\n"
+
+
+def create_app(crawler_client: Optional[NSTCAwardClient] = None) -> FastAPI:
+    """
+    Args:
+        crawler_client: 指定的爬蟲客戶端（e.g., 指向重播伺服器），預設連線NSTC網站
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # 常駐服務於離峰時段預熱；Lambda改由排程事件觸發（見 lambda_handler）
+        prewarmer.start()
+        yield
+        prewarmer.stop()
+        if async_client is not None:
+            await async_client.aclose()
 
-def create_app() -> FastAPI:
     app = FastAPI(
         title="Research Crawler API",
         description="NSTC獎項資料爬蟲API",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
     # CORS中間件配置（允許前端跨域請求）
@@ -27,49 +221,381 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # 初始化爬蟲客戶端
-    crawler_client = NSTCAwardClient()
+    # 每個請求的分段耗時：Server-Timing標頭、結構化記錄與Prometheus直方圖
+    timing_logger.setLevel(LOG_LEVEL)
+
+    @app.middleware("http")
+    async def record_timings(request: Request, call_next):
+        timings, token = metrics.begin_request()
+        try:
+            response = await call_next(request)
+        finally:
+            metrics.end_request(token)
+        # 標頭在回應內容送出前寫入，串流回應之後的階段只計入記錄與直方圖
+        response.headers["Server-Timing"] = timings.server_timing()
+        response.headers["Timing-Allow-Origin"] = "*"
+        body = response.body_iterator
+
+        async def observe_after_body() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                log_timings(request, response.status_code, timings)
+
+        response.body_iterator = observe_after_body()
+        return response
+
+    def log_timings(
+        request: Request, status: int, timings: metrics.RequestTimings
+    ) -> None:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            timings.elapsed(), request.method, route, str(status)
+        )
+        timing_logger.info(
+            fastjson.dumps(
+                {
+                    "method": request.method,
+                    "route": route,
+                    "path": request.url.path,
+                    "status": status,
+                    **timings.summary(),
+                }
+            )
+        )
+
+    # 過期資料先回傳，再以背景工作重新查詢（受背景請求預算限制）；
+    # REFRESH_IN_BACKGROUND 為 0 時（Lambda）只供排程預熱在前景執行
+    refresher = BackgroundRefresher()
 
-    # 快取：存儲已爬取的數據，key為plan_name
-    awards_cache: Dict[str, List[dict]] = {}
+    # 爬蟲客戶端延後到第一次需要時才建立，健康檢查等請求不需付出建構成本
+    client_lock = threading.Lock()
+
+    def get_client() -> NSTCAwardClient:
+        nonlocal crawler_client
+        if crawler_client is None:
+            with client_lock:
+                if crawler_client is None:
+                    crawler_client = NSTCAwardClient(
+                        refresher=refresher if REFRESH_IN_BACKGROUND else None
+                    )
+        return crawler_client
+
+    # API端點以非同步客戶端查詢，與同步客戶端共用快取與限速狀態
+    # （httpx約佔冷啟動的一成，第一次向NSTC網站查詢時才載入）
+    async_client: Optional["AsyncNSTCAwardClient"] = None
+
+    def get_async_client() -> "AsyncNSTCAwardClient":
+        nonlocal async_client
+        if async_client is None:
+            from async_crawler import AsyncNSTCAwardClient
+
+            client = get_client()
+            with client_lock:
+                if async_client is None:
+                    async_client = AsyncNSTCAwardClient(client)
+        return async_client
+
+    # 批次查詢共用的列表頁抓取執行緒池
+    batch_pool = ThreadPoolExecutor(
+        max_workers=BATCH_WORKERS, thread_name_prefix="nstc-batch"
+    )
+
+    # 持久化儲存：同一主機的程序共用（Lambda的 /tmp 每個容器各自一份），未設定路徑時停用
+    award_store: Optional[AwardStore] = None
+    if AWARD_STORE_PATH:
+        award_store = AwardStore(AWARD_STORE_PATH, AWARD_STORE_MAX_AGE)
+
+    def read_harvest(query: dict) -> Optional[List[AwardItem]]:
+        """
+        從離線收錄索引讀取單一年度，該年度未完整收錄或已過保鮮期時回傳None
+
+        主持人姓名與NSTC網站相同採部分相符；收錄的概述可能只是列表頁預覽。
+        """
+        year = query["year"]
+        if not award_store or not index_is_fresh(
+            award_store, year=year, code=DEFAULT_AWARD_CODE
+        ):
+            return None
+        metrics.cache_lookup("harvest_index", True)
+        with metrics.stage("store"):
+            return award_store.find_awards(
+                year=year,
+                code=DEFAULT_AWARD_CODE,
+                pi_name=query["name"],
+                organ=DEFAULT_AWARD_ORGAN,
+            )
+
+    def read_year(query: dict) -> Optional[List[AwardItem]]:
+        """
+        從持久化儲存讀取單一年度的查詢結果，沒有可用的資料時回傳None
+
+        儲存中的資料過期未超過 STALE_MAX_AGE 時直接回傳，並在背景重新查詢；
+        不在背景重新查詢時回傳None，由呼叫端重新查詢。
+        """
+        if not award_store:
+            return None
+        with metrics.stage("store"):
+            stored = award_store.get_query(**query)
+        metrics.cache_lookup("store", stored is not None)
+        if stored is not None or not REFRESH_IN_BACKGROUND:
+            return stored
+        with metrics.stage("store"):
+            stale = award_store.get_query(**query, max_age=STALE_MAX_AGE)
+        if stale is not None:
+            metrics.incr("stale_served")
+            year, name = query["year"], query["name"]
+            refresher.submit(("awards", year, name), refresh_year, year, name)
+        return stale
+
+    async def attach_full_impacts(awards: List[AwardItem]) -> List[AwardItem]:
+        """
+        為離線收錄的獎項補上概述全文
+
+        全文優先讀取持久化儲存，沒有時向NSTC網站抓取；抓取失敗時保留收錄的文字。
+        """
+        numbered = [award for award in awards if award.project_no]
+        results = await asyncio.gather(
+            *(fetch_impact(award.project_no) for award in numbered),
+            return_exceptions=True,
+        )
+        full = {}
+        errors = []
+        for award, result in zip(numbered, results):
+            if isinstance(result, Exception):
+                errors.append(result)
+            elif result:
+                full[award.project_no] = result
+        if errors:
+            logger.warning(
+                "%d 筆收錄資料的概述全文抓取失敗，保留收錄的文字: %s",
+                len(errors),
+                errors[0],
+            )
+        return [
+            replace(award, impact=full[award.project_no])
+            if award.project_no in full
+            else award
+            for award in awards
+        ]
+
+    async def search_year(
+        year: int, name: str, include_impact: str = IMPACT_FULL
+    ) -> List[AwardItem]:
+        """
+        查詢單一年度，優先讀取離線收錄索引與持久化儲存
+
+        持久化儲存只保存含概述全文的結果；未載入全文的查詢不寫入儲存。
+        離線收錄的資料預設只有概述預覽，要求全文時逐筆補上。
+        SQLite讀寫在執行緒中執行，向NSTC網站查詢時不佔用事件迴圈。
+        """
+        query = dict(
+            year=year, code=DEFAULT_AWARD_CODE, name=name, organ=DEFAULT_AWARD_ORGAN
+        )
+        harvested = await run_in_threadpool(read_harvest, query)
+        if harvested is not None:
+            if include_impact == IMPACT_FULL:
+                return await attach_full_impacts(harvested)
+            return harvested
+        stored = await run_in_threadpool(read_year, query)
+        if stored is not None:
+            return stored
+        try:
+            awards = await get_async_client().search_awards(
+                **query, include_impact=include_impact
+            )
+        except Exception as e:
+            # 上游故障時改用持久化儲存中的過期資料
+            stale = (
+                await run_in_threadpool(
+                    partial(award_store.get_query, **query, max_age=float("inf"))
+                )
+                if award_store
+                else None
+            )
+            if stale is None:
+                raise
+            logger.warning("年度 %s 查詢失敗，改用過期資料: %s", year, e)
+            return stale
+        if award_store and include_impact == IMPACT_FULL:
+            await run_in_threadpool(
+                partial(award_store.put_query, **query, items=awards)
+            )
+        return awards
+
+    def refresh_year(year: int, name: str) -> int:
+        """略過列表頁快取重新查詢單一年度並寫入持久化儲存，回傳筆數"""
+        query = dict(
+            year=year, code=DEFAULT_AWARD_CODE, name=name, organ=DEFAULT_AWARD_ORGAN
+        )
+        awards = get_client().search_awards(
+            **query, include_impact=IMPACT_FULL, refresh=True
+        )
+        if award_store:
+            award_store.put_query(**query, items=awards)
+        return len(awards)
+
+    # 離峰時段預熱熱門主持人的開放年度，app.state.prewarmer 供Lambda排程呼叫
+    prewarmer = Prewarmer(refresher, refresh_year, PREWARM_PI_NAMES, PREWARM_YEARS)
+    app.state.prewarmer = prewarmer
+
+    def read_impact(project_no: str) -> Optional[str]:
+        """從持久化儲存讀取計畫概述全文，過期的資料先回傳再於背景更新"""
+        if not award_store:
+            return None
+        with metrics.stage("store"):
+            stored = award_store.get_impact(project_no)
+        metrics.cache_lookup("store_impact", stored is not None)
+        if stored is not None or not REFRESH_IN_BACKGROUND:
+            return stored
+        with metrics.stage("store"):
+            stale = award_store.get_impact(project_no, max_age=STALE_MAX_AGE)
+        if stale is not None:
+            metrics.incr("stale_served")
+            refresher.submit(("impact", project_no), refresh_impact, project_no)
+        return stale
+
+    async def fetch_impact(project_no: str) -> str:
+        """獲取計畫概述全文，優先讀取持久化儲存"""
+        stored = await run_in_threadpool(read_impact, project_no)
+        if stored is not None:
+            return stored
+        try:
+            impact = await get_async_client().fetch_impact_detail(project_no)
+        except Exception as e:
+            stale = (
+                await run_in_threadpool(
+                    partial(award_store.get_impact, project_no, max_age=float("inf"))
+                )
+                if award_store
+                else None
+            )
+            if stale is None:
+                raise
+            logger.warning("計畫 %s 概述查詢失敗，改用過期資料: %s", project_no, e)
+            return stale
+        if award_store and impact:
+            await run_in_threadpool(award_store.put_impact, project_no, impact)
+        return impact
+
+    def refresh_impact(project_no: str) -> None:
+        impact = get_client().fetch_impact_detail(project_no)
+        if award_store and impact:
+            award_store.put_impact(project_no, impact)
+
+    # 已查詢過的獎項，依計畫編號去重並以計畫名稱等欄位建立索引
+    repository = AwardRepository(AWARD_REPOSITORY_SIZE)
+
+    # 全文檢索索引與經費彙總欄位：首次使用時載入已保存的獎項，
+    # 之後隨查詢結果增量更新
+    search_index = SearchIndex()
+    award_columns = AwardColumns()
+    store_indexes_loaded = threading.Event()
+    store_indexes_lock = threading.Lock()
+
+    def remember(
+        award: AwardItem,
+        fields: Optional[List[str]] = None,
+        include_impact: str = IMPACT_FULL,
+        award_code: str = "",
+    ) -> dict:
+        """寫入獎項資料庫、全文檢索索引與彙總欄位，並轉換為API回應格式"""
+        preview = include_impact != IMPACT_FULL
+        repository.add(award, preview_impact=preview)
+        if not preview or award.project_no not in search_index:
+            search_index.add(award)
+        award_columns.add(award, award_code)
+        return award_response(award, fields, include_impact)
+
+    def load_store_indexes() -> None:
+        if store_indexes_loaded.is_set():
+            return
+        with store_indexes_lock:
+            if store_indexes_loaded.is_set():
+                return
+            if award_store:
+                started = time.perf_counter()
+                for award, code in award_store.iter_awards_with_code():
+                    search_index.add(award)
+                    award_columns.add(award, code)
+                logger.info(
+                    "檢索索引與彙總欄位載入 %d 筆，耗時 %.0f ms",
+                    len(search_index),
+                    (time.perf_counter() - started) * 1000,
+                )
+            store_indexes_loaded.set()
 
     @app.get("/api/health")
     async def health_check():
         """健康檢查端點"""
         return {"status": "healthy"}
 
+    @app.get("/api/metrics", response_class=PlainTextResponse)
+    async def prometheus_metrics():
+        """Prometheus文字格式的延遲直方圖與計數器"""
+        return PlainTextResponse(
+            metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+        )
+
+    @app.get("/api/cache/stats")
+    async def cache_stats():
+        """快取命中與合併請求統計"""
+        # 尚未建立非同步客戶端時不為了統計而載入httpx
+        if async_client is not None:
+            client_stats = async_client.stats()
+        else:
+            client_stats = {**get_client().stats(), "singleflight_async": None}
+        return {
+            **client_stats,
+            "refresh": refresher.stats(),
+            "repository": repository.stats(),
+        }
+
     @app.get("/api/awards", response_model=List[dict])
     async def search_awards(
+        response: Response,
         pi_name: str = Query(..., description="主持人姓名"),
+        years: Optional[str] = Query(None, description="查詢年度（逗號分隔）"),
+        fields: Optional[str] = Query(None, description="回傳欄位（逗號分隔）"),
+        include_impact: Optional[str] = Query(
+            None, description="計畫概述：full、preview 或 none"
+        ),
     ):
         """
         查詢獎項資料
 
         查詢參數:
         - pi_name: 主持人姓名
+        - years: 查詢年度，逗號分隔（可選，預設 114-110 年度）
+        - fields: 只回傳指定欄位，逗號分隔（可選）
+        - include_impact: full 抓取概述全文、preview 只回傳列表頁預覽、
+          none 不回傳概述（可選，fields 未選取 impact 時預設 none，否則 full）
 
-        說明: 自動查詢 114-110 年度
+        說明: 各年度同時查詢，結果依年度由新到舊合併並以計畫編號去重；
+        部分年度查詢失敗時仍回傳其餘年度，並於 X-Failed-Years 標頭列出失敗年度
 
-        範例: GET /api/awards?pi_name=李文廷
+        範例: GET /api/awards?pi_name=李文廷&fields=plan_name,period,total_amount
         """
+        year_list = parse_years(years)
+        selected, include_impact = parse_projection(fields, include_impact)
         try:
-            result_list = []
-            for year in DEFAULT_AWARD_YEARS:
-                awards = crawler_client.search_awards(
-                    year=year,
-                    code=DEFAULT_AWARD_CODE,
-                    name=pi_name,
-                    organ=DEFAULT_AWARD_ORGAN,
+            awards, errors = await search_years_async(
+                lambda year: search_year(year, pi_name, include_impact),
+                year_list,
+                max_concurrency=AWARD_YEAR_CONCURRENCY,
+            )
+            if errors and not awards:
+                raise upstream_error(errors.values(), "查詢失敗")
+            if errors:
+                response.headers["X-Failed-Years"] = ",".join(
+                    str(year) for year in sorted(errors, reverse=True)
                 )
 
-                for award in awards:
-                    award_dict = award.to_response()
-                    result_list.append(award_dict)
-
-                    # 按plan_name建立快取索引
-                    if award.plan_name not in awards_cache:
-                        awards_cache[award.plan_name] = []
-                    awards_cache[award.plan_name].append(award_dict)
+            result_list = [
+                remember(award, selected, include_impact, DEFAULT_AWARD_CODE)
+                for award in awards
+            ]
 
             if not result_list:
                 raise HTTPException(
@@ -77,9 +603,319 @@ def create_app() -> FastAPI:
                 )
 
             return result_list
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"查詢失敗: {str(e)}")
 
+    @app.get("/api/awards/stream")
+    async def stream_awards(
+        pi_name: str = Query(..., description="主持人姓名"),
+        years: Optional[str] = Query(None, description="查詢年度（逗號分隔）"),
+        format: str = Query("ndjson", description="串流格式：ndjson 或 sse"),
+        fields: Optional[str] = Query(None, description="回傳欄位（逗號分隔）"),
+        include_impact: Optional[str] = Query(
+            None, description="計畫概述：full、preview 或 none"
+        ),
+    ):
+        """
+        以串流方式查詢獎項資料，每個年度查詢完成即送出該年度的資料
+
+        查詢參數:
+        - pi_name: 主持人姓名
+        - years: 查詢年度，逗號分隔（可選，預設 114-110 年度）
+        - format: ndjson（預設）或 sse
+        - fields, include_impact: 同 /api/awards
+
+        事件:
+        - award: 單筆獎項資料（data 為 /api/awards 的單筆格式）
+        - year: 年度查詢完成（year, count）
+        - error: 年度查詢失敗（year, detail）
+        - summary: 全部完成（total, years, failed_years, elapsed_ms, timings）
+
+        範例: GET /api/awards/stream?pi_name=李文廷&format=sse
+        """
+        if format not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"不支援的串流格式: {format}")
+        year_list = parse_years(years)
+        selected, include_impact = parse_projection(fields, include_impact)
+
+        async def events() -> AsyncIterator[str]:
+            started = time.perf_counter()
+            total = 0
+            failed_years = []
+            async for result in iter_years_async(
+                lambda year: search_year(year, pi_name, include_impact),
+                year_list,
+                max_concurrency=AWARD_YEAR_CONCURRENCY,
+            ):
+                if result.error is not None:
+                    failed_years.append(result.year)
+                    yield encode_event(
+                        format,
+                        "error",
+                        {"year": result.year, "detail": f"查詢失敗: {result.error}"},
+                    )
+                    continue
+                for award in result.items:
+                    data = remember(
+                        award, selected, include_impact, DEFAULT_AWARD_CODE
+                    )
+                    yield encode_event(format, "award", {"data": data})
+                total += len(result.items)
+                yield encode_event(
+                    format, "year", {"year": result.year, "count": len(result.items)}
+                )
+            yield encode_event(
+                format,
+                "summary",
+                {
+                    "total": total,
+                    "years": year_list,
+                    "failed_years": sorted(failed_years, reverse=True),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000),
+                    "timings": stream_timings(),
+                },
+            )
+
+        return StreamingResponse(
+            events(),
+            media_type=STREAM_MEDIA_TYPES[format],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/api/awards/batch")
+    async def batch_search_awards(query: BatchAwardQuery):
+        """
+        批次查詢多位主持人的獎項資料
+
+        請求內容:
+        - names: 主持人姓名列表
+        - organ: 機構名稱（可選）
+        - years: 查詢年度（可選，預設 114-110 年度）
+        - codes: 獎項代碼（可選，預設 QS01）
+        - stream: 是否以NDJSON串流回傳，每位主持人完成即送出（預設 false）
+
+        說明: 所有列表頁與概述全文查詢共用執行緒池，並受每主機限速約束
+
+        範例: POST /api/awards/batch {"names": ["李文廷", "王大明"]}
+        """
+        year_list = sorted(set(query.years), reverse=True) if query.years else None
+        job = BatchJob(
+            get_client(),
+            batch_pool,
+            names=query.names,
+            years=year_list or DEFAULT_AWARD_YEARS,
+            codes=list(dict.fromkeys(query.codes or [DEFAULT_AWARD_CODE])),
+            organ=query.organ,
+        )
+        if not job.names:
+            raise HTTPException(status_code=400, detail="請提供至少一位主持人姓名")
+        # 合併多個獎項代碼的結果無法區分代碼，只有單一代碼時才記錄
+        batch_code = job.codes[0] if len(job.codes) == 1 else ""
+
+        if query.stream:
+
+            def events() -> Iterator[str]:
+                started = time.perf_counter()
+                total = 0
+                for result in job.iter_results():
+                    total += len(result.items)
+                    yield encode_event(
+                        "ndjson",
+                        "name",
+                        {
+                            "name": result.name,
+                            "items": [
+                                remember(award, award_code=batch_code)
+                                for award in result.items
+                            ],
+                            "errors": result.errors,
+                        },
+                    )
+                yield encode_event(
+                    "ndjson",
+                    "summary",
+                    {
+                        "names": len(job.names),
+                        "total": total,
+                        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+                        "timings": stream_timings(),
+                    },
+                )
+
+            return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES["ndjson"])
+
+        started = time.perf_counter()
+        results = await run_in_threadpool(job.run)
+        return {
+            "results": {
+                name: [
+                    remember(award, award_code=batch_code) for award in result.items
+                ]
+                for name, result in results.items()
+            },
+            "errors": {
+                name: result.errors
+                for name, result in results.items()
+                if result.errors
+            },
+            "summary": {
+                "names": len(job.names),
+                "total": sum(len(result.items) for result in results.values()),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000),
+            },
+        }
+
+    @app.get("/api/search")
+    async def search_full_text(
+        q: str = Query(..., min_length=1, description="檢索文字"),
+        limit: int = Query(20, ge=1, le=100, description="回傳筆數上限"),
+        year: Optional[str] = Query(None, description="只檢索此年度"),
+    ):
+        """
+        全文檢索計畫名稱、計畫概述與中英文關鍵字
+
+        查詢參數:
+        - q: 檢索文字，中英文皆可
+        - limit: 回傳筆數上限（預設 20，最多 100）
+        - year: 只回傳此年度的獎項（可選）
+
+        說明: 檢索範圍為已保存的獎項與已查詢過的結果，依BM25相關度排序
+
+        範例: GET /api/search?q=機器學習&limit=10
+        """
+        await run_in_threadpool(load_store_indexes)
+        started = time.perf_counter()
+        hits = search_index.search(q, limit=limit, year=year)
+        return {
+            "query": q,
+            "indexed": len(search_index),
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": [
+                {"score": round(hit.score, 4), **hit.award.to_response()}
+                for hit in hits
+            ],
+        }
+
+    @app.get("/api/stats")
+    async def award_stats(
+        group_by: str = Query(
+            "organ", description="分組欄位：pi_name、organ、award_year 或 award_code"
+        ),
+        year: Optional[str] = Query(None, description="只彙總此年度"),
+        code: Optional[str] = Query(None, description="只彙總此獎項代碼"),
+        sort: str = Query("total", description="排序：total、count、mean 或 key"),
+        limit: Optional[int] = Query(
+            None, ge=1, le=1000, description="回傳組數上限（最多 1000）"
+        ),
+    ):
+        """
+        依主持人、機構、年度或獎項代碼彙總經費
+
+        查詢參數:
+        - group_by: 分組欄位（預設 organ）
+        - year, code: 篩選條件（可選）
+        - sort: 排序依據，key 以外由大到小（預設 total）
+        - limit: 回傳組數上限（可選，最多 1000）
+
+        說明: 彙總範圍為已保存與已查詢過的獎項；mean 只計入有金額的獎項
+
+        範例: GET /api/stats?group_by=award_year&code=QS01
+        """
+        if group_by not in GROUP_FIELDS:
+            raise HTTPException(status_code=400, detail=f"不支援的分組欄位: {group_by}")
+        if sort not in SORT_KEYS:
+            raise HTTPException(status_code=400, detail=f"不支援的排序方式: {sort}")
+        await run_in_threadpool(load_store_indexes)
+        started = time.perf_counter()
+        groups = award_columns.group_by(
+            group_by, award_year=year, award_code=code, sort=sort, limit=limit
+        )
+        return {
+            "group_by": group_by,
+            "version": award_columns.version,
+            "awards": len(award_columns),
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "groups": groups,
+        }
+
+    @app.get("/api/export")
+    async def export_awards(
+        format: str = Query("jsonl", description="匯出格式：jsonl、csv 或 parquet"),
+        source: str = Query("store", description="資料來源：store 或 crawler"),
+        years: Optional[str] = Query(None, description="匯出年度（逗號分隔）"),
+        code: Optional[str] = Query(None, description="獎項代碼"),
+        pi_name: str = Query("", description="主持人姓名"),
+        organ: str = Query("", description="機構名稱"),
+        fields: Optional[str] = Query(None, description="輸出欄位（逗號分隔）"),
+    ):
+        """
+        以分塊回應串流匯出獎項資料
+
+        查詢參數:
+        - format: jsonl（預設）、csv，或有安裝 pyarrow 時的 parquet
+        - source: store 讀取已保存的資料（預設）；crawler 即時向NSTC網站查詢，
+          需要 pi_name，未指定 years 時為 114-110 年度
+        - years: 匯出年度，逗號分隔（store 未指定時匯出所有年度）
+        - code: 獎項代碼（store 未指定時不限，crawler 預設 QS01）
+        - pi_name, organ: 主持人姓名、機構名稱（可選）
+        - fields: 只輸出指定欄位，逗號分隔（可選）
+
+        說明: 資料逐批讀取、編碼後即送出，記憶體用量與資料量無關；
+        匯出筆數與每秒筆數寫入記錄
+
+        範例: GET /api/export?format=csv&years=113&code=QS01
+        """
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支援的匯出格式: {format}")
+        if format == "parquet" and not parquet_available():
+            raise HTTPException(status_code=400, detail="匯出Parquet需要安裝 pyarrow")
+        selected, include_impact = parse_projection(fields, None)
+
+        if source == "store":
+            if not award_store:
+                raise HTTPException(
+                    status_code=400, detail="未啟用持久化儲存（AWARD_STORE_PATH）"
+                )
+            items = iter_store_awards(
+                award_store,
+                years=parse_years(years) if years else [None],
+                code=code,
+                pi_name=pi_name,
+                organ=organ,
+            )
+        elif source == "crawler":
+            if not pi_name:
+                raise HTTPException(
+                    status_code=400, detail="即時查詢匯出需要指定 pi_name"
+                )
+            items = iter_crawled_awards(
+                get_client(),
+                years=parse_years(years),
+                code=code or DEFAULT_AWARD_CODE,
+                name=pi_name,
+                organ=organ,
+                include_impact=include_impact,
+            )
+        else:
+            raise HTTPException(status_code=400, detail=f"不支援的資料來源: {source}")
+
+        def chunks() -> Iterator[bytes]:
+            stats = ExportStats(format)
+            yield from iter_export(items, format, fields=selected, stats=stats)
+            logger.info("匯出完成: %s", stats.to_dict())
+
+        return StreamingResponse(
+            chunks(),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={
+                "Content-Disposition": f'attachment; filename="awards.{format}"',
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
     @app.get("/api/awards/{plan_name}", response_model=List[dict])
     async def search_awards_by_plan_name(
         plan_name: str = Path(..., description="計畫名稱"),
@@ -92,9 +928,16 @@ def create_app() -> FastAPI:
 
         範例: GET /api/awards/計畫名稱
 
-        說明：從快取中查詢，需要先使用 /api/awards 端點進行查詢以填充快取
+        說明：從已查詢過的獎項與持久化儲存中查詢，不會向上游發出請求
         """
-        if plan_name not in awards_cache:
+        awards = repository.find(plan_name=plan_name)
+        if not awards and award_store:
+            awards = await run_in_threadpool(
+                award_store.find_awards_by_plan_name, plan_name
+            )
+            # 收錄的資料可能只有概述預覽，全文由詳細資料端點另行讀取
+            repository.add_many(awards, preview_impact=True)
+        if not awards:
             raise HTTPException(
                 status_code=404,
                 detail=(
@@ -102,7 +945,7 @@ def create_app() -> FastAPI:
                     "請先使用 /api/awards 端點查詢以填充快取。"
                 ),
             )
-        return awards_cache[plan_name]
+        return [award.to_response() for award in awards]
 
     @app.get("/api/awards/detail/{project_no}", response_model=dict)
     async def get_impact_detail(project_no: str):
@@ -115,12 +958,20 @@ def create_app() -> FastAPI:
         範例: GET /api/awards/detail/113WFA2110082
         """
         try:
-            impact = crawler_client.fetch_impact_detail(project_no)
+            impact = repository.get_impact(project_no)
+            if impact is None:
+                impact = await fetch_impact(project_no)
+                if impact:
+                    repository.set_impact(project_no, impact)
             if not impact:
                 raise HTTPException(
                     status_code=404, detail=f"未找到計畫編號 {project_no} 的詳細信息"
                 )
             return {"project_no": project_no, "impact": impact}
+        except HTTPException:
+            raise
+        except (CircuitOpenError, *async_http_errors()) as e:
+            raise upstream_error([e], "獲取詳細信息失敗")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"獲取詳細信息失敗: {str(e)}")
 
@@ -0,0 +1,271 @@
+import bisect
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 秒數直方圖的預設分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class RequestTimings:
+    """單一API請求各階段的累計耗時與計數"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> Dict[str, object]:
+        """回傳毫秒耗時與計數，供結構化記錄使用"""
+        with self._lock:
+            return {
+                "total_ms": round(self.elapsed() * 1000, 1),
+                "stages_ms": {
+                    stage: round(seconds * 1000, 1)
+                    for stage, seconds in self.durations.items()
+                },
+                "counts": dict(self.counts),
+            }
+
+    def server_timing(self) -> str:
+        """
+        轉換為Server-Timing標頭
+
+        並行執行的階段（e.g., 多個年度同時查詢上游）會累加，總和可能超過 total。
+        """
+        with self._lock:
+            parts = [f"total;dur={self.elapsed() * 1000:.1f}"]
+            parts += [
+                f"{stage};dur={seconds * 1000:.1f}"
+                for stage, seconds in self.durations.items()
+            ]
+            parts += [f'{name};desc="{n}"' for name, n in self.counts.items()]
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def begin_request() -> Tuple[RequestTimings, contextvars.Token]:
+    """為目前的API請求建立計時紀錄"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def incr(name: str, n: int = 1) -> None:
+    """為目前的API請求累加計數，不在請求中時忽略"""
+    timings = _current.get()
+    if timings is not None:
+        timings.incr(name, n)
+
+
+def record(stage: str, seconds: float) -> None:
+    """為目前的API請求累加階段耗時，不在請求中時忽略"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str, histogram: Optional["Histogram"] = None, *labels: str):
+    """量測區塊耗時，記錄到目前的API請求，並可同時寫入直方圖"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record(name, elapsed)
+        if histogram is not None:
+            histogram.observe(elapsed, *labels)
+
+
+def submit(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """以目前的contextvars送出工作，讓執行緒池中的計時記錄到同一個API請求"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_text(self, values: Sequence[str], extra: str = "") -> str:
+        pairs = [
+            f'{key}="{_escape(value)}"' for key, value in zip(self.labels, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+
+class Counter(_Metric):
+    """單調遞增的計數器"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{self._label_text(labels)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    """依標籤分組的直方圖"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (各分桶計數, 總和, 次數)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, n = self._series.get(
+                labels, ([0] * len(self.buckets), 0.0, 0)
+            )
+            if i < len(counts):
+                counts[i] += 1
+            self._series[labels] = (counts, total + value, n + 1)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            series = sorted(
+                (labels, (list(counts), total, n))
+                for labels, (counts, total, n) in self._series.items()
+            )
+        for labels, (counts, total, n) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = self._label_text(labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = self._label_text(labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {n}"
+            yield f"{self.name}_sum{self._label_text(labels)} {total:.6f}"
+            yield f"{self.name}_count{self._label_text(labels)} {n}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: List[_Metric] = []
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "api_request_duration_seconds",
+    "API請求處理時間",
+    ("method", "route", "status"),
+)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "nstc_upstream_request_duration_seconds",
+    "對NSTC網站的單次HTTP請求時間（含重試前的失敗請求）",
+    ("endpoint", "outcome"),
+)
+UPSTREAM_RESPONSE_BYTES = Counter(
+    "nstc_upstream_response_bytes_total", "NSTC網站回應的位元組數", ("endpoint",)
+)
+UPSTREAM_WAIT_SECONDS = Counter(
+    "nstc_upstream_wait_seconds_total",
+    "送出請求前因限速或節流等待的時間",
+    ("reason",),
+)
+PARSE_SECONDS = Histogram(
+    "nstc_parse_duration_seconds", "解析NSTC頁面的時間", ("page",)
+)
+DETAIL_FANOUT = Counter(
+    "nstc_detail_fanout_total", "需要抓取概述全文的計畫數"
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "nstc_pool_checkout_wait_seconds",
+    "從連線池取得連線的等待時間",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CHECKOUTS = Counter(
+    "nstc_pool_checkouts_total",
+    "從連線池取得連線的次數（reused 沿用既有連線，new 需要新連線）",
+    ("result",),
+)
+TLS_HANDSHAKE_SECONDS = Histogram(
+    "nstc_tls_handshake_duration_seconds",
+    "TLS交握時間（resumed 重用工作階段，full 完整交握）",
+    ("mode",),
+)
+BACKGROUND_REFRESHES = Counter(
+    "background_refreshes_total",
+    "背景重新整理與預熱工作（scheduled/deduped/dropped/ok/error）",
+    ("result",),
+)
+EXPORTED_ROWS = Counter("exported_rows_total", "匯出的獎項筆數", ("format",))
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "快取與儲存查詢結果", ("cache", "result")
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """記錄一次快取或儲存查詢的命中與否"""
+    result = "hit" if hit else "miss"
+    CACHE_LOOKUPS.inc(1, cache, result)
+    incr(f"{cache}_{result}")
+
+
+def render_prometheus() -> str:
+    """以Prometheus文字格式輸出所有指標"""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
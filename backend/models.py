@@ -1,10 +1,80 @@
-from dataclasses import dataclass, asdict
-from typing import Optional
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
 
+from pydantic import BaseModel, Field
 
-@dataclass
+from config import BATCH_MAX_NAMES
+
+# 計畫概述的載入方式：全文（逐筆抓取概述頁）、列表頁預覽或不回傳
+IMPACT_FULL = "full"
+IMPACT_PREVIEW = "preview"
+IMPACT_NONE = "none"
+IMPACT_MODES = (IMPACT_FULL, IMPACT_PREVIEW, IMPACT_NONE)
+
+
+# 獎項記錄（儲存與API回應）的欄位與順序
+RECORD_FIELDS = (
+    "award_year",
+    "pi_name",
+    "organ",
+    "plan_name",
+    "period",
+    "total_amount",
+    "impact",
+    "keywords_zh",
+    "keywords_en",
+    "project_no",
+)
+
+# API回應中可用 fields 參數選取的欄位
+RESPONSE_FIELDS = RECORD_FIELDS
+
+DATE_RE = re.compile(r"(\d{2,4})\s*[/.\-年]\s*(\d{1,2})\s*[/.\-月]\s*(\d{1,2})")
+AMOUNT_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+ROC_EPOCH = 1911
+
+
+def parse_amount(text: str) -> Optional[int]:
+    """解析金額文字（e.g., "1,234,000元"），小數四捨五入，無法解析時回傳None"""
+    m = AMOUNT_RE.search(text)
+    if m is None:
+        return None
+    return round(float(m.group().replace(",", "")))
+
+
+def parse_period(text: str) -> Tuple[Optional[date], Optional[date]]:
+    """
+    解析執行期間（e.g., "2024/08/01~2025/07/31"、"113年08月01日~114年07月31日"），
+    民國年自動轉為西元年
+
+    Returns:
+        (起日, 迄日)，無法解析的部分為None
+    """
+    dates: List[Optional[date]] = []
+    for year, month, day in DATE_RE.findall(text)[:2]:
+        y = int(year)
+        if y < ROC_EPOCH:
+            y += ROC_EPOCH
+        try:
+            dates.append(date(y, int(month), int(day)))
+        except ValueError:
+            dates.append(None)
+    dates += [None] * (2 - len(dates))
+    return dates[0], dates[1]
+
+
+@dataclass(slots=True)
 class AwardItem:
-    """爬取的獎項資料模型"""
+    """
+    爬取的獎項資料模型
+
+    各欄位保存網站上的原始文字，to_dict/to_response 原樣輸出；另解析出金額
+    （amount）與執行期間起迄日（period_start、period_end）供排序與統計使用。
+    重複出現的主持人、機構與年度字串經過intern共用。
+    """
 
     award_year: str
     pi_name: str
@@ -16,13 +86,35 @@ class AwardItem:
     keywords_zh: str
     keywords_en: str
     project_no: Optional[str] = None
+    amount: Optional[int] = field(init=False, repr=False, compare=False)
+    period_start: Optional[date] = field(init=False, repr=False, compare=False)
+    period_end: Optional[date] = field(init=False, repr=False, compare=False)
 
-    def to_dict(self):
-        """轉換為字典"""
-        return asdict(self)
+    def __post_init__(self) -> None:
+        self.award_year = sys.intern(self.award_year)
+        self.pi_name = sys.intern(self.pi_name)
+        self.organ = sys.intern(self.organ)
+        self.amount = parse_amount(self.total_amount)
+        self.period_start, self.period_end = parse_period(self.period)
 
-    def to_response(self):
-        """轉換為API回應格式"""
+    @classmethod
+    def from_dict(cls, record: Dict[str, Optional[str]]) -> "AwardItem":
+        """由文字記錄（列表頁欄位、儲存的JSON或資料列）建立"""
+        return cls(
+            award_year=record.get("award_year") or "",
+            pi_name=record.get("pi_name") or "",
+            organ=record.get("organ") or "",
+            plan_name=record.get("plan_name") or "",
+            period=record.get("period") or "",
+            total_amount=str(record.get("total_amount") or ""),
+            impact=record.get("impact") or "",
+            keywords_zh=record.get("keywords_zh") or "",
+            keywords_en=record.get("keywords_en") or "",
+            project_no=record.get("project_no") or None,
+        )
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """轉換為字典"""
         return {
             "award_year": self.award_year,
             "pi_name": self.pi_name,
@@ -35,3 +127,19 @@ class AwardItem:
             "keywords_en": self.keywords_en,
             "project_no": self.project_no,
         }
+
+    def to_response(self) -> Dict[str, Optional[str]]:
+        """轉換為API回應格式"""
+        return self.to_dict()
+
+
+class BatchAwardQuery(BaseModel):
+    """批次查詢請求"""
+
+    names: List[str] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_NAMES, description="主持人姓名列表"
+    )
+    organ: str = Field("", description="機構名稱")
+    years: Optional[List[int]] = Field(None, description="查詢年度，預設 114-110")
+    codes: Optional[List[str]] = Field(None, description="獎項代碼，預設 QS01")
+    stream: bool = Field(False, description="是否以NDJSON串流回傳")
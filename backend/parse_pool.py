@@ -0,0 +1,214 @@
+"""
+HTML解析階段
+
+解析HTML是CPU密集的工作，在同一個程序中各執行緒受GIL限制只能輪流解析。
+ProcessParseStage 把回應的原始位元組送到行程池解碼與解析，只傳回解析後的
+資料，離線收錄可用上所有核心；ParseStage 則在呼叫端的執行緒中解析。
+API服務只在明確設定 PARSE_PROCESSES 時使用行程池（Lambda等環境無法建立），
+harvest.py 未設定時使用CPU核心數。
+
+解析函式必須是模組層級的函式（e.g., grid_parser.parse_award_page），
+才能以名稱傳給行程池中的行程；新行程會重新載入啟動程式的模組，
+啟動程式需以 if __name__ == "__main__" 保護（main.py、harvest.py 皆是）。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import PARSE_PROCESSES
+
+logger = logging.getLogger(__name__)
+
+# 行程池預先載入的模組，新行程不必各自載入lxml與解析器
+PRELOAD_MODULES = ["lxml.html", "grid_parser", "detail_parser"]
+
+
+def parse_content(
+    parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+) -> Any:
+    """以回應的編碼解碼後解析，解碼方式同 requests.Response.text"""
+    try:
+        text = str(content, encoding or "utf-8", errors="replace")
+    except LookupError:
+        text = str(content, errors="replace")
+    return parse(text)
+
+
+class ParseStage:
+    """在呼叫端的執行緒中解析"""
+
+    workers = 0
+
+    def run(
+        self, parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+    ) -> Any:
+        return parse_content(parse, content, encoding)
+
+    async def run_async(
+        self, parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+    ) -> Any:
+        """在執行緒中解析，不佔用事件迴圈"""
+        return await asyncio.to_thread(parse_content, parse, content, encoding)
+
+    def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, object]:
+        return {"mode": "thread", "workers": self.workers}
+
+
+class ProcessParseStage(ParseStage):
+    """在行程池中解析，行程池於第一次解析時才建立"""
+
+    def __init__(self, workers: int):
+        """
+        Args:
+            workers: 行程數
+        """
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 無法建立行程池時（e.g., 沒有 /dev/shm）改為在執行緒中解析
+        self._disabled = False
+        self.tasks = 0
+        self.fallbacks = 0
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._pool is None and not self._disabled:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=_mp_context()
+                    )
+                except (OSError, NotImplementedError, ValueError) as e:
+                    logger.warning("無法建立解析行程池，改在執行緒中解析: %s", e)
+                    self._disabled = True
+            return self._pool
+
+    def _submit(
+        self, parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+    ) -> Optional[Tuple[ProcessPoolExecutor, Future]]:
+        """送出解析工作，回傳 (行程池, Future)；無法使用行程池時回傳None"""
+        pool = self._executor()
+        if pool is None:
+            return None
+        try:
+            future = pool.submit(parse_content, parse, content, encoding)
+        except BrokenProcessPool as e:
+            self._discard(pool, e)
+            return None
+        except (RuntimeError, OSError) as e:
+            # 無法啟動子行程（e.g., 啟動程式沒有 if __name__ == "__main__" 保護）
+            self._discard(pool, e, disable=True)
+            return None
+        with self._lock:
+            self.tasks += 1
+        return pool, future
+
+    def _discard(
+        self, pool: ProcessPoolExecutor, error: BaseException, disable: bool = False
+    ) -> None:
+        """
+        捨棄失效的行程池，這次改在執行緒中解析
+
+        行程異常結束時下次解析重新建立行程池；無法啟動子行程時（disable）
+        之後都在執行緒中解析。行程池已被其他執行緒替換時只改在執行緒中解析。
+        """
+        with self._lock:
+            self.fallbacks += 1
+            current = self._pool is pool
+            if current:
+                self._pool = None
+                self._disabled = disable
+        if current:
+            if disable:
+                logger.warning("無法啟動解析行程，改在執行緒中解析: %s", error)
+            else:
+                logger.warning("解析行程池失效，重新建立: %s", error)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(
+        self, parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+    ) -> Any:
+        submitted = self._submit(parse, content, encoding)
+        if submitted is not None:
+            pool, future = submitted
+            try:
+                return future.result()
+            except BrokenProcessPool as e:
+                self._discard(pool, e)
+        return parse_content(parse, content, encoding)
+
+    async def run_async(
+        self, parse: Callable[[str], Any], content: bytes, encoding: Optional[str]
+    ) -> Any:
+        submitted = self._submit(parse, content, encoding)
+        if submitted is not None:
+            pool, future = submitted
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool as e:
+                self._discard(pool, e)
+        return await super().run_async(parse, content, encoding)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "mode": "thread" if self._disabled else "process",
+                "workers": self.workers,
+                "tasks": self.tasks,
+                "fallbacks": self.fallbacks,
+            }
+
+
+def _mp_context():
+    """
+    行程池的啟動方式
+
+    API服務有多個執行緒，fork可能複製到其他執行緒持有的鎖；有forkserver時
+    改由預先載入解析器的forkserver產生新行程，否則使用spawn。
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+@lru_cache(maxsize=None)
+def default_parse_stage() -> ParseStage:
+    """
+    程序內共用的解析階段
+
+    PARSE_PROCESSES 大於1時使用行程池，否則在執行緒中解析。
+    """
+    if PARSE_PROCESSES > 1:
+        return ProcessParseStage(PARSE_PROCESSES)
+    return ParseStage()
+
+
+def offline_parse_stage(workers: Optional[int] = None) -> ParseStage:
+    """
+    離線收錄等大量查詢用的解析階段
+
+    Args:
+        workers: 行程數，預設為 PARSE_PROCESSES，未設定時為CPU核心數
+    """
+    if workers is None:
+        workers = PARSE_PROCESSES or os.cpu_count() or 1
+    if workers > 1:
+        return ProcessParseStage(workers)
+    return ParseStage()
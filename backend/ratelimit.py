@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    """
+    依主機分別計算的令牌桶限速器
+
+    每個主機每秒補充rate個令牌、最多累積burst個；令牌不足時呼叫端會被阻塞，
+    直到輪到它的時段。rate <= 0 表示不限速。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        # host -> (可用令牌數, 上次更新時間)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, url: str) -> float:
+        """
+        為url所屬主機取得一個令牌
+
+        Returns:
+            等待的秒數
+        """
+        delay = self.reserve(url)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def reserve(self, url: str) -> float:
+        """
+        為url所屬主機預扣一個令牌但不等待，供非同步呼叫端自行等待
+
+        Returns:
+            取得令牌前應等待的秒數
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            # 先預扣令牌，不足的部分換算成需要等待的時間
+            tokens -= 1.0
+            self._buckets[host] = (tokens, now)
+            delay = -tokens / self.rate if tokens < 0 else 0.0
+            if delay:
+                self.waits += 1
+                self.wait_seconds += delay
+        return delay
+
+    def stats(self) -> Dict[str, float]:
+        """回傳限速統計"""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+# 背景工作（重新整理、預熱）在全域限速之外另受的每主機請求預算
+_budget: ContextVar[Optional[RateLimiter]] = ContextVar("request_budget", default=None)
+
+
+@contextmanager
+def budget(limiter: RateLimiter) -> Iterator[None]:
+    """區塊內（含以contextvars傳遞的執行緒池工作）對外請求都須另取limiter的令牌"""
+    token = _budget.set(limiter)
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+def acquire_budget(url: str) -> float:
+    """不在預算區塊內時不等待，回傳等待的秒數"""
+    limiter = _budget.get()
+    return limiter.acquire(url) if limiter is not None else 0.0
@@ -0,0 +1,220 @@
+"""
+背景重新整理與預熱
+
+過期的快取項目先回傳給使用者，再由 BackgroundRefresher 在背景重新查詢
+（stale-while-revalidate）；Prewarmer 於離峰時段重新查詢熱門主持人的開放年度，
+讓使用者幾乎都只需讀取快取。背景工作的對外請求在全域限速之外另受每主機請求
+預算限制，不會排擠使用者的請求。
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Dict, Hashable, Optional, Sequence, Set, Tuple
+
+import metrics
+from config import (
+    PREWARM_HOURS,
+    PREWARM_INTERVAL,
+    PREWARM_UTC_OFFSET,
+    REFRESH_MAX_PENDING,
+    REFRESH_RATE_BURST,
+    REFRESH_RATE_LIMIT,
+    REFRESH_WORKERS,
+)
+from ratelimit import RateLimiter, budget
+
+logger = logging.getLogger(__name__)
+
+_in_background: ContextVar[bool] = ContextVar("in_background", default=False)
+
+
+def in_background() -> bool:
+    """是否在背景重新整理工作中；背景工作不應再回傳過期的快取"""
+    return _in_background.get()
+
+
+class BackgroundRefresher:
+    """以獨立執行緒池與請求預算執行重新整理工作，相同鍵值的工作不會重複排入"""
+
+    def __init__(
+        self,
+        workers: int = REFRESH_WORKERS,
+        rate: float = REFRESH_RATE_LIMIT,
+        burst: int = REFRESH_RATE_BURST,
+        max_pending: int = REFRESH_MAX_PENDING,
+    ):
+        """
+        Args:
+            workers: 背景執行緒數
+            rate, burst: 背景工作每主機每秒請求數上限與可累積的突發請求數
+            max_pending: 排隊中的工作數上限，超過時捨棄新的工作
+        """
+        self.budget = RateLimiter(rate, burst)
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="refresh"
+        )
+        self._lock = threading.Lock()
+        self._pending: Set[Hashable] = set()
+        self.counts: Dict[str, int] = {}
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            self.counts[result] = self.counts.get(result, 0) + 1
+        metrics.BACKGROUND_REFRESHES.inc(1, result)
+
+    def _claim(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._pending:
+                result = "deduped"
+            elif len(self._pending) >= self.max_pending:
+                result = "dropped"
+            else:
+                self._pending.add(key)
+                return True
+        self._count(result)
+        return False
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> bool:
+        """
+        在背景執行fn；同一鍵值已在排隊或執行中時不重複排入
+
+        不沿用呼叫端的contextvars，背景工作不會記入觸發它的API請求的計時。
+
+        Returns:
+            是否排入
+        """
+        if not self._claim(key):
+            return False
+        self._count("scheduled")
+        self._pool.submit(self._run, key, fn, args, kwargs)
+        return True
+
+    def run(self, key: Hashable, fn: Callable, *args, **kwargs) -> bool:
+        """在目前的執行緒中以請求預算執行fn，回傳是否成功"""
+        if not self._claim(key):
+            return False
+        return self._run(key, fn, args, kwargs)
+
+    def _run(self, key: Hashable, fn: Callable, args: Tuple, kwargs: Dict) -> bool:
+        token = _in_background.set(True)
+        try:
+            with budget(self.budget):
+                fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning("背景重新整理失敗 %s: %s", key, e)
+            self._count("error")
+            return False
+        else:
+            self._count("ok")
+            return True
+        finally:
+            _in_background.reset(token)
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                **self.counts,
+                "budget": self.budget.stats(),
+            }
+
+
+class Prewarmer:
+    """於離峰時段重新查詢熱門主持人的指定年度"""
+
+    def __init__(
+        self,
+        refresher: BackgroundRefresher,
+        refresh: Callable[[int, str], object],
+        names: Sequence[str],
+        years: Sequence[int],
+        hours: Tuple[int, int] = PREWARM_HOURS,
+        utc_offset: float = PREWARM_UTC_OFFSET,
+    ):
+        """
+        Args:
+            refresher: 執行預熱工作的背景重新整理器（共用請求預算）
+            refresh: 略過快取重新查詢一位主持人的一個年度，refresh(year, name)
+            names: 熱門主持人姓名
+            years: 預熱的年度（民國年）
+            hours: 離峰時段 [開始, 結束) 時，可跨午夜 (e.g., (23, 5))
+            utc_offset: 離峰時段所用的時區（相對UTC的小時數）
+        """
+        self.refresher = refresher
+        self.refresh = refresh
+        self.names = list(dict.fromkeys(n.strip() for n in names if n.strip()))
+        self.years = list(years)
+        self.hours = hours
+        self.utc_offset = utc_offset
+        self.last_run: Optional[Dict[str, object]] = None
+        self._last_day: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def in_window(self, now: Optional[float] = None) -> bool:
+        """現在是否在離峰時段內"""
+        local = (time.time() if now is None else now) + self.utc_offset * 3600
+        hour = int(local // 3600 % 24)
+        start, end = self.hours
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def run(self, timeout: Optional[float] = None) -> Dict[str, object]:
+        """
+        依序預熱所有主持人與年度（同步執行）
+
+        Args:
+            timeout: 最多執行的秒數，超過時不再開始新的工作（e.g., Lambda剩餘時間）
+
+        Returns:
+            預熱摘要
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        jobs = [(year, name) for year in self.years for name in self.names]
+        done = failed = 0
+        for year, name in jobs:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            ok = self.refresher.run(("prewarm", year, name), self.refresh, year, name)
+            done += ok
+            failed += not ok
+        summary = {
+            "jobs": len(jobs),
+            "refreshed": done,
+            "failed": failed,
+            "skipped": len(jobs) - done - failed,
+            "elapsed_s": round(time.monotonic() - started, 1),
+        }
+        logger.info("預熱完成: %s", summary)
+        self.last_run = summary
+        return summary
+
+    def start(self, interval: float = PREWARM_INTERVAL) -> None:
+        """啟動背景執行緒，每天進入離峰時段後預熱一次"""
+        if not self.names or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), name="prewarm", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            day = int((now + self.utc_offset * 3600) // 86400)
+            if self.in_window(now) and day != self._last_day:
+                self._last_day = day
+                try:
+                    self.run()
+                except Exception:
+                    logger.exception("預熱失敗")
+            self._stop.wait(interval)
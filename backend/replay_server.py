@@ -0,0 +1,205 @@
+"""
+以保存的HTML重播NSTC獎項查詢網站
+
+提供 AwardMultiQuery.aspx 與 AwardDialog3.aspx，可設定回應延遲與抖動，
+讓爬蟲與API在不連線NSTC網站的情況下重複量測；可選擇回應ETag並支援
+If-None-Match 條件式請求。依序尋找：
+    fixtures/award_list_{year}.html   -> fixtures/award_list.html
+    fixtures/award_detail_{no}.html   -> fixtures/award_detail.html
+列表頁的換頁回傳（POST __EVENTARGUMENT=Page$N）依序尋找：
+    fixtures/award_list_{year}_p{N}.html -> fixtures/award_list_p{N}.html
+
+用法:
+    python replay_server.py --port 8765 --latency 200 --jitter 50
+    NSTC_BASE_URL=http://127.0.0.1:8765/ python main.py
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# 頁面 -> (查詢參數, 檔名前綴)
+PAGES = {
+    "AwardMultiQuery.aspx": ("year", "award_list"),
+    "AwardDialog3.aspx": ("no", "award_detail"),
+}
+
+
+class ReplayServer:
+    """在背景執行緒中重播保存的HTML"""
+
+    def __init__(
+        self,
+        fixtures_dir: Path = FIXTURES_DIR,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        etag: bool = False,
+    ):
+        """
+        Args:
+            fixtures_dir: HTML檔案目錄
+            host, port: 監聽位址，port 為0時自動選擇
+            latency: 每個回應的平均延遲（秒）
+            jitter: 延遲的隨機抖動範圍（±秒）
+            etag: 是否回應ETag並以304回應內容未變的條件式請求
+        """
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.etag = etag
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._pages: Dict[Path, bytes] = {}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="replay-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在目前的執行緒中持續服務，直到 stop() 或中斷"""
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def page(self, name: str, key: str, page_no: int = 1) -> Optional[bytes]:
+        """依頁面、查詢參數與頁碼找出保存的HTML，找不到時回傳None"""
+        if name not in PAGES:
+            return None
+        _, prefix = PAGES[name]
+        suffix = f"_p{page_no}" if page_no > 1 else ""
+        for path in (
+            self.fixtures_dir / f"{prefix}_{key}{suffix}.html",
+            self.fixtures_dir / f"{prefix}{suffix}.html",
+        ):
+            if not key and path.stem != prefix + suffix:
+                continue
+            body = self._pages.get(path)
+            if body is None and path.is_file():
+                body = self._pages[path] = path.read_bytes()
+            if body is not None:
+                return body
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                # ASP.NET換頁回傳：__EVENTARGUMENT 為 Page$N
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                argument = form.get("__EVENTARGUMENT", [""])[0]
+                number = argument[len("Page$") :]
+                if not argument.startswith("Page$") or not number.isdigit():
+                    self.send_response(400)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.respond(int(number))
+
+            def respond(self, page_no: int = 1):
+                url = urlparse(self.path)
+                name = url.path.rsplit("/", 1)[-1]
+                param = PAGES.get(name, ("", ""))[0]
+                key = parse_qs(url.query).get(param, [""])[0]
+                with server._lock:
+                    server.requests[name] += 1
+                time.sleep(server.delay())
+
+                body = server.page(name, key, page_no)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+                if server.etag and self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.requests["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if server.etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="重播保存的NSTC獎項查詢頁面")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="平均延遲（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="延遲抖動（±毫秒）")
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR), help="HTML檔案目錄")
+    parser.add_argument(
+        "--etag", action="store_true", help="回應ETag並支援條件式請求"
+    )
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(
+        args.fixtures,
+        args.host,
+        args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        etag=args.etag,
+    )
+    print(f"重播伺服器: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
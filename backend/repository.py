@@ -0,0 +1,185 @@
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Set
+
+from models import AwardItem
+
+# 建立次要索引的欄位
+INDEXED_FIELDS = ("plan_name", "pi_name", "organ", "award_year")
+
+
+def award_key(award: AwardItem) -> str:
+    """獎項的唯一鍵值，沒有計畫編號時以年度、主持人與計畫名稱組成"""
+    if award.project_no:
+        return award.project_no
+    return f"{award.award_year}:{award.pi_name}:{award.plan_name}"
+
+
+class AwardRepository:
+    """
+    程序內的獎項資料庫
+
+    每筆獎項依計畫編號只保存一份，並在計畫名稱、主持人、機構與年度上建立
+    雜湊索引，等值查詢為O(1)。超過maxsize時淘汰最久未寫入或讀取的獎項。
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._awards: "OrderedDict[str, AwardItem]" = OrderedDict()
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {
+            field: {} for field in INDEXED_FIELDS
+        }
+        # 已確認為全文（而非列表頁預覽）的計畫概述
+        self._full_impact: Set[str] = set()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._awards)
+
+    def add(self, award: AwardItem, preview_impact: bool = False) -> None:
+        """
+        新增或更新一筆獎項
+
+        Args:
+            award: 獎項資料
+            preview_impact: award.impact 只是列表頁預覽，不覆寫已保存的概述；
+                否則 award.impact 視為全文，get_impact 可直接回傳
+        """
+        key = award_key(award)
+        with self._lock:
+            old = self._awards.get(key)
+            if old is not None:
+                self._unindex(key, old)
+                if preview_impact:
+                    award = replace(award, impact=old.impact)
+            if not preview_impact:
+                if award.impact:
+                    self._full_impact.add(key)
+                else:
+                    self._full_impact.discard(key)
+            self._awards[key] = award
+            self._awards.move_to_end(key)
+            for field in INDEXED_FIELDS:
+                self._indexes[field].setdefault(getattr(award, field), set()).add(key)
+            while len(self._awards) > self.maxsize:
+                evicted_key, evicted = self._awards.popitem(last=False)
+                self._unindex(evicted_key, evicted)
+                self._full_impact.discard(evicted_key)
+                self.evictions += 1
+
+    def add_many(
+        self, awards: Iterable[AwardItem], preview_impact: bool = False
+    ) -> None:
+        for award in awards:
+            self.add(award, preview_impact)
+
+    def _unindex(self, key: str, award: AwardItem) -> None:
+        for field in INDEXED_FIELDS:
+            index = self._indexes[field]
+            value = getattr(award, field)
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+    def get(self, project_no: str) -> Optional[AwardItem]:
+        """依計畫編號讀取獎項"""
+        with self._lock:
+            award = self._awards.get(project_no)
+            if award is not None:
+                self._awards.move_to_end(project_no)
+            return award
+
+    def get_impact(self, project_no: str) -> Optional[str]:
+        """讀取已確認為全文的計畫概述，沒有時回傳None"""
+        with self._lock:
+            if project_no not in self._full_impact:
+                return None
+            return self._awards[project_no].impact
+
+    def set_impact(self, project_no: str, impact: str) -> None:
+        """以計畫概述全文更新已保存的獎項"""
+        with self._lock:
+            award = self._awards.get(project_no)
+            if award is None:
+                return
+            self._awards[project_no] = replace(award, impact=impact)
+            self._full_impact.add(project_no)
+
+    def find(
+        self,
+        *,
+        plan_name: Optional[str] = None,
+        pi_name: Optional[str] = None,
+        organ: Optional[str] = None,
+        award_year: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+    ) -> List[AwardItem]:
+        """
+        依欄位等值與年度範圍查詢
+
+        Args:
+            plan_name, pi_name, organ, award_year: 欄位完全相符（可選）
+            year_from, year_to: 年度範圍，包含兩端（可選）
+
+        Returns:
+            由新到舊、再依計畫編號排序的AwardItem列表
+        """
+        equals = {
+            "plan_name": plan_name,
+            "pi_name": pi_name,
+            "organ": organ,
+            "award_year": award_year,
+        }
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+            # 由最小的索引集合開始取交集
+            for keys in sorted(
+                (
+                    self._indexes[field].get(value, set())
+                    for field, value in equals.items()
+                    if value is not None
+                ),
+                key=len,
+            ):
+                candidates = set(keys) if candidates is None else candidates & keys
+                if not candidates:
+                    return []
+
+            if year_from is not None or year_to is not None:
+                low = year_from if year_from is not None else float("-inf")
+                high = year_to if year_to is not None else float("inf")
+                in_range: Set[str] = set()
+                for year, keys in self._indexes["award_year"].items():
+                    if year.isdigit() and low <= int(year) <= high:
+                        in_range |= keys
+                candidates = (
+                    in_range if candidates is None else candidates & in_range
+                )
+
+            keys = self._awards.keys() if candidates is None else candidates
+            awards = [self._awards[key] for key in keys]
+
+        awards.sort(key=lambda a: a.project_no or "")
+        awards.sort(
+            key=lambda a: int(a.award_year) if a.award_year.isdigit() else 0,
+            reverse=True,
+        )
+        return awards
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._awards),
+                "maxsize": self.maxsize,
+                "evictions": self.evictions,
+                "full_impacts": len(self._full_impact),
+                **{
+                    f"distinct_{field}": len(index)
+                    for field, index in self._indexes.items()
+                },
+            }
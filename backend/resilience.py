@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import requests
+
+
+class CircuitOpenError(Exception):
+    """斷路器開啟中，暫停向上游發出請求"""
+
+
+# 可重試的暫時性錯誤：連線失敗、逾時與 429/5xx 回應
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """判斷例外是否為可重試的暫時性錯誤"""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in RETRYABLE_STATUS
+
+
+class RetryPolicy:
+    """帶隨機抖動的指數退避重試策略"""
+
+    def __init__(self, retries: int, backoff_base: float, backoff_max: float):
+        """
+        Args:
+            retries: 最多重試次數
+            backoff_base: 第一次重試的退避上限（秒），之後每次加倍
+            backoff_max: 單次退避上限（秒）
+        """
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delays(self) -> Iterator[float]:
+        """依序產出每次重試前的等待秒數（full jitter）"""
+        for attempt in range(self.retries):
+            cap = min(self.backoff_max, self.backoff_base * (2**attempt))
+            yield random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """
+    斷路器
+
+    連續失敗達門檻後開啟，期間所有請求立即失敗；經過recovery_timeout後進入
+    半開狀態，只放行一個試探請求，成功則關閉、失敗則重新開啟。試探請求被取消
+    或以其他例外結束時，呼叫端以 release_probe 釋放名額，讓下一個請求試探。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_id = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def before_call(self) -> Optional[int]:
+        """
+        請求前檢查，斷路器開啟時拋出CircuitOpenError
+
+        Returns:
+            放行的是半開狀態的試探請求時回傳其編號（交給 release_probe），否則為None
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return None
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                self._probe_id += 1
+                return self._probe_id
+            self.rejected += 1
+            elapsed = time.monotonic() - self._opened_at
+            retry_in = max(0.0, self.recovery_timeout - elapsed)
+            raise CircuitOpenError(f"上游服務暫時無法使用，{retry_in:.0f} 秒後重試")
+
+    def release_probe(self, probe: Optional[int]) -> None:
+        """
+        試探請求結束時釋放名額
+
+        已記錄成功或失敗時不影響狀態；請求被取消或以非上游錯誤結束時，
+        讓下一個請求可以重新試探，斷路器不會停在半開狀態拒絕所有請求。
+        """
+        if probe is None:
+            return
+        with self._lock:
+            if self._probing and self._probe_id == probe:
+                self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class UpstreamHealth:
+    """
+    以指數移動平均追蹤上游延遲與錯誤率，並換算成請求前的節流延遲
+
+    錯誤率升高或延遲超過slow_threshold時，後續請求會被延後送出，
+    讓吃力的上游有時間恢復，而不是持續堆積逾時請求。
+    """
+
+    def __init__(self, slow_threshold: float, max_delay: float, alpha: float = 0.2):
+        self.slow_threshold = slow_threshold
+        self.max_delay = max_delay
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, elapsed: float, ok: bool) -> None:
+        """記錄一次上游請求的耗時與結果"""
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            a = self.alpha
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency = a * elapsed + (1 - a) * self.latency
+            self.error_rate = a * (0.0 if ok else 1.0) + (1 - a) * self.error_rate
+
+    def pacing_delay(self) -> float:
+        """回傳下一個請求送出前應等待的秒數"""
+        with self._lock:
+            latency = self.latency or 0.0
+            delay = self.error_rate * self.max_delay
+            delay += max(0.0, latency - self.slow_threshold)
+            return min(self.max_delay, delay)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "latency_ewma": (
+                    None if self.latency is None else round(self.latency, 3)
+                ),
+                "error_rate_ewma": round(self.error_rate, 4),
+            }
@@ -0,0 +1,127 @@
+import asyncio
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from models import AwardItem
+
+
+class YearResult(NamedTuple):
+    """單一年度的查詢結果"""
+
+    year: int
+    items: List[AwardItem]
+    error: Optional[Exception] = None
+
+
+def merge_awards(batches: Iterable[List[AwardItem]]) -> List[AwardItem]:
+    """
+    依序合併多批查詢結果，並以計畫編號去除重複資料
+
+    沒有計畫編號的資料無法判斷是否重複，一律保留。
+    """
+    seen = set()
+    merged: List[AwardItem] = []
+    for batch in batches:
+        for award in batch:
+            if award.project_no:
+                if award.project_no in seen:
+                    continue
+                seen.add(award.project_no)
+            merged.append(award)
+    return merged
+
+
+def _unseen(items: List[AwardItem], seen: set) -> List[AwardItem]:
+    """略過計畫編號已出現過的資料，並將新的編號加入seen"""
+    fresh = []
+    for award in items:
+        if award.project_no:
+            if award.project_no in seen:
+                continue
+            seen.add(award.project_no)
+        fresh.append(award)
+    return fresh
+
+
+async def _search_one_async(
+    search_year: Callable[[int], Awaitable[List[AwardItem]]],
+    year: int,
+    slots: asyncio.Semaphore,
+) -> YearResult:
+    async with slots:
+        try:
+            return YearResult(year, await search_year(year))
+        except Exception as e:
+            return YearResult(year, [], e)
+
+
+async def search_years_async(
+    search_year: Callable[[int], Awaitable[List[AwardItem]]],
+    years: Sequence[int],
+    max_concurrency: int = 5,
+) -> Tuple[List[AwardItem], Dict[int, Exception]]:
+    """
+    同時查詢多個年度的獎項資料，單一年度失敗不影響其他年度
+
+    Args:
+        search_year: 查詢單一年度的coroutine函式
+        years: 民國年份列表，結果依此順序合併
+        max_concurrency: 同時查詢的年度數上限
+
+    Returns:
+        (合併且依計畫編號去重後的AwardItem列表, 失敗年度對應例外的字典)
+    """
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+    results = await asyncio.gather(
+        *(_search_one_async(search_year, year, slots) for year in years)
+    )
+    errors = {r.year: r.error for r in results if r.error is not None}
+    return merge_awards(r.items for r in results), errors
+
+
+async def iter_years_async(
+    search_year: Callable[[int], Awaitable[List[AwardItem]]],
+    years: Sequence[int],
+    max_concurrency: int = 5,
+) -> AsyncIterator[YearResult]:
+    """
+    同時查詢多個年度，依完成順序逐一產出結果
+
+    已在先完成年度出現過的計畫編號會被略過；單一年度失敗時產出帶有error的
+    YearResult，不影響其他年度。
+
+    Args:
+        search_year: 查詢單一年度的coroutine函式
+        years: 民國年份列表
+        max_concurrency: 同時查詢的年度數上限
+    """
+    if not years:
+        return
+
+    seen: set = set()
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [
+        asyncio.ensure_future(_search_one_async(search_year, year, slots))
+        for year in years
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result.error is not None:
+                yield result
+            else:
+                yield YearResult(result.year, _unseen(result.items, seen))
+    finally:
+        # 客戶端中斷串流時取消尚未完成的查詢
+        for task in tasks:
+            task.cancel()
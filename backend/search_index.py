@@ -0,0 +1,191 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models import AwardItem
+
+# 欄位權重：關鍵字與計畫名稱比概述更能代表研究主題
+FIELD_WEIGHTS = {
+    "plan_name": 2.0,
+    "keywords_zh": 2.0,
+    "keywords_en": 2.0,
+    "impact": 1.0,
+}
+
+# 中日韓統一表意文字（含擴充A與相容區）的連續段落，或英數單字
+TOKEN_RE = re.compile(
+    r"(?P<cjk>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)|(?P<word>[A-Za-z0-9]+)"
+)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or the to with".split()
+)
+
+# BM25參數
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """將文字切成檢索詞：中文取相鄰兩字，英文取小寫單字"""
+    tokens: List[str] = []
+    for m in TOKEN_RE.finditer(text or ""):
+        run = m.group("cjk")
+        if run:
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            continue
+        word = m.group("word").lower()
+        if word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+
+def cjk_chars(text: str) -> List[str]:
+    """
+    多字中文段落中的單字，讓單字查詢也能命中
+
+    單字段落在 tokenize 中已是檢索詞，不重複產生。
+    """
+    chars: List[str] = []
+    for m in TOKEN_RE.finditer(text or ""):
+        run = m.group("cjk")
+        if run and len(run) > 1:
+            chars.extend(run)
+    return chars
+
+
+class SearchHit(NamedTuple):
+    score: float
+    award: AwardItem
+
+
+class SearchIndex:
+    """
+    涵蓋計畫名稱、計畫概述與中英文關鍵字的全文檢索索引
+
+    以計畫編號為文件鍵值的倒排索引，可逐筆新增或更新；中文以相鄰兩字切詞，
+    不需要斷詞字典，排序使用BM25。另索引中文單字供單字查詢，單字不計入
+    文件長度，多字查詢的排序不受影響。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._docs: Dict[str, AwardItem] = {}
+        self._total_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, project_no: str) -> bool:
+        return project_no in self._docs
+
+    def add(self, award: AwardItem) -> None:
+        """新增或更新一筆獎項，沒有計畫編號的資料無法索引"""
+        doc_id = award.project_no
+        if not doc_id:
+            return
+
+        terms: Counter = Counter()
+        chars: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            text = getattr(award, field)
+            for token in tokenize(text):
+                terms[token] += weight
+            for char in cjk_chars(text):
+                chars[char] += weight
+        length = sum(terms.values())
+        terms.update(chars)
+
+        with self._lock:
+            self._remove(doc_id)
+            self._docs[doc_id] = award
+            self._doc_terms[doc_id] = dict(terms)
+            self._doc_len[doc_id] = length
+            self._total_len += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def add_many(self, awards: Iterable[AwardItem]) -> None:
+        for award in awards:
+            self.add(award)
+
+    def remove(self, project_no: str) -> None:
+        with self._lock:
+            self._remove(project_no)
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        del self._docs[doc_id]
+
+    def _norm_terms(self) -> Tuple[float, float]:
+        """
+        長度正規化項 K1 * (1 - B + B * 長度 / 平均長度) 拆成常數與斜率
+
+        平均長度隨每次異動改變，不預先計算各文件的正規化項，檢索時只對命中的
+        文件以長度計算，新增或更新不必重算整個索引。
+        """
+        avg_len = self._total_len / len(self._docs)
+        if avg_len > 0:
+            return K1 * (1 - B), K1 * B / avg_len
+        # 所有文件都沒有檢索詞：視為平均長度
+        return K1, 0.0
+
+    def search(
+        self, query: str, limit: int = 20, year: Optional[str] = None
+    ) -> List[SearchHit]:
+        """
+        以BM25排序查詢結果
+
+        Args:
+            query: 查詢文字
+            limit: 回傳筆數上限
+            year: 只回傳此年度的獎項（可選）
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            base, slope = self._norm_terms()
+            doc_len = self._doc_len
+            scores: Dict[str, float] = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5)) * (K1 + 1)
+                get = scores.get
+                for doc_id, tf in posting.items():
+                    norm = base + slope * doc_len[doc_id]
+                    scores[doc_id] = get(doc_id, 0.0) + idf * tf / (tf + norm)
+
+            if year:
+                scores = {
+                    doc_id: score
+                    for doc_id, score in scores.items()
+                    if self._docs[doc_id].award_year == year
+                }
+            top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return [SearchHit(score, self._docs[doc_id]) for doc_id, score in top]
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def request_key(url: str, params: Optional[Mapping[str, Any]] = None) -> Tuple:
+    """以URL與排序後的查詢參數建立請求鍵值"""
+    items = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+    return (url.rstrip("?"), items)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    合併相同鍵值的同時請求
+
+    同一鍵值同時只會有一個呼叫實際執行，其餘呼叫等待並共用其結果或例外。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        執行fn，若相同鍵值的呼叫正在進行則等待其結果
+
+        Args:
+            key: 請求鍵值
+            fn: 實際執行的函式
+
+        Returns:
+            fn的回傳值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """回傳合併請求統計"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的asyncio版本，只能在建立它的事件迴圈中使用
+
+    實際的呼叫以獨立的task執行，發起的請求被取消時，其餘等待者仍會取得結果。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        執行fn()，若相同鍵值的呼叫正在進行則等待其結果
+
+        Args:
+            key: 請求鍵值
+            fn: 回傳awaitable的函式
+
+        Returns:
+            fn()的結果
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            self.executed += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 所有等待者都已取消時，避免未取得的例外被記錄為錯誤
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """回傳合併請求統計"""
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,444 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import fastjson
+from models import AwardItem
+
+AWARD_FIELDS = (
+    "award_year",
+    "pi_name",
+    "organ",
+    "plan_name",
+    "period",
+    "total_amount",
+    "impact",
+    "keywords_zh",
+    "keywords_en",
+    "project_no",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS awards (
+    project_no   TEXT PRIMARY KEY,
+    award_year   TEXT NOT NULL,
+    award_code   TEXT NOT NULL DEFAULT '',
+    pi_name      TEXT NOT NULL,
+    organ        TEXT NOT NULL,
+    plan_name    TEXT NOT NULL,
+    period       TEXT NOT NULL,
+    total_amount TEXT NOT NULL,
+    impact       TEXT NOT NULL,
+    keywords_zh  TEXT NOT NULL,
+    keywords_en  TEXT NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_awards_pi ON awards (pi_name, award_year);
+CREATE INDEX IF NOT EXISTS idx_awards_plan ON awards (plan_name);
+CREATE INDEX IF NOT EXISTS idx_awards_year ON awards (award_year, award_code);
+CREATE INDEX IF NOT EXISTS idx_awards_year_no ON awards (award_year, project_no);
+
+CREATE TABLE IF NOT EXISTS queries (
+    year       TEXT NOT NULL,
+    code       TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    organ      TEXT NOT NULL,
+    items      TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (year, code, name, organ)
+);
+
+CREATE TABLE IF NOT EXISTS impacts (
+    project_no TEXT PRIMARY KEY,
+    impact     TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS harvest_partitions (
+    year       TEXT NOT NULL,
+    code       TEXT NOT NULL,
+    organ      TEXT NOT NULL,
+    rows       INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (year, code, organ)
+);
+
+CREATE TABLE IF NOT EXISTS harvests (
+    year         TEXT NOT NULL,
+    code         TEXT NOT NULL,
+    partitions   INTEGER NOT NULL,
+    rows         INTEGER NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (year, code)
+);
+"""
+
+# 部分相符查詢的條件；輸入中的 % 與 _ 以反斜線跳脫，視為一般字元
+LIKE = "LIKE ? ESCAPE '\\'"
+
+
+def contains_pattern(text: str) -> str:
+    """回傳包含text的LIKE樣式，跳脫萬用字元"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class AwardStore:
+    """
+    以單一SQLite檔案保存獎項資料與計畫概述
+
+    使用WAL模式，多個程序可同時讀取；每個執行緒使用各自的連線。
+    WAL依賴共享記憶體，所有程序需位於同一台主機（Lambda的 /tmp 或本機磁碟）。
+    """
+
+    def __init__(self, path: str, max_age: float):
+        """
+        Args:
+            path: SQLite檔案路徑
+            max_age: 資料保鮮時間（秒），超過即視為過期
+        """
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _fresh_since(self, max_age: Optional[float]) -> float:
+        return time.time() - (self.max_age if max_age is None else max_age)
+
+    def get_query(
+        self,
+        *,
+        year: int,
+        code: str,
+        name: str,
+        organ: str = "",
+        max_age: Optional[float] = None,
+    ) -> Optional[List[AwardItem]]:
+        """
+        讀取保鮮期內的列表查詢結果
+
+        Returns:
+            AwardItem列表；沒有紀錄或已過期時回傳None
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT items FROM queries "
+                "WHERE year = ? AND code = ? AND name = ? AND organ = ? "
+                "AND fetched_at >= ?",
+                (str(year), code, name, organ, self._fresh_since(max_age)),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return [AwardItem.from_dict(item) for item in fastjson.loads(row["items"])]
+
+    def put_query(
+        self,
+        *,
+        year: int,
+        code: str,
+        name: str,
+        organ: str = "",
+        items: List[AwardItem],
+    ) -> None:
+        """保存列表查詢結果，並依計畫編號更新獎項資料"""
+        now = time.time()
+        payload = fastjson.dumps([item.to_dict() for item in items])
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO queries "
+                "(year, code, name, organ, items, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(year), code, name, organ, payload, now),
+            )
+            self._upsert_awards(conn, items, code, now)
+
+    def upsert_awards(self, items: Iterable[AwardItem], code: str = "") -> None:
+        """依計畫編號新增或更新獎項資料"""
+        conn = self._connect()
+        with conn:
+            self._upsert_awards(conn, items, code, time.time())
+
+    @staticmethod
+    def _upsert_awards(
+        conn: sqlite3.Connection,
+        items: Iterable[AwardItem],
+        code: str,
+        now: float,
+        keep_impact: bool = False,
+    ) -> None:
+        """
+        Args:
+            keep_impact: items 的概述只是列表頁預覽，不覆寫已保存的概述
+        """
+        impact = (
+            "CASE WHEN awards.impact = '' THEN excluded.impact ELSE awards.impact END"
+            if keep_impact
+            else "excluded.impact"
+        )
+        conn.executemany(
+            "INSERT INTO awards "
+            "(project_no, award_year, award_code, pi_name, organ, plan_name, "
+            "period, total_amount, impact, keywords_zh, keywords_en, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (project_no) DO UPDATE SET "
+            "award_year = excluded.award_year, award_code = excluded.award_code, "
+            "pi_name = excluded.pi_name, organ = excluded.organ, "
+            "plan_name = excluded.plan_name, period = excluded.period, "
+            f"total_amount = excluded.total_amount, impact = {impact}, "
+            "keywords_zh = excluded.keywords_zh, keywords_en = excluded.keywords_en, "
+            "updated_at = excluded.updated_at",
+            [
+                (
+                    record["project_no"],
+                    record["award_year"],
+                    code,
+                    record["pi_name"],
+                    record["organ"],
+                    record["plan_name"],
+                    record["period"],
+                    record["total_amount"],
+                    record["impact"],
+                    record["keywords_zh"],
+                    record["keywords_en"],
+                    now,
+                )
+                for record in (item.to_dict() for item in items if item.project_no)
+            ],
+        )
+
+    def get_award(self, project_no: str) -> Optional[AwardItem]:
+        """依計畫編號讀取獎項資料（不論新舊）"""
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {', '.join(AWARD_FIELDS)} FROM awards WHERE project_no = ?",
+                (project_no,),
+            )
+            .fetchone()
+        )
+        return AwardItem.from_dict(dict(row)) if row else None
+
+    def iter_awards(self) -> Iterator[AwardItem]:
+        """依序讀出所有已保存的獎項資料"""
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(AWARD_FIELDS)} FROM awards ORDER BY project_no"
+        )
+        for row in cursor:
+            yield AwardItem.from_dict(dict(row))
+
+    def iter_awards_with_code(self) -> Iterator[Tuple[AwardItem, str]]:
+        """依序讀出所有已保存的獎項資料與其獎項代碼"""
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(AWARD_FIELDS)}, award_code FROM awards "
+            "ORDER BY project_no"
+        )
+        for row in cursor:
+            record = dict(row)
+            code = record.pop("award_code")
+            yield AwardItem.from_dict(record), code
+
+    def get_impact(
+        self, project_no: str, max_age: Optional[float] = None
+    ) -> Optional[str]:
+        """讀取保鮮期內的計畫概述全文"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT impact FROM impacts WHERE project_no = ? AND fetched_at >= ?",
+                (project_no, self._fresh_since(max_age)),
+            )
+            .fetchone()
+        )
+        return row["impact"] if row else None
+
+    def put_impact(self, project_no: str, impact: str) -> None:
+        """保存計畫概述全文"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO impacts (project_no, impact, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (project_no, impact, time.time()),
+            )
+
+    def find_awards(
+        self, *, year: int, code: str, pi_name: str = "", organ: str = ""
+    ) -> List[AwardItem]:
+        """
+        從已保存的獎項資料中查詢
+
+        Args:
+            year: 民國年份
+            code: 獎項代碼
+            pi_name: 主持人姓名（部分相符，同NSTC網站，可選）
+            organ: 機構名稱（部分相符，可選）
+        """
+        sql = (
+            f"SELECT {', '.join(AWARD_FIELDS)} FROM awards "
+            "WHERE award_year = ? AND award_code = ?"
+        )
+        args: list = [str(year), code]
+        if pi_name:
+            sql += f" AND pi_name {LIKE}"
+            args.append(contains_pattern(pi_name))
+        if organ:
+            sql += f" AND organ {LIKE}"
+            args.append(contains_pattern(organ))
+        sql += " ORDER BY project_no"
+        rows = self._connect().execute(sql, args).fetchall()
+        return [AwardItem.from_dict(dict(row)) for row in rows]
+
+    def scan_awards(
+        self,
+        *,
+        year: Optional[int] = None,
+        code: Optional[str] = None,
+        pi_name: str = "",
+        organ: str = "",
+        batch_size: int = 1000,
+    ) -> Iterator[AwardItem]:
+        """
+        依計畫編號順序逐批讀出符合條件的獎項資料
+
+        每批以上一批最後的計畫編號重新查詢（keyset），記憶體用量與資料量無關，
+        且每批都使用目前執行緒的連線，可在不同執行緒間繼續迭代。
+
+        Args:
+            year, code: 年度與獎項代碼（可選）
+            pi_name: 主持人姓名（部分相符，可選）
+            organ: 機構名稱（部分相符，可選）
+            batch_size: 每批讀取的筆數
+        """
+        where = ["project_no > ?"]
+        args: list = []
+        if year is not None:
+            where.append("award_year = ?")
+            args.append(str(year))
+        if code:
+            # 一元 + 讓SQLite不以 (award_year, award_code) 索引查詢，改用依計畫編號
+            # 排序的 (award_year, project_no) 索引，每批不必重新排序
+            where.append("+award_code = ?")
+            args.append(code)
+        if pi_name:
+            where.append(f"pi_name {LIKE}")
+            args.append(contains_pattern(pi_name))
+        if organ:
+            where.append(f"organ {LIKE}")
+            args.append(contains_pattern(organ))
+        sql = (
+            f"SELECT {', '.join(AWARD_FIELDS)} FROM awards "
+            f"WHERE {' AND '.join(where)} ORDER BY project_no LIMIT ?"
+        )
+        last = ""
+        while True:
+            rows = self._connect().execute(sql, [last, *args, batch_size]).fetchall()
+            for row in rows:
+                yield AwardItem.from_dict(dict(row))
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]["project_no"]
+
+    def find_awards_by_plan_name(self, plan_name: str) -> List[AwardItem]:
+        """依計畫名稱（完全相符）查詢已保存的獎項資料"""
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {', '.join(AWARD_FIELDS)} FROM awards "
+                "WHERE plan_name = ? ORDER BY award_year DESC, project_no",
+                (plan_name,),
+            )
+            .fetchall()
+        )
+        return [AwardItem.from_dict(dict(row)) for row in rows]
+
+    def harvested_partitions(
+        self, *, year: int, code: str, since: float = 0.0
+    ) -> Dict[str, int]:
+        """回傳在since之後完成的收錄分區（機構）與其資料筆數"""
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT organ, rows FROM harvest_partitions "
+                "WHERE year = ? AND code = ? AND updated_at >= ?",
+                (str(year), code, since),
+            )
+            .fetchall()
+        )
+        return {row["organ"]: row["rows"] for row in rows}
+
+    def put_harvest_partition(
+        self,
+        *,
+        year: int,
+        code: str,
+        organ: str,
+        items: List[AwardItem],
+        full_impact: bool = False,
+    ) -> None:
+        """
+        保存一個收錄分區的資料，並記錄該分區已完成
+
+        Args:
+            full_impact: items 含概述全文，一併寫入概述；否則只是列表頁預覽，
+                不覆寫已保存的概述
+        """
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            self._upsert_awards(conn, items, code, now, keep_impact=not full_impact)
+            if full_impact:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO impacts (project_no, impact, fetched_at) "
+                    "VALUES (?, ?, ?)",
+                    [
+                        (item.project_no, item.impact, now)
+                        for item in items
+                        if item.project_no and item.impact
+                    ],
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO harvest_partitions "
+                "(year, code, organ, rows, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (str(year), code, organ, len(items), now),
+            )
+
+    def complete_harvest(
+        self, *, year: int, code: str, partitions: int, rows: int
+    ) -> None:
+        """記錄某年度與獎項代碼已完整收錄"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO harvests "
+                "(year, code, partitions, rows, completed_at) VALUES (?, ?, ?, ?, ?)",
+                (str(year), code, partitions, rows, time.time()),
+            )
+
+    def harvest_completed_at(self, *, year: int, code: str) -> Optional[float]:
+        """回傳某年度與獎項代碼最後一次完整收錄的時間，未收錄時回傳None"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT completed_at FROM harvests WHERE year = ? AND code = ?",
+                (str(year), code),
+            )
+            .fetchone()
+        )
+        return row["completed_at"] if row else None
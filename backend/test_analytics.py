@@ -0,0 +1,152 @@
+"""
+測試腳本：驗證經費彙總（analytics.py）的分組結果、NumPy與純Python路徑一致及結果快取失效
+
+以列表頁fixture的獎項彙總；可以 pytest 執行
+"""
+
+from collections import defaultdict
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import analytics
+import main
+from analytics import AwardColumns
+from conftest import make_client
+from grid_parser import parse_award_grid
+from replay_server import ReplayServer
+
+FIXTURES = Path(__file__).parent / "fixtures"
+AWARDS = [
+    row.item
+    for row in parse_award_grid(
+        (FIXTURES / "award_list.html").read_text(encoding="utf-8")
+    )
+]
+
+
+def expected_groups(field):
+    """逐筆計算的分組結果，依總額由大到小排序"""
+    count, total, priced = defaultdict(int), defaultdict(int), defaultdict(int)
+    for award in AWARDS:
+        if not award.project_no:
+            continue
+        key = getattr(award, field)
+        count[key] += 1
+        if award.amount is not None:
+            total[key] += award.amount
+            priced[key] += 1
+    groups = [
+        {
+            "key": key,
+            "count": count[key],
+            "total": total[key],
+            "mean": round(total[key] / priced[key], 1) if priced[key] else None,
+        }
+        for key in count
+    ]
+    return sorted(groups, key=lambda g: g["total"], reverse=True)
+
+
+def make_columns():
+    columns = AwardColumns()
+    for award in AWARDS:
+        columns.add(award, award_code="QS01")
+    return columns
+
+
+@pytest.fixture(params=["numpy", "python"])
+def columns(request, monkeypatch):
+    """分別以NumPy與純Python路徑彙總"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics, "np", None)
+    return make_columns()
+
+
+@pytest.mark.parametrize("field", ["pi_name", "organ"])
+def test_group_by_matches_row_by_row(columns, field):
+    """分組的件數、總額與平均與逐筆計算相同，沒有計畫編號的資料不納入"""
+    assert len(columns) == sum(1 for award in AWARDS if award.project_no)
+    assert columns.group_by(field) == expected_groups(field)
+
+
+def test_filters_sort_and_limit(columns):
+    """依年度與獎項代碼篩選，不存在的篩選值回傳空結果"""
+    assert columns.group_by("award_year", award_code="QS01") == expected_groups(
+        "award_year"
+    )
+    assert columns.group_by("organ", award_year="112") == []
+    assert columns.group_by("organ", award_code="QS99") == []
+    keys = [g["key"] for g in columns.group_by("organ", sort="key")]
+    assert keys == sorted(keys)
+    assert columns.group_by("organ", sort="count", limit=1)[0]["count"] == max(
+        g["count"] for g in expected_groups("organ")
+    )
+
+
+def test_update_invalidates_results(columns):
+    """資料異動後版本遞增並重新彙總，內容相同的更新不影響快取"""
+    before = columns.group_by("pi_name")
+    version = columns.version
+    award = next(a for a in AWARDS if a.amount is not None)
+    columns.add(award)
+    assert columns.version == version
+    assert columns.group_by("pi_name") == before
+
+    columns.add(replace(award, total_amount="0"))
+    assert columns.version == version + 1
+    totals = {g["key"]: g["total"] for g in columns.group_by("pi_name")}
+    expected = {g["key"]: g["total"] for g in expected_groups("pi_name")}
+    assert totals[award.pi_name] == expected[award.pi_name] - award.amount
+    # 未提供獎項代碼時保留原本的代碼
+    assert columns.group_by("award_code")[0]["key"] == "QS01"
+
+
+def test_result_cache_is_bounded(columns):
+    """limit 不影響快取鍵值，不存在的篩選值不快取，快取組數有上限"""
+    columns.cache_size = 2
+    for limit in range(1, 20):
+        assert len(columns.group_by("organ", limit=limit)) <= limit
+    for year in range(100):
+        assert columns.group_by("organ", award_year=str(year)) == []
+    assert list(columns._results) == [("organ", None, None, "total")]
+
+    columns.group_by("pi_name")
+    columns.group_by("organ")
+    columns.group_by("award_year")
+    assert list(columns._results) == [
+        ("organ", None, None, "total"),
+        ("award_year", None, None, "total"),
+    ]
+
+
+def test_invalid_arguments():
+    """不支援的分組欄位與排序方式拋出ValueError"""
+    with pytest.raises(ValueError):
+        AwardColumns().group_by("plan_name")
+    with pytest.raises(ValueError):
+        AwardColumns().group_by("organ", sort="median")
+    with pytest.raises(ValueError):
+        AwardColumns().group_by("organ", limit=0)
+
+
+def test_api_stats(monkeypatch):
+    """/api/stats 彙總已查詢過的獎項"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    with ReplayServer() as server:
+        client = make_client(server)
+        with TestClient(main.create_app(client)) as api:
+            api.get(
+                "/api/awards",
+                params={"pi_name": "李文廷", "years": "113", "include_impact": "none"},
+            )
+            r = api.get("/api/stats", params={"group_by": "organ", "year": "113"})
+            assert api.get("/api/stats", params={"sort": "median"}).status_code == 400
+    assert r.status_code == 200
+    body = r.json()
+    assert body["awards"] == len(make_columns())
+    assert body["groups"] == expected_groups("organ")
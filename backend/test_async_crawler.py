@@ -0,0 +1,71 @@
+"""
+測試腳本：以重播伺服器驗證非同步客戶端（async_crawler.py）的查詢結果與連線池生命週期
+
+可以 pytest 執行
+"""
+
+import asyncio
+
+from async_crawler import AsyncNSTCAwardClient
+from conftest import DETAIL_PAGE, LIST_PAGE, make_client
+
+
+def test_same_results_as_sync_client(server):
+    """非同步查詢與同步客戶端的結果相同，重複查詢由快取回應"""
+    expected = make_client(server).search_awards(year=113, code="QS01", name="")
+    requests = dict(server.requests)
+
+    client = AsyncNSTCAwardClient(make_client(server))
+
+    async def run():
+        try:
+            first = await client.search_awards(year=113, code="QS01", name="")
+            second = await client.search_awards(year=113, code="QS01", name="")
+        finally:
+            await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == expected
+    assert server.requests[LIST_PAGE] == 2 * requests[LIST_PAGE]
+    assert server.requests[DETAIL_PAGE] == 2 * requests[DETAIL_PAGE]
+
+
+def test_http_closed_when_loop_ends(server):
+    """未呼叫 aclose 時，事件迴圈結束前仍會關閉連線池；下一個迴圈建立新的連線池"""
+    client = AsyncNSTCAwardClient(make_client(server))
+    pools = []
+
+    async def run():
+        await client.search_awards(
+            year=113, code="QS01", name="", include_impact="preview"
+        )
+        pools.append(client._loop_state().http)
+        client.list_cache.clear()
+
+    asyncio.run(run())
+    assert pools[0].is_closed
+
+    asyncio.run(run())
+    assert pools[1] is not pools[0] and pools[1].is_closed
+    # 已結束的事件迴圈的狀態在建立新狀態時移除
+    assert len(client._states) == 1
+    assert client.stats()["singleflight_async"] is None
+
+
+def test_aclose_drops_loop_state(server):
+    """aclose 關閉並移除目前事件迴圈的連線池，之後的請求重新建立"""
+    client = AsyncNSTCAwardClient(make_client(server))
+
+    async def run():
+        await client.fetch_impact_detail("113WFA2110082")
+        http = client._loop_state().http
+        await client.aclose()
+        assert http.is_closed and not client._states
+        client.detail_cache.clear()
+        await client.fetch_impact_detail("113WFA2110082")
+        assert client._loop_state().http is not http
+        await client.aclose()
+
+    asyncio.run(run())
+    assert server.requests[DETAIL_PAGE] == 2
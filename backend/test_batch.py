@@ -0,0 +1,76 @@
+"""
+測試腳本：以重播伺服器驗證多位主持人的批次查詢（batch.py）的結果合併與錯誤回報
+
+重播伺服器不區分主持人，每位主持人都取得同一份列表頁；可以 pytest 執行
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from batch import BatchJob, BatchResult
+from conftest import DETAIL_PAGE, LIST_PAGE, make_client
+from grid_parser import parse_award_grid
+
+FIXTURES = Path(__file__).parent / "fixtures"
+ROWS = parse_award_grid((FIXTURES / "award_list.html").read_text(encoding="utf-8"))
+PROJECT_NOS = [row.item.project_no for row in ROWS if row.item.project_no]
+DETAILS = sum(1 for row in ROWS if row.has_impact_detail)
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(4) as pool:
+        yield pool
+
+
+def make_job(server, pool, **kwargs):
+    kwargs.setdefault("names", ["李文廷", " ", "王大明", "李文廷"])
+    kwargs.setdefault("years", [113, 112])
+    kwargs.setdefault("codes", ["QS01"])
+    return BatchJob(make_client(server), pool, **kwargs)
+
+
+def test_results_merged_per_name(server, pool):
+    """每位主持人一筆結果，多個年度依計畫編號去除重複，概述全文只抓取一次"""
+    job = make_job(server, pool)
+    assert job.names == ["李文廷", "王大明"]
+    assert len(job.plan()) == 4
+
+    results = job.run()
+    assert sorted(results) == sorted(job.names)
+    for name, result in results.items():
+        assert result.name == name and result.errors == []
+        numbered = [a.project_no for a in result.items if a.project_no]
+        assert numbered == PROJECT_NOS
+        # 沒有計畫編號的資料無法判斷重複，各年度都保留
+        assert len(result.items) - len(numbered) == 2
+    assert server.requests[LIST_PAGE] == 4
+    assert server.requests[DETAIL_PAGE] == DETAILS
+
+
+def test_failed_query_reported_with_other_years(server, pool):
+    """單一年度查詢失敗時記入該主持人的錯誤，仍回傳其他年度的結果"""
+    job = make_job(server, pool, names=["李文廷"])
+    search_award_rows = job.client.search_award_rows
+
+    def flaky(*, year, **kwargs):
+        if year == 112:
+            raise RuntimeError("連線逾時")
+        return search_award_rows(year=year, **kwargs)
+
+    job.client.search_award_rows = flaky
+    (result,) = job.iter_results()
+    assert result.errors == ["112 QS01 查詢失敗: 連線逾時"]
+    assert [a.project_no for a in result.items if a.project_no] == PROJECT_NOS
+
+
+def test_no_queries_yields_empty_results(server, pool):
+    """沒有獎項代碼時每位主持人仍產出空的結果"""
+    job = make_job(server, pool, codes=[])
+    assert sorted(job.iter_results()) == [
+        BatchResult("李文廷", [], []),
+        BatchResult("王大明", [], []),
+    ]
+    assert server.requests[LIST_PAGE] == 0
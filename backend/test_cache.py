@@ -0,0 +1,66 @@
+"""
+測試腳本：驗證查詢結果快取（cache.py）的TTL過期、LRU淘汰，以及客戶端以快取回應重複查詢
+
+可以 pytest 執行
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import TTLCache
+from conftest import DETAIL_PAGE, LIST_PAGE, make_client
+from replay_server import ReplayServer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """以手動推進的時鐘取代快取使用的 time.monotonic（只替換 cache 模組）"""
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_ttl_expiry_and_stale_read(clock):
+    """過期後一般讀取視為未命中，allow_stale 仍可取得舊值"""
+    c = TTLCache(ttl=60, maxsize=10)
+    c.set("a", 1)
+    assert c.get("a") == 1 and "a" in c
+
+    clock[0] += 61
+    assert c.get("a") is None and "a" not in c
+    assert c.get("a", allow_stale=True) == 1
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert (stats["expirations"], stats["stale_hits"]) == (1, 1)
+
+    c.set("a", 2)
+    assert c.get("a") == 2
+
+
+def test_lru_eviction():
+    """超過上限時淘汰最久未使用的記錄，讀取會更新使用順序"""
+    c = TTLCache(ttl=60, maxsize=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert "b" not in c and c.get("a") == 1 and c.get("c") == 3
+    assert len(c) == 2 and c.evictions == 1
+    assert c.pop("a") == 1 and c.pop("a", "missing") == "missing"
+
+
+def test_client_serves_repeat_queries_from_cache(clock):
+    """重複查詢由列表頁與概述快取回應，過期後重新查詢NSTC網站"""
+    with ReplayServer() as server:
+        client = make_client(server)
+        first = client.search_awards(year=113, code="QS01", name="")
+        requests = dict(server.requests)
+        assert client.search_awards(year=113, code="QS01", name="") == first
+        assert server.requests == requests
+
+        clock[0] += max(client.list_cache.ttl, client.detail_cache.ttl) + 1
+        assert client.search_awards(year=113, code="QS01", name="") == first
+        assert server.requests[LIST_PAGE] == 2 * requests[LIST_PAGE]
+        assert server.requests[DETAIL_PAGE] == 2 * requests[DETAIL_PAGE]
@@ -0,0 +1,134 @@
+"""
+測試腳本：驗證TLS工作階段重用（connection.ResumingSSLContext）與連線池統計
+
+TLS測試以 openssl 產生的自簽憑證在本機建立只接受TLS 1.2的伺服器，沒有
+openssl 指令時略過；可以 pytest 執行
+"""
+
+import asyncio
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
+
+from conftest import LIST_PAGE, make_client
+from connection import ConnectionStats, tls12_context
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    """localhost 的自簽憑證與私鑰路徑"""
+    if shutil.which("openssl") is None:
+        pytest.skip("需要 openssl 指令產生測試憑證")
+    path = tmp_path_factory.mktemp("tls")
+    cert, key = path / "cert.pem", path / "key.pem"
+    args = "req -x509 -newkey rsa:2048 -nodes -days 1 -subj /CN=localhost"
+    subprocess.run(
+        ["openssl", *args.split(), "-keyout", str(key), "-out", str(cert)]
+        + ["-addext", "subjectAltName=DNS:localhost"],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+@pytest.fixture
+def tls_server(certificate):
+    """每條連線讀一個位元組、回一個位元組後關閉的TLS 1.2伺服器，回傳連接埠"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*map(str, certificate))
+    context.maximum_version = ssl.TLSVersion.TLSv1_2
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            try:
+                with context.wrap_socket(conn, server_side=True) as tls:
+                    tls.recv(1)
+                    tls.sendall(b"x")
+            except (OSError, ssl.SSLError):
+                pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname()[1]
+    listener.close()
+
+
+def client_context(certificate):
+    stats = ConnectionStats()
+    context = tls12_context(stats)
+    context.load_verify_locations(str(certificate[0]))
+    # 相同的CA來源只載入一次
+    context.load_verify_locations(str(certificate[0]))
+    return context, stats
+
+
+def connect(context, port):
+    """以socket連線完成一次交握，回傳是否重用了工作階段"""
+    sock = socket.create_connection(("127.0.0.1", port))
+    with context.wrap_socket(sock, server_hostname="localhost") as tls:
+        tls.sendall(b"a")
+        tls.recv(1)
+        return tls.session_reused
+
+
+def test_tls_session_resumed(certificate, tls_server):
+    """第一條連線完整交握，之後的連線重用同一主機的工作階段"""
+    context, stats = client_context(certificate)
+    assert [connect(context, tls_server) for _ in range(3)] == [False, True, True]
+    result = stats.stats()
+    assert (result["tls_handshakes"], result["tls_resumed"]) == (3, 2)
+    assert result["tls_resume_ratio"] == round(2 / 3, 4)
+
+
+def test_tls_session_shared_with_asyncio(certificate, tls_server):
+    """記憶體BIO的非同步連線沿用socket連線保存的工作階段，並記入同一份統計"""
+    context, stats = client_context(certificate)
+    assert not connect(context, tls_server)
+
+    async def run():
+        reader, writer = await asyncio.open_connection(
+            "127.0.0.1", tls_server, ssl=context, server_hostname="localhost"
+        )
+        writer.write(b"a")
+        await reader.read(1)
+        reused = writer.get_extra_info("ssl_object").session_reused
+        writer.close()
+        await writer.wait_closed()
+        return reused
+
+    assert asyncio.run(run())
+    assert (stats.handshakes, stats.resumed) == (2, 1)
+
+
+def test_pool_stats(server):
+    """客戶端統計取得連線次數、新建連線數與沿用比例"""
+    client = make_client(server)
+    assert client.stats()["connections"]["reuse_ratio"] is None
+    for _ in range(3):
+        client.s.get(server.url + LIST_PAGE, params={"year": "113"}).raise_for_status()
+    result = client.stats()["connections"]
+    assert (result["checkouts"], result["new_connections"]) == (3, 1)
+    assert result["reuse_ratio"] == round(2 / 3, 4)
+    assert result["tls_handshakes"] == 0
+    assert result["max_wait_seconds"] >= 0
+
+
+def test_connection_stats_ratios():
+    """沒有資料時比例為None；最長等待時間取最大值"""
+    stats = ConnectionStats()
+    assert stats.stats()["reuse_ratio"] is None
+    assert stats.stats()["tls_resume_ratio"] is None
+    stats.checkout(0.5, reused=False)
+    stats.checkout(0.1, reused=True)
+    stats.handshake(0.2, resumed=False)
+    result = stats.stats()
+    assert (result["reuse_ratio"], result["tls_resume_ratio"]) == (0.5, 0)
+    assert (result["wait_seconds"], result["max_wait_seconds"]) == (0.6, 0.5)
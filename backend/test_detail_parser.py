@@ -0,0 +1,107 @@
+"""
+測試腳本：驗證概述頁解析器（detail_parser.py）與舊版BeautifulSoup擷取結果一致
+
+舊版的fallback取 get_text 最長的td/div，也就是最外層的容器；新版依直屬文字
+挑選，內文區塊沒有包在其他區塊中時兩者相同，否則新版取其中的內文區塊；
+可以 pytest 執行
+"""
+
+import re
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from detail_parser import block_text, densest_block, parse_impact_detail
+from grid_parser import parse_html
+
+FIXTURES = Path(__file__).parent / "fixtures"
+DETAIL_HTML = (FIXTURES / "award_detail.html").read_text(encoding="utf-8")
+# 去除id後只能以文字密度挑選內文區塊
+NO_ID_HTML = re.sub(r'\sid="[^"]*"', "", DETAIL_HTML)
+FLAT_HTML = """
+<html><body>
+  <div><a href="/">首頁</a> <a href="/awards">獎項查詢</a> <a href="/help">說明</a></div>
+  <table><tr>
+    <td>計畫概述</td>
+    <td>本計畫建立多中心醫療影像資料集，並提出可解釋之深度學習模型。</td>
+    <td>113年度</td>
+  </tr></table>
+  <div>聯絡我們</div>
+</body></html>
+"""
+TIED_HTML = "<html><body><div>甲乙丙</div><td>丁戊己</td></body></html>"
+
+
+def legacy_impact_detail(text):
+    """舊版 crawler.parse_impact_detail（BeautifulSoup）"""
+    soup = BeautifulSoup(text, "lxml")
+    for pat in [r"lblIMPACT", r"IMPACT_S", r"Impact", r"impact"]:
+        node = soup.find(id=re.compile(pat))
+        if node:
+            text = node.get_text(" ", strip=True)
+            if text:
+                return text
+    best = ""
+    for c in soup.find_all(["td", "div"]):
+        text = c.get_text(" ", strip=True)
+        if len(text) > len(best):
+            best = text
+    return re.sub(r"\s+", " ", best).strip()
+
+
+def legacy_block(doc):
+    """舊版fallback挑選的區塊：全部文字最長的td/div，相同時取較前面的"""
+    best, size = None, 0
+    for node in doc.iter("td", "div"):
+        length = len(block_text(node))
+        if length > size:
+            best, size = node, length
+    return best
+
+
+def is_within(node, ancestor):
+    return any(a is ancestor for a in node.iterancestors()) or node is ancestor
+
+
+def test_id_lookup_matches_legacy():
+    """有概述id的頁面擷取的全文與舊版相同"""
+    assert parse_impact_detail(DETAIL_HTML) == legacy_impact_detail(DETAIL_HTML)
+
+
+@pytest.mark.parametrize("html", [FLAT_HTML, TIED_HTML])
+def test_flat_layout_picks_legacy_block(html):
+    """區塊沒有巢狀時挑選與舊版相同的區塊（相同時取較前面的），全文也相同"""
+    doc = parse_html(html)
+    assert densest_block(doc) is legacy_block(doc)
+    assert parse_impact_detail(html) == legacy_impact_detail(html)
+
+
+def test_nested_layout_picks_content_within_legacy_block():
+    """內文包在外層容器中時，挑選舊版區塊中的內文儲存格而不含標籤文字"""
+    doc = parse_html(NO_ID_HTML)
+    best, legacy = densest_block(doc), legacy_block(doc)
+    assert best.tag == "td" and legacy.tag == "div"
+    assert is_within(best, legacy)
+
+    text = parse_impact_detail(NO_ID_HTML)
+    assert text == re.sub(r"\s+", " ", parse_impact_detail(DETAIL_HTML))
+    assert text in legacy_impact_detail(NO_ID_HTML)
+    assert not text.startswith("計畫概述")
+
+
+def test_links_and_scripts_are_not_counted():
+    """連結與script的文字不計入區塊的文字量"""
+    html = (
+        "<html><body><div><script>var x = '很長很長很長很長很長';</script>"
+        "<a href='/'>很長很長很長很長很長很長</a>短文</div><td>內文較長的段落</td>"
+        "</body></html>"
+    )
+    assert densest_block(parse_html(html)).tag == "td"
+    assert parse_impact_detail(html) == "內文較長的段落"
+
+
+def test_empty_pages():
+    """沒有文字的頁面回傳空字串"""
+    assert parse_impact_detail("") == ""
+    assert parse_impact_detail("<html><body><div> </div></body></html>") == ""
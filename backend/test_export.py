@@ -0,0 +1,127 @@
+"""
+測試腳本：驗證匯出編碼（export.py）的 JSONL、CSV、Parquet 輸出與分段，
+以及即時查詢匯出與 /api/export 從儲存匯出
+
+以列表頁fixture的獎項匯出；可以 pytest 執行
+"""
+
+import csv
+import io
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import export
+import main
+from conftest import make_client
+from crawler import NSTCAwardClient
+from export import ExportStats, iter_crawled_awards, iter_export
+from grid_parser import parse_award_grid
+from models import IMPACT_PREVIEW, RECORD_FIELDS
+from replay_server import ReplayServer
+from store import AwardStore
+
+FIXTURES = Path(__file__).parent / "fixtures"
+AWARDS = [
+    row.item
+    for row in parse_award_grid(
+        (FIXTURES / "award_list.html").read_text(encoding="utf-8")
+    )
+]
+RECORDS = [award.to_dict() for award in AWARDS]
+
+
+def read_jsonl(data: bytes):
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def read_csv(data: bytes):
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+
+def as_csv(record: dict, fields=RECORD_FIELDS):
+    """CSV以空字串輸出None"""
+    return {field: "" if record[field] is None else record[field] for field in fields}
+
+
+def test_jsonl_round_trip():
+    """JSONL每行一筆，欄位與順序同 RECORD_FIELDS"""
+    stats = ExportStats("jsonl")
+    records = read_jsonl(b"".join(iter_export(iter(AWARDS), "jsonl", stats=stats)))
+    assert records == RECORDS
+    assert list(records[0]) == list(RECORD_FIELDS)
+    assert stats.rows == len(AWARDS) and stats.bytes > 0
+
+
+def test_csv_round_trip_and_fields():
+    """CSV只輸出指定欄位，沒有資料時仍有標題列"""
+    fields = ["project_no", "pi_name", "impact"]
+    data = b"".join(iter_export(AWARDS, "csv", fields=fields))
+    assert read_csv(data) == [as_csv(record, fields) for record in RECORDS]
+    assert b"".join(iter_export([], "csv", fields=fields)) == (
+        "project_no,pi_name,impact\r\n".encode("utf-8")
+    )
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_output_is_chunked(monkeypatch, fmt):
+    """每 EXPORT_BATCH_ROWS 筆輸出一段，只走訪一次輸入"""
+    monkeypatch.setattr(export, "EXPORT_BATCH_ROWS", 2)
+    chunks = list(iter_export(iter(AWARDS), fmt))
+    assert len(chunks) == 3
+    data = b"".join(chunks)
+    if fmt == "jsonl":
+        assert read_jsonl(data) == RECORDS
+    else:
+        assert read_csv(data) == [as_csv(record) for record in RECORDS]
+
+
+def test_parquet_row_groups(monkeypatch):
+    """Parquet每 EXPORT_ROW_GROUP_SIZE 筆一個 row group，讀回內容相同"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export, "EXPORT_ROW_GROUP_SIZE", 4)
+    chunks = list(iter_export(AWARDS, "parquet"))
+    assert len(chunks) == 3
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.num_row_groups == 2
+    assert parquet.read().to_pylist() == RECORDS
+
+
+def test_crawled_awards_preview():
+    """即時查詢匯出逐頁取得資料，預覽模式不抓取概述頁"""
+    with ReplayServer() as server:
+        client = make_client(server)
+        items = iter_crawled_awards(
+            client, years=[113], code="QS01", name="", include_impact=IMPACT_PREVIEW
+        )
+        assert read_jsonl(b"".join(iter_export(items, "jsonl"))) == RECORDS
+        assert server.requests["AwardDialog3.aspx"] == 0
+
+
+def test_api_export_from_store(tmp_path, monkeypatch):
+    """/api/export 從儲存分塊匯出，未啟用儲存或格式錯誤時回傳400"""
+    path = str(tmp_path / "awards.sqlite3")
+    AwardStore(path, 3600).upsert_awards(AWARDS, code="QS01")
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", path)
+    with TestClient(main.create_app(NSTCAwardClient())) as api:
+        r = api.get(
+            "/api/export",
+            params={"format": "csv", "years": "113", "fields": "project_no,pi_name"},
+        )
+        assert api.get("/api/export", params={"format": "xml"}).status_code == 400
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert read_csv(r.content) == sorted(
+        (
+            {"project_no": a.project_no, "pi_name": a.pi_name}
+            for a in AWARDS
+            if a.project_no
+        ),
+        key=lambda row: row["project_no"],
+    )
+
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    with TestClient(main.create_app(NSTCAwardClient())) as api:
+        assert api.get("/api/export").status_code == 400
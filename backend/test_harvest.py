@@ -0,0 +1,132 @@
+"""
+測試腳本：以重播伺服器驗證離線收錄（harvest.py）與 /api/awards 讀取收錄索引
+
+可以 pytest 執行
+"""
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import crawler
+import main
+from conftest import DETAIL_PAGE, LIST_PAGE, make_client
+from crawler import ListTruncatedError, NSTCAwardClient
+from harvest import Harvester, index_is_fresh
+from models import IMPACT_FULL
+from ratelimit import RateLimiter
+from replay_server import ReplayServer
+from store import AwardStore
+
+FIXTURES = Path(__file__).parent / "fixtures"
+FULL_TEXT_PREFIX = "本計畫發展可解釋之深度學習模型，協助臨床醫師判讀影像。"
+
+
+def test_harvest_keeps_preview_by_default(server, tmp_path):
+    """預設只收錄列表頁預覽，不抓取概述頁；完成後同一年度略過"""
+    store = AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+    harvester = Harvester(make_client(server), store)
+    summary = harvester.harvest(year=113, code="QS01")
+    assert summary["rows"] == 6 and summary["partitions"] == 1
+    assert server.requests[DETAIL_PAGE] == 0
+    assert index_is_fresh(store, year=113, code="QS01")
+    assert store.get_award("113WFA2110082").impact.endswith("…")
+    assert store.get_impact("113WFA2110082") is None
+
+    assert harvester.harvest(year=113, code="QS01")["skipped"]
+    assert server.requests[LIST_PAGE] == 1
+
+
+def test_harvest_full_impact(server, tmp_path):
+    """收錄全文時一併保存概述，之後的預覽收錄不覆寫全文"""
+    store = AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+    client = make_client(server)
+    Harvester(client, store, include_impact=IMPACT_FULL).harvest(
+        year=113, code="QS01"
+    )
+    assert server.requests[DETAIL_PAGE] == 4
+    assert store.get_impact("113WFA2110082").startswith(FULL_TEXT_PREFIX)
+
+    Harvester(client, store).harvest(year=113, code="QS01", refresh=True)
+    assert store.get_award("113WFA2110082").impact.startswith(FULL_TEXT_PREFIX)
+
+
+def test_find_awards_partial_name(server, tmp_path):
+    """收錄索引的主持人姓名與NSTC網站相同採部分相符"""
+    store = AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+    Harvester(make_client(server), store).harvest(year=113, code="QS01")
+    awards = store.find_awards(year=113, code="QS01", pi_name="文廷")
+    assert [a.project_no for a in awards] == ["113WFA2110082", "113WFA2110117"]
+    assert store.find_awards(year=113, code="QS01", pi_name="李文廷") == awards
+    assert [a.pi_name for a in store.scan_awards(year=113, pi_name="大明")] == [
+        "王大明"
+    ]
+
+
+def test_api_serves_harvest_with_full_impact(server, tmp_path, monkeypatch):
+    """/api/awards 以收錄索引回應部分姓名查詢，要求全文時逐筆補上概述全文"""
+    path = str(tmp_path / "awards.sqlite3")
+    client = make_client(server)
+    Harvester(client, AwardStore(path, 3600)).harvest(year=113, code="QS01")
+    list_requests = server.requests[LIST_PAGE]
+
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", path)
+    with TestClient(main.create_app(client)) as api:
+        preview = api.get(
+            "/api/awards",
+            params={"pi_name": "文廷", "years": "113", "include_impact": "preview"},
+        )
+        assert preview.status_code == 200
+        assert [a["impact"][-1] for a in preview.json()] == ["…", "…"]
+        assert server.requests[DETAIL_PAGE] == 0
+
+        full = api.get("/api/awards", params={"pi_name": "文廷", "years": "113"})
+        assert full.status_code == 200
+        awards = full.json()
+        assert [a["project_no"] for a in awards] == ["113WFA2110082", "113WFA2110117"]
+        assert all(a["impact"].startswith(FULL_TEXT_PREFIX) for a in awards)
+
+        detail = api.get("/api/awards/detail/113WFA2110082")
+        assert detail.json()["impact"].startswith(FULL_TEXT_PREFIX)
+
+    assert server.requests[LIST_PAGE] == list_requests
+    assert server.requests[DETAIL_PAGE] == 2
+
+
+class CappedClient(NSTCAwardClient):
+    """整個年度的查詢超過頁數上限，機構分區的查詢正常回應"""
+
+    def search_awards(self, *, organ="", **kwargs):
+        if not organ:
+            raise ListTruncatedError({"organ": organ}, 200)
+        return super().search_awards(organ=organ, **kwargs)
+
+
+def test_truncated_year_falls_back_to_organs(server, tmp_path):
+    """整個年度超過頁數上限時改以機構分區收錄"""
+    store = AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+    client = CappedClient(base=server.url, rate_limiter=RateLimiter(0), retries=0)
+    summary = Harvester(client, store, organs=["國立臺灣大學"]).harvest(
+        year=113, code="QS01"
+    )
+    assert summary["partitions"] == 1 and summary["rows"] == 6
+    assert store.harvested_partitions(year=113, code="QS01", since=0) == {
+        "國立臺灣大學": 6
+    }
+    assert index_is_fresh(store, year=113, code="QS01")
+
+
+def test_truncated_partition_is_not_completed(tmp_path, monkeypatch):
+    """沒有機構分區可用或分區仍超過上限時，不標記收錄完成"""
+    monkeypatch.setattr(crawler, "LIST_MAX_PAGES", 2)
+    store = AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+    with ReplayServer(FIXTURES / "paged") as server:
+        with pytest.raises(ValueError, match="列表頁超過 2 頁"):
+            Harvester(make_client(server), store).harvest(year=113, code="QS01")
+        with pytest.raises(ListTruncatedError):
+            Harvester(make_client(server), store, organs=["國立臺灣大學"]).harvest(
+                year=113, code="QS01"
+            )
+    assert not index_is_fresh(store, year=113, code="QS01")
+    assert store.harvested_partitions(year=113, code="QS01", since=0) == {}
@@ -0,0 +1,102 @@
+"""
+測試腳本：驗證同步與非同步客戶端補上概述全文，以及抓取失敗或沒有內容時保留
+列表頁的預覽文字
+
+可以 pytest 執行
+"""
+
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from async_crawler import AsyncNSTCAwardClient
+from conftest import DETAIL_PAGE, make_client
+from grid_parser import parse_award_grid
+from models import IMPACT_FULL, IMPACT_PREVIEW
+from replay_server import ReplayServer
+
+FIXTURES = Path(__file__).parent / "fixtures"
+ROWS = parse_award_grid((FIXTURES / "award_list.html").read_text(encoding="utf-8"))
+PREVIEWS = [row.item.impact for row in ROWS]
+WITH_DETAIL = [row.item.project_no for row in ROWS if row.has_impact_detail]
+FULL_TEXT_PREFIX = "本計畫發展可解釋之深度學習模型，協助臨床醫師判讀影像。"
+QUERY = dict(year=113, code="QS01", name="李文廷")
+
+
+def search(client, mode, include_impact=IMPACT_FULL):
+    """以同步（sync）或非同步（async）客戶端查詢"""
+    if mode == "sync":
+        return client.search_awards(**QUERY, include_impact=include_impact)
+
+    async def run():
+        async_client = AsyncNSTCAwardClient(client)
+        try:
+            return await async_client.search_awards(
+                **QUERY, include_impact=include_impact
+            )
+        finally:
+            await async_client.aclose()
+
+    return asyncio.run(run())
+
+
+def replay_fixtures(tmp_path, detail_html=None):
+    """只有列表頁的fixture目錄；提供 detail_html 時另存為概述頁"""
+    shutil.copy(FIXTURES / "award_list.html", tmp_path)
+    if detail_html is not None:
+        (tmp_path / "award_detail.html").write_text(detail_html, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_full_impact_attached(server, mode):
+    """有概述連結的獎項補上全文，每個計畫只抓取一次，沒有連結的保留預覽"""
+    awards = search(make_client(server), mode)
+    assert server.requests[DETAIL_PAGE] == len(WITH_DETAIL)
+    for award, preview in zip(awards, PREVIEWS):
+        if award.project_no in WITH_DETAIL:
+            assert award.impact.startswith(FULL_TEXT_PREFIX)
+        else:
+            assert award.impact == preview
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_preview_mode_skips_details(server, mode):
+    """preview 模式只回傳列表頁預覽，不抓取概述頁"""
+    awards = search(make_client(server), mode, IMPACT_PREVIEW)
+    assert [award.impact for award in awards] == PREVIEWS
+    assert server.requests[DETAIL_PAGE] == 0
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize(
+    "detail_html", [None, "<html><body><div> </div></body></html>"]
+)
+def test_failed_or_empty_detail_keeps_preview(tmp_path, mode, detail_html):
+    """概述頁抓取失敗（404）或沒有內容時保留列表頁的預覽文字"""
+    with ReplayServer(replay_fixtures(tmp_path, detail_html)) as server:
+        awards = search(make_client(server), mode)
+        assert server.requests[DETAIL_PAGE] == len(WITH_DETAIL)
+    assert [award.impact for award in awards] == PREVIEWS
+
+
+def test_partial_failure_keeps_other_details(server, monkeypatch):
+    """單一計畫抓取失敗只影響該筆，其他計畫仍補上全文"""
+    client = make_client(server)
+    failing = WITH_DETAIL[0]
+    fetch = client.fetch_impact_detail
+
+    def flaky(project_no):
+        if project_no == failing:
+            raise RuntimeError("連線逾時")
+        return fetch(project_no)
+
+    monkeypatch.setattr(client, "fetch_impact_detail", flaky)
+    awards = search(client, "sync")
+    for award, preview in zip(awards, PREVIEWS):
+        if award.project_no == failing or award.project_no not in WITH_DETAIL:
+            assert award.impact == preview
+        else:
+            assert award.impact.startswith(FULL_TEXT_PREFIX)
@@ -0,0 +1,127 @@
+"""
+測試腳本：以重播伺服器驗證同步與非同步客戶端依ASP.NET分頁列抓取所有列表頁
+
+fixtures/paged 為三頁的查詢結果（award_list.html、award_list_p{N}.html），
+每頁兩筆資料；可以 pytest 執行
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+import async_crawler
+import crawler
+from async_crawler import AsyncNSTCAwardClient
+from conftest import LIST_PAGE, make_client
+from crawler import ListTruncatedError
+from grid_parser import parse_award_page
+from replay_server import ReplayServer
+
+PAGED_FIXTURES = Path(__file__).parent / "fixtures" / "paged"
+PAGE_FILES = ["award_list.html", "award_list_p2.html", "award_list_p3.html"]
+
+
+def expected_project_nos():
+    """依頁碼順序，各頁fixture的計畫編號"""
+    return [
+        row.item.project_no
+        for name in PAGE_FILES
+        for row in parse_award_page(
+            (PAGED_FIXTURES / name).read_text(encoding="utf-8")
+        ).rows
+    ]
+
+
+@pytest.fixture
+def server():
+    """取代 conftest 的 server，重播分頁的查詢結果"""
+    with ReplayServer(PAGED_FIXTURES) as server:
+        yield server
+
+
+def test_fixtures_pager():
+    """每頁都有分頁列，最後一頁沒有後續頁碼"""
+    pagers = [
+        parse_award_page((PAGED_FIXTURES / name).read_text(encoding="utf-8")).pager
+        for name in PAGE_FILES
+    ]
+    assert [pager.current for pager in pagers] == [1, 2, 3]
+    assert sorted(pagers[0].pages) == [2, 3]
+    assert max(pagers[-1].pages) < pagers[-1].current
+
+
+@pytest.mark.parametrize("concurrency", [4, 1])
+def test_sync_client_follows_pages(server, monkeypatch, concurrency):
+    """同步客戶端並行或逐頁換頁，取得所有資料且最後一頁後不再換頁"""
+    monkeypatch.setattr(crawler, "LIST_PAGE_CONCURRENCY", concurrency)
+    client = make_client(server)
+    rows = client.search_award_rows(year=113, code="QS01", name="")
+    assert [row.item.project_no for row in rows] == expected_project_nos()
+    assert len(rows) == 6
+    # 第一頁GET加上兩次換頁回傳
+    assert server.requests[LIST_PAGE] == 3
+
+
+def test_sync_iter_award_pages(server):
+    """逐頁產出各頁的資料"""
+    client = make_client(server)
+    pages = list(client.iter_award_pages(year=113, code="QS01", name=""))
+    assert [len(page) for page in pages] == [2, 2, 2]
+    assert server.requests[LIST_PAGE] == 3
+
+
+@pytest.mark.parametrize("concurrency", [4, 1])
+def test_async_client_follows_pages(server, concurrency):
+    """非同步客戶端並行或逐頁換頁，取得所有資料且最後一頁後不再換頁"""
+
+    async def run():
+        client = AsyncNSTCAwardClient(make_client(server), page_concurrency=concurrency)
+        try:
+            rows = await client.search_award_rows(year=113, code="QS01", name="")
+            pages = [
+                page
+                async for page in client.iter_award_pages(
+                    year=113, code="QS01", name=""
+                )
+            ]
+        finally:
+            await client.aclose()
+        return rows, pages
+
+    rows, pages = asyncio.run(run())
+    assert [row.item.project_no for row in rows] == expected_project_nos()
+    assert [len(page) for page in pages] == [2, 2, 2]
+    # 兩次查詢各為第一頁GET加上兩次換頁回傳
+    assert server.requests[LIST_PAGE] == 6
+
+
+def test_sync_page_cap_is_not_cached(server, monkeypatch):
+    """超過頁數上限時拋出 ListTruncatedError，部分結果不寫入列表快取"""
+    monkeypatch.setattr(crawler, "LIST_MAX_PAGES", 2)
+    client = make_client(server)
+    with pytest.raises(ListTruncatedError):
+        client.search_award_rows(year=113, code="QS01", name="")
+    assert len(client.list_cache) == 0
+
+    pages = []
+    with pytest.raises(ListTruncatedError):
+        for page in client.iter_award_pages(year=113, code="QS01", name=""):
+            pages.append(page)
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_async_page_cap_is_not_cached(server, monkeypatch):
+    """非同步客戶端同樣拋出 ListTruncatedError 且不快取部分結果"""
+    monkeypatch.setattr(async_crawler, "LIST_MAX_PAGES", 2)
+
+    async def run():
+        client = AsyncNSTCAwardClient(make_client(server))
+        try:
+            with pytest.raises(ListTruncatedError):
+                await client.search_award_rows(year=113, code="QS01", name="")
+        finally:
+            await client.aclose()
+        return client
+
+    assert len(asyncio.run(run()).list_cache) == 0
@@ -0,0 +1,111 @@
+"""
+測試腳本：驗證條件式請求（ETag/304）與解析結果記憶（crawler._fetch_parsed）
+
+以計數的解析階段確認內容未變時不重新解析；可以 pytest 執行
+"""
+
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from async_crawler import AsyncNSTCAwardClient
+from conftest import DETAIL_PAGE, make_client
+from crawler import NSTCAwardClient, response_encoding
+from parse_pool import ParseStage
+from replay_server import ReplayServer
+
+PROJECT_NO = "113WFA2110082"
+
+
+class CountingParseStage(ParseStage):
+    """記錄解析次數的解析階段"""
+
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, parse, content, encoding):
+        self.runs += 1
+        return super().run(parse, content, encoding)
+
+
+@pytest.fixture
+def stage():
+    return CountingParseStage()
+
+
+def test_not_modified_returns_memoized_parse(stage):
+    """收到304時直接沿用記憶的解析結果，不下載也不重新解析"""
+    with ReplayServer(etag=True) as server:
+        client = make_client(server, parse_stage=stage)
+        first = client._fetch_impact_detail(PROJECT_NO)
+        assert client.validators.stats()["size"] == 1
+
+        assert client._fetch_impact_detail(PROJECT_NO) is first
+        assert server.requests["not_modified"] == 1
+        assert server.requests[DETAIL_PAGE] == 2
+        assert stage.runs == 1
+
+
+def test_not_modified_without_memo_refetches(stage):
+    """304但解析結果已不在記憶中時改送一般請求並重新解析"""
+    with ReplayServer(etag=True) as server:
+        client = make_client(server, parse_stage=stage)
+        first = client._fetch_impact_detail(PROJECT_NO)
+        client.parse_memo.clear()
+
+        assert client._fetch_impact_detail(PROJECT_NO) == first
+        assert server.requests["not_modified"] == 1
+        assert server.requests[DETAIL_PAGE] == 3
+        assert stage.runs == 2
+
+
+def test_unchanged_body_reuses_parse(stage):
+    """沒有ETag時仍重新下載，但內容相同即沿用解析結果"""
+    with ReplayServer() as server:
+        client = make_client(server, parse_stage=stage)
+        first = client._fetch_impact_detail(PROJECT_NO)
+        assert client._fetch_impact_detail(PROJECT_NO) is first
+        assert server.requests[DETAIL_PAGE] == 2
+        assert server.requests["not_modified"] == 0
+        assert stage.runs == 1
+        assert client.stats()["parse_memo"]["hits"] == 1
+
+
+def sync_response(content, content_type):
+    r = requests.Response()
+    r.status_code = 200
+    r.headers["Content-Type"] = content_type
+    r._content = content
+    return r
+
+
+def test_response_encoding_from_content_type():
+    """只採用 Content-Type 宣告的 charset，沒有宣告時回傳None"""
+    assert response_encoding({"Content-Type": "text/html"}) is None
+    assert response_encoding({"Content-Type": "text/html; charset=UTF-8"}) == "utf-8"
+    assert response_encoding({"Content-Type": 'text/html; Charset="Big5"'}) == "big5"
+    assert response_encoding({}) is None
+
+
+def test_sync_and_async_decode_alike(stage):
+    """沒有宣告 charset 時兩個客戶端解出相同文字，不同編碼各自記憶"""
+    client = NSTCAwardClient(parse_stage=stage)
+    async_client = AsyncNSTCAwardClient(client)
+    content = "計畫概述".encode("utf-8")
+    parse = str
+
+    def async_parse(r):
+        return asyncio.run(async_client._parse_response(r, "detail", parse))
+
+    plain = sync_response(content, "text/html")
+    assert client._parse_response(plain, "detail", parse) == "計畫概述"
+    assert stage.runs == 1
+    r = httpx.Response(200, headers={"Content-Type": "text/html"}, content=content)
+    assert async_parse(r) == "計畫概述"
+    assert stage.runs == 1
+
+    big5 = sync_response(content, "text/html; charset=big5")
+    assert client._parse_response(big5, "detail", parse) != "計畫概述"
+    assert stage.runs == 2
@@ -0,0 +1,146 @@
+"""
+測試腳本：驗證解析階段（parse_pool.py）在行程池無法使用時改在執行緒中解析
+
+以替身取代 ProcessPoolExecutor 模擬無法建立、無法啟動或異常結束的行程池；
+可以 pytest 執行
+"""
+
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+import parse_pool
+from detail_parser import parse_impact_detail
+from parse_pool import ParseStage, ProcessParseStage, parse_content
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CONTENT = (FIXTURES / "award_detail.html").read_bytes()
+EXPECTED = parse_content(parse_impact_detail, CONTENT, "utf-8")
+
+
+class FakePool:
+    """記錄建立次數的行程池替身，submit 依 behavior 回傳或拋出"""
+
+    created = 0
+
+    def __init__(self, behavior):
+        self.behavior = behavior
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        if isinstance(self.behavior, BaseException):
+            raise self.behavior
+        future = Future()
+        if self.behavior == "broken":
+            future.set_exception(BrokenProcessPool("子行程異常結束"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """以替身取代行程池；behaviors 依序決定每次建立的行程池行為"""
+    created = []
+    behaviors = []
+
+    def factory(max_workers, mp_context):
+        behavior = behaviors.pop(0) if behaviors else "ok"
+        if behavior == "unavailable":
+            raise OSError("沒有 /dev/shm")
+        pool = FakePool(behavior)
+        created.append(pool)
+        return pool
+
+    monkeypatch.setattr(parse_pool, "ProcessPoolExecutor", factory)
+    monkeypatch.setattr(parse_pool, "_mp_context", lambda: None)
+    return created, behaviors
+
+
+def test_thread_stage_without_processes(monkeypatch):
+    """PARSE_PROCESSES 為0或1時在呼叫端的執行緒中解析"""
+    for processes in (0, 1):
+        monkeypatch.setattr(parse_pool, "PARSE_PROCESSES", processes)
+        parse_pool.default_parse_stage.cache_clear()
+        try:
+            stage = parse_pool.default_parse_stage()
+        finally:
+            parse_pool.default_parse_stage.cache_clear()
+        assert type(stage) is ParseStage
+        assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert type(parse_pool.offline_parse_stage(1)) is ParseStage
+
+
+def test_unavailable_pool_parses_in_thread(pools):
+    """無法建立行程池時改在執行緒中解析，之後不再嘗試建立"""
+    created, behaviors = pools
+    behaviors.append("unavailable")
+    stage = ProcessParseStage(2)
+    for _ in range(2):
+        assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert created == [] and not behaviors
+    assert stage.stats() == {
+        "mode": "thread",
+        "workers": 2,
+        "tasks": 0,
+        "fallbacks": 0,
+    }
+
+
+def test_broken_pool_is_replaced(pools):
+    """行程異常結束時這次在執行緒中解析，下次重新建立行程池"""
+    created, behaviors = pools
+    behaviors.append("broken")
+    stage = ProcessParseStage(2)
+    assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert [pool.behavior for pool in created] == ["broken", "ok"]
+    assert created[0].shutdowns == 1
+    stats = stage.stats()
+    assert (stats["mode"], stats["tasks"], stats["fallbacks"]) == ("process", 2, 1)
+
+
+def test_broken_pool_async(pools):
+    """非同步解析遇到行程異常結束時同樣改在執行緒中解析"""
+    created, behaviors = pools
+    behaviors.append("broken")
+    stage = ProcessParseStage(2)
+    result = asyncio.run(stage.run_async(parse_impact_detail, CONTENT, "utf-8"))
+    assert result == EXPECTED
+    assert stage.stats()["fallbacks"] == 1 and created[0].shutdowns == 1
+
+
+@pytest.mark.parametrize(
+    "error, mode",
+    [
+        (BrokenProcessPool("行程池已失效"), "process"),
+        (RuntimeError("無法啟動"), "thread"),
+    ],
+)
+def test_submit_failure(pools, error, mode):
+    """送出時行程池已失效則重新建立；無法啟動子行程則之後都在執行緒中解析"""
+    created, behaviors = pools
+    behaviors.append(error)
+    stage = ProcessParseStage(2)
+    assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert stage.run(parse_impact_detail, CONTENT, "utf-8") == EXPECTED
+    assert len(created) == (2 if mode == "process" else 1)
+    stats = stage.stats()
+    # 停用行程池後直接在執行緒中解析，不再計入 fallbacks
+    assert (stats["mode"], stats["fallbacks"]) == (mode, 1)
+
+
+def test_process_pool_matches_thread():
+    """實際的行程池解析結果與在執行緒中解析相同"""
+    stage = ProcessParseStage(1)
+    try:
+        result = stage.run(parse_impact_detail, CONTENT, "utf-8")
+    finally:
+        stage.shutdown()
+    assert result == EXPECTED
@@ -0,0 +1,149 @@
+"""
+測試腳本：驗證列表頁解析器與舊版BeautifulSoup解析結果一致，並量測解析速度
+
+可直接執行 python test_parser.py，或以 pytest 執行
+"""
+
+import json
+import re
+import time
+from datetime import date
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from grid_parser import parse_award_grid
+from models import AwardItem
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+LIST_HTML = (FIXTURES / "award_list.html").read_text(encoding="utf-8")
+EXPECTED_JSON = FIXTURES / "award_list.expected.json"
+# 民國年執行期間、不含「元」或含小數的金額與無法解析的欄位
+ROC_HTML = (FIXTURES / "award_list_roc.html").read_text(encoding="utf-8")
+
+
+def legacy_parse(text):
+    """舊版 NSTCAwardClient.search_awards 的列表解析邏輯（不含概述全文抓取）"""
+    soup = BeautifulSoup(text, "lxml")
+    grid = soup.select_one("#wUctlAwardQueryPage_grdResult")
+    if not grid:
+        return []
+
+    rows = []
+    for tr in grid.select("tr.Grid_Row"):
+        tds = tr.find_all("td", recursive=False)
+        if len(tds) < 4:
+            continue
+        content_td = tds[3]
+
+        def span_by_id_contains(key):
+            sp = content_td.find("span", id=re.compile(re.escape(key)))
+            return sp.get_text(strip=True) if sp else ""
+
+        project_no = None
+        for node in content_td.find_all(["a", "input"]):
+            m = re.search(
+                r"(?:AwardDialog3\.aspx\?no=|AwardDialog\.aspx\?year=\d+&sys=[^&]+&no=)([A-Za-z0-9]+)",
+                node.get("onclick") or "",
+            )
+            if m:
+                project_no = m.group(1)
+                break
+        has_link = content_td.find("a", id=re.compile(r"lnkZIMPACT_S_")) is not None
+
+        item = AwardItem(
+            award_year=tds[0].get_text(strip=True),
+            pi_name=tds[1].get_text(strip=True),
+            organ=tds[2].get_text(strip=True),
+            plan_name=span_by_id_contains("lblAWARD_PLAN_CHI_DESCc_"),
+            period=span_by_id_contains("lblAWARD_ST_ENDc_"),
+            total_amount=span_by_id_contains("lblAWARD_TOT_AUD_AMTc_"),
+            impact=span_by_id_contains("lblIMPACT_Sc_"),
+            keywords_zh=span_by_id_contains("lblKEYS_CHIc_"),
+            keywords_en=span_by_id_contains("lblKEYS_ENGc_"),
+            project_no=project_no,
+        )
+        rows.append((item, bool(project_no) and has_link))
+    return rows
+
+
+def as_records(rows):
+    return [
+        {**item.to_dict(), "has_impact_detail": has_detail}
+        for item, has_detail in rows
+    ]
+
+
+def test_parity_with_legacy_parser():
+    """新解析器與舊版解析結果一致"""
+    assert as_records(parse_award_grid(LIST_HTML)) == as_records(
+        legacy_parse(LIST_HTML)
+    )
+
+
+def test_matches_saved_output():
+    """解析結果與保存的預期輸出一致"""
+    expected = json.loads(EXPECTED_JSON.read_text(encoding="utf-8"))
+    assert as_records(parse_award_grid(LIST_HTML)) == expected
+
+
+def test_missing_grid():
+    """沒有結果表格時回傳空列表"""
+    assert parse_award_grid("<html><body><p>查無資料</p></body></html>") == []
+
+
+def test_roc_fixture_parity_with_legacy_parser():
+    """民國年期間與各種金額格式的解析結果與舊版一致，原始文字不變"""
+    records = as_records(parse_award_grid(ROC_HTML))
+    assert records == as_records(legacy_parse(ROC_HTML))
+    assert [(r["period"], r["total_amount"]) for r in records[:4]] == [
+        ("113/08/01~114/07/31", "990,000"),
+        ("113年08月01日~116年07月31日", "3,150,000元"),
+        ("2024/08/01~2025/07/31", "1,234.5元"),
+        ("核定後公告", ""),
+    ]
+
+
+def test_roc_fixture_parsed_fields():
+    """解析出的金額與起迄日只供排序與統計，並可由 to_dict 的輸出還原"""
+    items = [row.item for row in parse_award_grid(ROC_HTML)]
+    assert [item.amount for item in items[:4]] == [990000, 3150000, 1234, None]
+    assert (items[0].period_start, items[0].period_end) == (
+        date(2024, 8, 1),
+        date(2025, 7, 31),
+    )
+    assert items[1].period_end == date(2027, 7, 31)
+    assert (items[3].period_start, items[3].period_end) == (None, None)
+    for item in items:
+        assert AwardItem.from_dict(item.to_dict()) == item
+
+
+def measure(parse, repeat=200):
+    """回傳每秒解析列數"""
+    rows = len(parse(LIST_HTML))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(LIST_HTML)
+    elapsed = time.perf_counter() - start
+    return rows * repeat / elapsed
+
+
+def main():
+    """運行所有測試並輸出解析速度"""
+    test_parity_with_legacy_parser()
+    test_matches_saved_output()
+    test_missing_grid()
+    test_roc_fixture_parity_with_legacy_parser()
+    test_roc_fixture_parsed_fields()
+    print("✅ 解析結果一致")
+
+    legacy = measure(legacy_parse)
+    current = measure(parse_award_grid)
+    print(f"舊版解析: {legacy:,.0f} rows/sec")
+    print(f"新版解析: {current:,.0f} rows/sec")
+    print(f"加速倍數: {current / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
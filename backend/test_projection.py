@@ -0,0 +1,95 @@
+"""
+測試腳本：驗證 /api/awards 的欄位選取（main.parse_projection、award_response）
+與未載入概述全文時的 impact_detail_url
+
+可以 pytest 執行
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from conftest import DETAIL_PAGE, make_award, make_client
+from main import award_response, parse_projection
+from models import IMPACT_FULL, IMPACT_NONE, IMPACT_PREVIEW, RECORD_FIELDS
+
+AWARD = make_award("113A001", impact="預覽…", total_amount="1,000,000元")
+DETAIL_URL = "/api/awards/detail/113A001"
+
+
+@pytest.mark.parametrize(
+    "fields, include_impact, expected",
+    [
+        (None, None, (None, IMPACT_FULL)),
+        ("impact,pi_name", None, (["impact", "pi_name"], IMPACT_FULL)),
+        ("pi_name, plan_name,pi_name", None, (["pi_name", "plan_name"], IMPACT_NONE)),
+        ("pi_name", IMPACT_PREVIEW, (["pi_name"], IMPACT_PREVIEW)),
+        (None, IMPACT_NONE, (None, IMPACT_NONE)),
+    ],
+)
+def test_parse_projection(fields, include_impact, expected):
+    """去除重複與空白並保留順序；未選取 impact 時預設不抓取概述全文"""
+    assert parse_projection(fields, include_impact) == expected
+
+
+@pytest.mark.parametrize(
+    "fields, include_impact", [("pi_name,budget", None), (" , ", None), (None, "all")]
+)
+def test_parse_projection_rejects(fields, include_impact):
+    """不支援的欄位、空的欄位列表與不支援的概述載入方式回傳400"""
+    with pytest.raises(HTTPException) as e:
+        parse_projection(fields, include_impact)
+    assert e.value.status_code == 400
+
+
+def test_award_response_impact_modes():
+    """full 回傳全部欄位；preview 保留預覽、none 去除概述，兩者都附上全文網址"""
+    assert award_response(AWARD, None, IMPACT_FULL) == AWARD.to_response()
+    assert list(award_response(AWARD, None, IMPACT_FULL)) == list(RECORD_FIELDS)
+
+    preview = award_response(AWARD, None, IMPACT_PREVIEW)
+    assert preview["impact"] == "預覽…"
+    assert preview["impact_detail_url"] == DETAIL_URL
+
+    none = award_response(AWARD, None, IMPACT_NONE)
+    assert "impact" not in none and none["impact_detail_url"] == DETAIL_URL
+
+
+def test_award_response_fields():
+    """只回傳選取的欄位並依選取順序；沒有計畫編號時不附全文網址"""
+    data = award_response(AWARD, ["total_amount", "pi_name"], IMPACT_NONE)
+    assert data == {
+        "total_amount": "1,000,000元",
+        "pi_name": "李文廷",
+        "impact_detail_url": DETAIL_URL,
+    }
+    assert award_response(AWARD, ["impact"], IMPACT_NONE) == {
+        "impact_detail_url": DETAIL_URL
+    }
+    assert award_response(make_award(None), ["pi_name"], IMPACT_NONE) == {
+        "pi_name": "李文廷"
+    }
+
+
+def test_api_projection_skips_details(server, monkeypatch):
+    """未選取概述時不抓取概述頁，之後可由 impact_detail_url 取得全文"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    with TestClient(main.create_app(make_client(server))) as api:
+        params = {"pi_name": "李文廷", "years": "113"}
+        r = api.get("/api/awards", params={**params, "fields": "project_no,plan_name"})
+        assert r.status_code == 200
+        assert server.requests[DETAIL_PAGE] == 0
+        awards = r.json()
+        assert all(
+            set(a) - {"impact_detail_url"} == {"project_no", "plan_name"}
+            for a in awards
+        )
+
+        url = next(a["impact_detail_url"] for a in awards if a.get("impact_detail_url"))
+        detail = api.get(url).json()
+        assert server.requests[DETAIL_PAGE] == 1
+        assert detail["impact"] and url.endswith(detail["project_no"])
+
+        r = api.get("/api/awards", params={**params, "fields": "budget"})
+        assert r.status_code == 400
@@ -0,0 +1,85 @@
+"""
+測試腳本：驗證每主機令牌桶限速器（ratelimit.py）的突發請求、等待時間與請求預算
+
+以手動推進的時鐘計算等待時間，不實際等待；可以 pytest 執行
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import ratelimit
+from ratelimit import RateLimiter, acquire_budget, budget
+
+URL = "http://example.org/AwardMultiQuery.aspx"
+OTHER_URL = "http://example.com/AwardMultiQuery.aspx"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """以手動推進的時鐘取代限速器使用的 time（只替換 ratelimit 模組），sleep 推進時鐘"""
+    now = [1000.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(
+        ratelimit, "time", SimpleNamespace(monotonic=lambda: now[0], sleep=sleep)
+    )
+    return SimpleNamespace(now=now, sleeps=sleeps)
+
+
+def test_burst_then_paced(clock):
+    """累積的 burst 個令牌用完後，每個請求依序多等 1/rate 秒"""
+    limiter = RateLimiter(2, burst=3)
+    assert [limiter.reserve(URL) for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    stats = limiter.stats()
+    assert (stats["waits"], stats["wait_seconds"]) == (2, 1.5)
+
+
+def test_tokens_refill_up_to_burst(clock):
+    """閒置期間依 rate 補充令牌，最多累積 burst 個"""
+    limiter = RateLimiter(2, burst=2)
+    for _ in range(2):
+        limiter.reserve(URL)
+    clock.now[0] += 0.5
+    assert limiter.reserve(URL) == 0
+    assert limiter.reserve(URL) == 0.5
+
+    clock.now[0] += 60
+    assert [limiter.reserve(URL) for _ in range(3)] == [0, 0, 0.5]
+
+
+def test_hosts_are_independent(clock):
+    """不同主機各自計算令牌"""
+    limiter = RateLimiter(1)
+    assert limiter.reserve(URL) == 0
+    assert limiter.reserve(OTHER_URL) == 0
+    assert limiter.reserve(URL) == 1.0
+
+
+def test_acquire_sleeps_and_unlimited(clock):
+    """acquire 等待到輪到的時段；rate <= 0 時不限速"""
+    limiter = RateLimiter(4)
+    assert limiter.acquire(URL) == 0
+    assert limiter.acquire(URL) == 0.25
+    assert clock.sleeps == [0.25]
+    # 等待期間補充的令牌已由預扣抵銷，下一個請求再等一個間隔
+    assert limiter.acquire(URL) == 0.25
+
+    unlimited = RateLimiter(0)
+    assert all(unlimited.acquire(URL) == 0 for _ in range(100))
+    assert unlimited.stats()["waits"] == 0
+
+
+def test_budget_applies_only_inside_block(clock):
+    """請求預算只在 budget 區塊內生效"""
+    limiter = RateLimiter(1)
+    assert acquire_budget(URL) == 0
+    with budget(limiter):
+        assert acquire_budget(URL) == 0
+        assert acquire_budget(URL) == 1.0
+    assert acquire_budget(URL) == 0
+    assert limiter.stats()["waits"] == 1
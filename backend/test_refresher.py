@@ -0,0 +1,92 @@
+"""
+測試腳本：驗證背景重新整理與預熱（refresher.py），以及過期快取先回傳再於背景重新查詢重播伺服器
+
+可以 pytest 執行
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import LIST_PAGE, make_client
+from refresher import BackgroundRefresher, Prewarmer, in_background
+from replay_server import ReplayServer
+
+QUERY = dict(year=113, code="QS01", name="", include_impact="preview")
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() >= deadline:
+            raise AssertionError("等待逾時")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def refresher():
+    return BackgroundRefresher(workers=2, rate=0, burst=1, max_pending=2)
+
+
+def test_submit_dedupes_and_drops(refresher):
+    """相同鍵值不重複排入，排隊數達上限時捨棄新的工作"""
+    release = threading.Event()
+    assert refresher.submit("a", release.wait, 5)
+    assert not refresher.submit("a", release.wait, 5)
+    assert refresher.submit("b", release.wait, 5)
+    assert not refresher.submit("c", release.wait, 5)
+    release.set()
+    wait_for(lambda: refresher.stats()["pending"] == 0)
+    stats = refresher.stats()
+    assert (stats["scheduled"], stats["ok"]) == (2, 2)
+    assert (stats["deduped"], stats["dropped"]) == (1, 1)
+
+
+def test_run_marks_background_and_counts_errors(refresher):
+    """背景工作中 in_background() 為真，例外記為 error 而不拋出"""
+    seen = []
+    assert refresher.run("a", lambda: seen.append(in_background()))
+    assert seen == [True] and not in_background()
+    assert not refresher.run("b", lambda: int("x"))
+    assert refresher.stats()["error"] == 1 and refresher.stats()["pending"] == 0
+
+
+def test_prewarmer_window_and_timeout(refresher):
+    """離峰時段可跨午夜；逾時後不再開始新的預熱工作"""
+    calls = []
+    prewarmer = Prewarmer(
+        refresher,
+        lambda year, name: calls.append((year, name)),
+        names=["李文廷", " ", "王大明", "李文廷"],
+        years=[114, 113],
+        hours=(23, 5),
+        utc_offset=8,
+    )
+    assert prewarmer.names == ["李文廷", "王大明"]
+    hour = 3600
+    assert prewarmer.in_window(15 * hour)  # 台灣時間 23 時
+    assert prewarmer.in_window(20 * hour)  # 台灣時間 4 時
+    assert not prewarmer.in_window(21 * hour)  # 台灣時間 5 時
+
+    summary = prewarmer.run()
+    assert calls == [(114, "李文廷"), (114, "王大明"), (113, "李文廷"), (113, "王大明")]
+    assert (summary["refreshed"], summary["skipped"]) == (4, 0)
+    assert prewarmer.run(timeout=0)["skipped"] == 4
+    assert len(calls) == 4
+
+
+def test_stale_served_then_refreshed():
+    """過期的列表頁先回傳，背景重新查詢後更新快取"""
+    refresher = BackgroundRefresher(workers=1, rate=0, burst=1)
+    with ReplayServer() as server:
+        client = make_client(server, cache_ttl=0.05, refresher=refresher)
+        first = client.search_awards(**QUERY)
+        assert server.requests[LIST_PAGE] == 1
+        time.sleep(0.1)
+
+        assert client.search_awards(**QUERY) == first
+        wait_for(lambda: refresher.stats().get("ok", 0) == 1)
+        assert server.requests[LIST_PAGE] == 2
+        assert refresher.stats()["scheduled"] == 1
+        assert client.stats()["list"]["stale_hits"] >= 1
@@ -0,0 +1,50 @@
+"""
+測試腳本：驗證程序內獎項資料庫（repository.py）的索引、淘汰與概述全文標記
+
+可以 pytest 執行
+"""
+
+from conftest import make_award
+from repository import AwardRepository
+
+
+def test_add_with_full_impact_is_served_by_get_impact():
+    """以全文寫入的獎項可直接由 get_impact 讀取"""
+    repo = AwardRepository(10)
+    repo.add(make_award("113A001", impact="計畫概述全文"))
+    assert repo.get_impact("113A001") == "計畫概述全文"
+
+
+def test_preview_impact_is_not_full():
+    """列表頁預覽不視為全文，也不覆寫已保存的全文"""
+    repo = AwardRepository(10)
+    repo.add(make_award("113A001", impact="預覽"), preview_impact=True)
+    assert repo.get_impact("113A001") is None
+
+    repo.set_impact("113A001", "計畫概述全文")
+    repo.add(make_award("113A001", impact="預覽"), preview_impact=True)
+    assert repo.get_impact("113A001") == "計畫概述全文"
+
+
+def test_full_impact_replaced_by_empty_impact():
+    """以空白概述覆寫後不再回傳舊的全文"""
+    repo = AwardRepository(10)
+    repo.add(make_award("113A001", impact="計畫概述全文"))
+    repo.add(make_award("113A001"))
+    assert repo.get_impact("113A001") is None
+
+
+def test_find_and_eviction():
+    """依索引欄位查詢，超過上限時淘汰最久未使用的獎項與其全文標記"""
+    repo = AwardRepository(2)
+    repo.add(make_award("112A001", impact="a", award_year="112"))
+    repo.add(make_award("113A002", impact="b", pi_name="李大華"))
+    assert [a.project_no for a in repo.find(pi_name="李文廷")] == ["112A001"]
+    assert [a.project_no for a in repo.find(year_from=113)] == ["113A002"]
+
+    repo.get("112A001")
+    repo.add(make_award("113A003", impact="c"))
+    assert repo.get("113A002") is None
+    assert repo.get_impact("113A002") is None
+    assert repo.stats()["full_impacts"] == 2
+    assert repo.evictions == 1
@@ -0,0 +1,219 @@
+"""
+測試腳本：驗證上游暫時性錯誤的退避重試與斷路器（resilience.py）
+
+連線失敗以沒有監聽的本機連接埠模擬，恢復後改連重播伺服器；可以 pytest 執行
+"""
+
+import asyncio
+import socket
+from types import SimpleNamespace
+from urllib.parse import urljoin
+
+import httpx
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+import main
+import resilience
+from async_crawler import AsyncNSTCAwardClient
+from conftest import make_client
+from crawler import IMPACT_DETAIL_PAGE, NSTCAwardClient
+from ratelimit import RateLimiter
+from replay_server import ReplayServer
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    UpstreamHealth,
+    is_retryable,
+)
+
+PROJECT_NO = "113WFA2110082"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """以手動推進的時鐘取代斷路器使用的 time.monotonic（只替換 resilience 模組）"""
+    now = [1000.0]
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def unused_url():
+    """回傳沒有程序監聽的本機網址，連線會立即被拒絕"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/"
+
+
+def failing_client(retries=2, failure_threshold=3):
+    """連線一定失敗、不退避也不節流的客戶端"""
+    client = NSTCAwardClient(
+        base=unused_url(), rate_limiter=RateLimiter(0), retries=retries
+    )
+    client.retry = RetryPolicy(retries, 0, 0)
+    client.breaker = CircuitBreaker(failure_threshold, recovery_timeout=30)
+    client.health = UpstreamHealth(slow_threshold=1, max_delay=0)
+    return client
+
+
+def test_retry_delays_are_capped():
+    """退避時間為隨機抖動，上限每次加倍且不超過 backoff_max"""
+    delays = list(RetryPolicy(4, 1, 3).delays())
+    assert len(delays) == 4
+    assert all(0 <= d <= cap for d, cap in zip(delays, (1, 2, 3, 3)))
+    assert list(RetryPolicy(0, 1, 3).delays()) == []
+
+
+def test_is_retryable():
+    """連線失敗、逾時與 429/5xx 可重試，4xx 不重試"""
+
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_retryable(requests.ConnectionError())
+    assert is_retryable(requests.Timeout())
+    assert is_retryable(http_error(503)) and is_retryable(http_error(429))
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(ValueError())
+
+
+def test_breaker_states(clock):
+    """連續失敗達門檻後開啟，逾時後只放行一個試探請求"""
+    breaker = CircuitBreaker(2, recovery_timeout=30)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["opened"] == 2 and breaker.stats()["rejected"] == 2
+
+
+def test_client_retries_then_opens_circuit(clock):
+    """連線失敗重試後仍失敗即拋出；達門檻後不再連線，恢復後試探成功即關閉"""
+    client = failing_client()
+    with pytest.raises(requests.ConnectionError):
+        client.fetch_impact_detail(PROJECT_NO)
+    upstream = client.stats()["upstream"]
+    assert upstream["circuit"]["state"] == CircuitBreaker.OPEN
+    assert upstream["circuit"]["consecutive_failures"] == 3
+    assert upstream["errors"] == 3
+
+    with pytest.raises(CircuitOpenError):
+        client.fetch_impact_detail(PROJECT_NO)
+    assert client.stats()["upstream"]["requests"] == 3
+
+    with ReplayServer() as server:
+        client.impact_detail_endpoint = urljoin(server.url, IMPACT_DETAIL_PAGE)
+        clock[0] += client.breaker.recovery_timeout
+        assert client.fetch_impact_detail(PROJECT_NO)
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        assert server.requests[IMPACT_DETAIL_PAGE] == 1
+
+
+def test_post_retried_only_when_idempotent():
+    """POST失敗時不重送，標示可安全重送的換頁回傳才與GET一樣重試"""
+    client = failing_client(retries=2, failure_threshold=10)
+    url = client.list_endpoint
+    form = {"__EVENTTARGET": "grid", "__EVENTARGUMENT": "Page$2"}
+    with pytest.raises(requests.ConnectionError):
+        client._request("POST", url, {}, data=form)
+    assert client.stats()["upstream"]["errors"] == 1
+
+    with pytest.raises(requests.ConnectionError):
+        client._request("POST", url, {}, data=form, idempotent=True)
+    assert client.stats()["upstream"]["errors"] == 4
+
+    async def run():
+        async_client = AsyncNSTCAwardClient(client)
+        try:
+            with pytest.raises(httpx.ConnectError):
+                await async_client._request("POST", url, {}, data=form)
+        finally:
+            await async_client.aclose()
+
+    asyncio.run(run())
+    assert client.stats()["upstream"]["errors"] == 5
+
+
+def test_api_returns_503_when_circuit_open(monkeypatch):
+    """斷路器開啟時API回傳503"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    client = failing_client(retries=0, failure_threshold=1)
+    with pytest.raises(requests.ConnectionError):
+        client.fetch_impact_detail(PROJECT_NO)
+
+    with TestClient(main.create_app(client)) as api:
+        r = api.get(
+            "/api/awards",
+            params={"pi_name": "李文廷", "years": "113", "include_impact": "preview"},
+        )
+    assert r.status_code == 503
+
+
+def open_breaker(client, clock):
+    """讓斷路器開啟後經過 recovery_timeout，進入半開狀態"""
+    for _ in range(client.breaker.failure_threshold):
+        client.breaker.record_failure()
+    clock[0] += client.breaker.recovery_timeout
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_probe_released_on_unexpected_error(clock, monkeypatch):
+    """試探請求以非上游錯誤結束時釋放名額，斷路器不會一直拒絕請求"""
+    client = failing_client()
+    open_breaker(client, clock)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("解析設定錯誤")
+
+    monkeypatch.setattr(client.s, "request", broken)
+    with pytest.raises(RuntimeError):
+        client.fetch_impact_detail(PROJECT_NO)
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.before_call() is not None
+
+
+def test_cancelled_async_probe_released(clock):
+    """半開狀態的非同步試探請求被取消後，下一個請求仍可試探並關閉斷路器"""
+    with ReplayServer(latency=0.5) as server:
+        client = make_client(server)
+        client.health = UpstreamHealth(slow_threshold=1, max_delay=0)
+        open_breaker(client, clock)
+        async_client = AsyncNSTCAwardClient(client)
+        url = client.impact_detail_endpoint
+        params = {"id": PROJECT_NO}
+
+        async def run():
+            try:
+                # 直接取消請求本身；經由合併請求的呼叫取消時請求仍會完成
+                probe = asyncio.ensure_future(async_client._request("GET", url, params))
+                await asyncio.sleep(0.1)
+                probe.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await probe
+                assert client.breaker.state == CircuitBreaker.HALF_OPEN
+                return await async_client._request("GET", url, params)
+            finally:
+                await async_client.aclose()
+
+        assert asyncio.run(run()).status_code == 200
+        assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,141 @@
+"""
+測試腳本：驗證多年度查詢排程（scheduler.py）的合併、去重與失敗年度，
+以及 /api/awards 以 X-Failed-Years 回報失敗年度
+
+可以 pytest 執行
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from async_crawler import AsyncNSTCAwardClient
+from conftest import make_award, make_client
+from scheduler import _unseen, iter_years_async, merge_awards, search_years_async
+
+A, B, C = (make_award(no) for no in ("113A001", "113A002", "112A003"))
+# 沒有計畫編號的資料無法判斷是否重複
+UNNUMBERED = make_award(None, plan_name="沒有計畫編號")
+
+
+def fake_search(results, delays=None, active=None):
+    """依年度回傳results中的資料（例外則拋出），delays 為各年度的延遲秒數"""
+
+    async def search_year(year):
+        if active is not None:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        try:
+            await asyncio.sleep((delays or {}).get(year, 0))
+            result = results[year]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        finally:
+            if active is not None:
+                active["now"] -= 1
+
+    return search_year
+
+
+def test_merge_awards_keeps_first_and_unnumbered():
+    """依批次順序保留第一次出現的計畫編號，沒有編號的資料一律保留"""
+    merged = merge_awards([[A, UNNUMBERED, B], [B, C, UNNUMBERED, A]])
+    assert merged == [A, UNNUMBERED, B, C, UNNUMBERED]
+
+
+def test_unseen_updates_seen():
+    """略過已出現的計畫編號並記錄新的編號"""
+    seen = {"113A001"}
+    assert _unseen([A, B, UNNUMBERED, B], seen) == [B, UNNUMBERED]
+    assert seen == {"113A001", "113A002"}
+
+
+def test_search_years_merges_in_year_order():
+    """結果依年度參數的順序合併，與完成順序無關；失敗年度不影響其他年度"""
+    search_year = fake_search(
+        {113: [A, B], 112: [B, C], 111: RuntimeError("逾時")},
+        delays={113: 0.05},
+    )
+    awards, errors = asyncio.run(search_years_async(search_year, [113, 112, 111]))
+    assert awards == [A, B, C]
+    assert list(errors) == [111] and str(errors[111]) == "逾時"
+
+
+def test_search_years_limits_concurrency():
+    """同時查詢的年度數不超過 max_concurrency"""
+    active = {"now": 0, "max": 0}
+    years = list(range(114, 104, -1))
+    search_year = fake_search(
+        {year: [] for year in years}, delays=dict.fromkeys(years, 0.01), active=active
+    )
+    assert asyncio.run(search_years_async(search_year, years, 3)) == ([], {})
+    assert active["max"] == 3
+
+
+def test_iter_years_yields_in_completion_order():
+    """依完成順序產出，先完成年度出現過的計畫編號在之後的年度略過"""
+    search_year = fake_search(
+        {113: [A, B], 112: [B, C, UNNUMBERED], 111: RuntimeError("逾時")},
+        delays={113: 0.05},
+    )
+
+    async def run():
+        return [r async for r in iter_years_async(search_year, [113, 112, 111])]
+
+    results = asyncio.run(run())
+    assert [(r.year, r.items, r.error is not None) for r in results] == [
+        (112, [B, C, UNNUMBERED], False),
+        (111, [], True),
+        (113, [A], False),
+    ]
+
+
+def test_iter_years_cancels_pending_on_close():
+    """提早結束走訪時取消尚未完成的查詢"""
+    cancelled = []
+
+    async def search_year(year):
+        try:
+            await asyncio.sleep(0 if year == 113 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(year)
+            raise
+        return [A]
+
+    async def run():
+        results = iter_years_async(search_year, [113, 112, 111])
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(run()).year == 113
+    assert sorted(cancelled) == [111, 112]
+
+
+def test_api_reports_failed_years(server, monkeypatch):
+    """部分年度失敗時回傳其餘年度並以 X-Failed-Years 列出，多個年度依計畫編號去重"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    search_awards = AsyncNSTCAwardClient.search_awards
+
+    async def flaky(self, **kwargs):
+        if kwargs["year"] == 111:
+            raise RuntimeError("連線逾時")
+        return await search_awards(self, **kwargs)
+
+    monkeypatch.setattr(AsyncNSTCAwardClient, "search_awards", flaky)
+    params = {"pi_name": "李文廷", "include_impact": "none"}
+    with TestClient(main.create_app(make_client(server))) as api:
+        one = api.get("/api/awards", params={**params, "years": "113"})
+        many = api.get("/api/awards", params={**params, "years": "113,112,111"})
+        failed = api.get("/api/awards", params={**params, "years": "111"})
+
+    assert many.status_code == 200
+    assert many.headers["X-Failed-Years"] == "111"
+    assert "X-Failed-Years" not in one.headers
+    numbered = [a["project_no"] for a in many.json() if a["project_no"]]
+    assert numbered == [a["project_no"] for a in one.json() if a["project_no"]]
+    assert len(numbered) == len(set(numbered))
+    assert failed.status_code == 502
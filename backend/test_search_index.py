@@ -0,0 +1,105 @@
+"""
+測試腳本：驗證全文檢索索引（search_index.py）的切詞、排序與邊界情況
+
+以列表頁fixture的獎項建立索引；可以 pytest 執行
+"""
+
+from pathlib import Path
+
+from conftest import make_award
+from grid_parser import parse_award_grid
+from search_index import FIELD_WEIGHTS, SearchIndex, tokenize
+
+FIXTURES = Path(__file__).parent / "fixtures"
+AWARDS = [
+    row.item
+    for row in parse_award_grid(
+        (FIXTURES / "award_list.html").read_text(encoding="utf-8")
+    )
+]
+
+
+def make_index():
+    index = SearchIndex()
+    index.add_many(AWARDS)
+    return index
+
+
+def test_tokenize():
+    """中文取相鄰兩字，英文取小寫單字並略過停用詞"""
+    assert tokenize("深度學習 for Edge") == ["深度", "度學", "學習", "edge"]
+    assert tokenize("癌") == ["癌"]
+
+
+def test_search_ranks_matching_awards():
+    """命中計畫名稱與關鍵字的獎項排在前面，可依年度篩選"""
+    index = make_index()
+    hits = index.search("聯邦學習")
+    assert hits[0].award.plan_name == "邊緣運算環境下之聯邦學習最佳化"
+    assert all(hit.score > 0 for hit in hits)
+    assert index.search("聯邦學習", year="112") == []
+
+
+def test_single_cjk_character_query():
+    """單一中文字也能命中多字段落中的該字"""
+    index = make_index()
+    hits = index.search("邦")
+    assert [hit.award.plan_name for hit in hits] == ["邊緣運算環境下之聯邦學習最佳化"]
+
+
+def test_single_characters_do_not_count_towards_length():
+    """單字不計入文件長度，多字查詢的排序與只索引兩字詞時相同"""
+    index = make_index()
+    for award in AWARDS:
+        if award.project_no:
+            assert index._doc_len[award.project_no] == sum(
+                weight * len(tokenize(getattr(award, field)))
+                for field, weight in FIELD_WEIGHTS.items()
+            )
+
+
+def test_documents_without_terms():
+    """所有文件都沒有檢索詞時查詢不會失敗"""
+    index = SearchIndex()
+    index.add(make_award("113A001", plan_name="", keywords_en="the of and"))
+    index.add(make_award("113A002", plan_name=""))
+    assert len(index) == 2
+    assert index.search("深度學習") == []
+    assert index.search("the") == []
+
+
+def test_update_and_remove():
+    """更新後以新內容檢索，移除後不再命中"""
+    index = make_index()
+    award = AWARDS[0]
+    index.add(make_award(award.project_no, plan_name="量子計算", award_year="113"))
+    assert all(
+        hit.award.project_no != award.project_no for hit in index.search("深度學習")
+    )
+    assert index.search("量子")[0].award.project_no == award.project_no
+    index.remove(award.project_no)
+    assert index.search("量子") == []
+    assert award.project_no not in index
+
+
+def test_incremental_updates_match_rebuilt_index():
+    """逐筆新增、更新與移除後的分數與重新建立的索引相同"""
+    index = make_index()
+    for query in ("深度學習", "聯邦學習"):
+        index.search(query)
+    award = AWARDS[0]
+    updated = make_award(award.project_no, plan_name="聯邦學習與深度學習")
+    index.add(updated)
+    index.add(make_award("113A999", keywords_zh="深度學習"))
+    index.remove(AWARDS[1].project_no)
+
+    rebuilt = SearchIndex()
+    rebuilt.add_many([updated, make_award("113A999", keywords_zh="深度學習")])
+    rebuilt.add_many(a for a in AWARDS[1:] if a.project_no != AWARDS[1].project_no)
+    for query in ("深度學習", "聯邦學習", "學"):
+        expected = {h.award.project_no: h.score for h in rebuilt.search(query)}
+        actual = {h.award.project_no: h.score for h in index.search(query)}
+        assert actual.keys() == expected.keys()
+        assert all(
+            abs(actual[doc_id] - score) < 1e-9 for doc_id, score in expected.items()
+        )
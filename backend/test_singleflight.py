@@ -0,0 +1,115 @@
+"""
+測試腳本：驗證相同請求的合併（singleflight.py），以及同時的相同查詢只對重播伺服器發出一次請求
+
+可以 pytest 執行
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_crawler import AsyncNSTCAwardClient
+from conftest import DETAIL_PAGE, make_client
+from replay_server import ReplayServer
+from singleflight import AsyncSingleFlight, SingleFlight, request_key
+
+CALLERS = 8
+
+
+def test_request_key_ignores_param_order():
+    """查詢參數的順序與型別不影響鍵值"""
+    assert request_key("http://a/b?", {"x": 1, "y": "2"}) == request_key(
+        "http://a/b", {"y": 2, "x": "1"}
+    )
+
+
+def test_concurrent_calls_share_one_execution():
+    """同時的相同鍵值呼叫只執行一次，所有呼叫取得同一結果"""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return ["result"]
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(flight.do, "key", fn) for _ in range(CALLERS)]
+        while flight.stats()["coalesced"] < CALLERS - 1:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": CALLERS - 1}
+
+
+def test_error_is_shared_and_not_cached():
+    """例外傳給所有等待者，之後的呼叫重新執行"""
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.executed == 2
+
+
+def test_async_waiters_survive_leader_cancellation():
+    """發起的請求被取消時，其餘等待者仍取得結果"""
+
+    async def run():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        assert await follower == "result"
+        assert leader.cancelled() and len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 1}
+
+    asyncio.run(run())
+
+
+def test_concurrent_detail_requests_coalesced():
+    """同步與非同步客戶端同時查詢同一概述，各只對NSTC網站發出一次請求"""
+    with ReplayServer(latency=0.2) as server:
+        client = make_client(server)
+        with ThreadPoolExecutor(CALLERS) as pool:
+            texts = list(
+                pool.map(
+                    lambda _: client.fetch_impact_detail("113WFA2110082"),
+                    range(CALLERS),
+                )
+            )
+        assert len(set(texts)) == 1 and texts[0]
+        assert server.requests[DETAIL_PAGE] == 1
+
+        client.detail_cache.clear()
+        async_client = AsyncNSTCAwardClient(client)
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(
+                        async_client.fetch_impact_detail("113WFA2110082")
+                        for _ in range(CALLERS)
+                    )
+                )
+            finally:
+                await async_client.aclose()
+
+        assert asyncio.run(run()) == texts
+        assert server.requests[DETAIL_PAGE] == 2
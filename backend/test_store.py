@@ -0,0 +1,117 @@
+"""
+測試腳本：驗證SQLite持久化儲存（store.py）的查詢結果、概述全文與保鮮期，
+以及重新啟動的應用程式直接以已保存的資料回應
+
+可以 pytest 執行
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import DETAIL_PAGE, LIST_PAGE, make_award, make_client
+from replay_server import ReplayServer
+from store import AwardStore
+
+QUERY = dict(year=113, code="QS01", name="李文廷")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AwardStore(str(tmp_path / "awards.sqlite3"), 3600)
+
+
+def test_query_round_trip(store):
+    """保存的列表查詢結果原樣讀回，並依計畫編號更新獎項資料"""
+    items = [
+        make_award("113A001", impact="預覽", total_amount="1,000,000"),
+        make_award("113A002", period="2024/08/01~2025/07/31"),
+    ]
+    store.put_query(**QUERY, items=items)
+    assert store.get_query(**QUERY) == items
+    assert store.get_query(**{**QUERY, "name": "王大明"}) is None
+    assert store.get_award("113A001") == items[0]
+    assert [a.project_no for a in store.iter_awards()] == ["113A001", "113A002"]
+    assert store.find_awards(year=113, code="QS01", pi_name="文廷") == items
+
+
+def test_partial_match_escapes_wildcards(store):
+    """部分相符查詢把 %、_ 與反斜線視為一般字元"""
+    items = [
+        make_award("113A001", organ="國立臺灣大學"),
+        make_award("113A002", organ="100%_研究中心"),
+        make_award("113A003", organ="C:\\實驗室"),
+    ]
+    store.put_query(**QUERY, items=items)
+
+    def organs(organ):
+        found = store.find_awards(year=113, code="QS01", organ=organ)
+        scanned = list(store.scan_awards(year=113, code="QS01", organ=organ))
+        assert found == scanned
+        return [a.project_no for a in found]
+
+    assert organs("%") == organs("_") == organs("%_") == ["113A002"]
+    assert organs("臺_大") == [] and organs("臺灣") == ["113A001"]
+    assert organs("\\") == ["113A003"]
+    assert organs("大學") == ["113A001"]
+
+
+def test_max_age(store, monkeypatch):
+    """超過保鮮期的查詢結果與概述只在放寬 max_age 時讀取"""
+    store.put_query(**QUERY, items=[make_award("113A001")])
+    store.put_impact("113A001", "計畫概述全文")
+    later = time.time() + store.max_age + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert store.get_query(**QUERY) is None
+    assert store.get_impact("113A001") is None
+    assert store.get_query(**QUERY, max_age=float("inf")) == [make_award("113A001")]
+    assert store.get_impact("113A001", max_age=float("inf")) == "計畫概述全文"
+
+
+def test_reopen_keeps_data(store):
+    """重新開啟同一個檔案仍可讀取已保存的資料"""
+    store.put_query(**QUERY, items=[make_award("113A001")])
+    store.put_impact("113A001", "計畫概述全文")
+    reopened = AwardStore(store.path, store.max_age)
+    assert reopened.get_query(**QUERY) == [make_award("113A001")]
+    assert reopened.get_impact("113A001") == "計畫概述全文"
+
+
+def test_restarted_app_serves_from_store(tmp_path, monkeypatch):
+    """新的應用程式實例以已保存的查詢與概述回應，不再查詢NSTC網站"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", str(tmp_path / "awards.sqlite3"))
+    params = {"pi_name": "李文廷", "years": "113"}
+    with ReplayServer() as server:
+        client = make_client(server)
+        with TestClient(main.create_app(client)) as api:
+            first = api.get("/api/awards", params=params)
+        assert first.status_code == 200 and first.json()
+        requests = dict(server.requests)
+
+        client = make_client(server)
+        with TestClient(main.create_app(client)) as api:
+            second = api.get("/api/awards", params=params)
+        assert second.json() == first.json()
+        assert server.requests[LIST_PAGE] == requests[LIST_PAGE]
+        assert server.requests[DETAIL_PAGE] == requests[DETAIL_PAGE]
+
+
+def test_expired_store_refetched_in_request_without_background(tmp_path, monkeypatch):
+    """REFRESH_IN_BACKGROUND 為0（Lambda）時過期資料於請求中重新查詢，不排入背景"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", str(tmp_path / "awards.sqlite3"))
+    monkeypatch.setattr(main, "REFRESH_IN_BACKGROUND", False)
+    params = {"pi_name": "李文廷", "years": "113"}
+    with ReplayServer() as server:
+        with TestClient(main.create_app(make_client(server))) as api:
+            first = api.get("/api/awards", params=params)
+        requests = dict(server.requests)
+
+        monkeypatch.setattr(main, "AWARD_STORE_MAX_AGE", 0)
+        with TestClient(main.create_app(make_client(server))) as api:
+            second = api.get("/api/awards", params=params)
+            refresh = api.get("/api/cache/stats").json()["refresh"]
+        assert second.json() == first.json()
+        assert server.requests[LIST_PAGE] == requests[LIST_PAGE] + 1
+        assert "scheduled" not in refresh
@@ -0,0 +1,112 @@
+"""
+測試腳本：驗證 /api/awards/stream 的NDJSON與SSE事件順序、失敗年度的 error
+事件與 summary 的 failed_years
+
+可以 pytest 執行
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from async_crawler import AsyncNSTCAwardClient
+from conftest import make_client
+from main import encode_event
+
+
+def read_ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def read_sse(text):
+    """將SSE訊息轉為與NDJSON相同的 {"type": 事件, **資料}"""
+    events = []
+    for message in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append({"type": lines["event"], **json.loads(lines["data"])})
+    return events
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    """111 年度一定查詢失敗的應用程式"""
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    search_awards = AsyncNSTCAwardClient.search_awards
+
+    async def flaky(self, **kwargs):
+        if kwargs["year"] == 111:
+            raise RuntimeError("連線逾時")
+        return await search_awards(self, **kwargs)
+
+    monkeypatch.setattr(AsyncNSTCAwardClient, "search_awards", flaky)
+    with TestClient(main.create_app(make_client(server))) as api:
+        yield api
+
+
+def test_encode_event():
+    """NDJSON每行一個事件並帶 type，SSE以 event/data 兩行加空行分隔"""
+    assert encode_event("ndjson", "year", {"year": 113}) == (
+        '{"type":"year","year":113}\n'
+    )
+    assert encode_event("sse", "year", {"year": 113}) == (
+        'event: year\ndata: {"year":113}\n\n'
+    )
+
+
+@pytest.mark.parametrize("fmt, read", [("ndjson", read_ndjson), ("sse", read_sse)])
+def test_event_sequence(api, fmt, read):
+    """每個年度先送出獎項再送出 year，失敗年度送出 error，最後是 summary"""
+    params = {"pi_name": "李文廷", "years": "113,112,111", "format": fmt}
+    r = api.get("/api/awards/stream", params={**params, "include_impact": "none"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith(main.STREAM_MEDIA_TYPES[fmt])
+    assert r.headers["cache-control"] == "no-cache"
+    events = read(r.text)
+
+    assert events[-1]["type"] == "summary"
+    assert [e["type"] for e in events].count("summary") == 1
+    counts = {}
+    pending = 0
+    for event in events[:-1]:
+        if event["type"] == "award":
+            pending += 1
+        elif event["type"] == "year":
+            assert event["count"] == pending
+            counts[event["year"]] = pending
+            pending = 0
+        else:
+            assert event == {
+                "type": "error",
+                "year": 111,
+                "detail": "查詢失敗: 連線逾時",
+            }
+            assert pending == 0
+    assert pending == 0 and set(counts) == {113, 112}
+
+    # 先完成的年度已送出的計畫編號在之後的年度略過
+    numbered = [
+        e["data"]["project_no"]
+        for e in events
+        if e["type"] == "award" and e["data"]["project_no"]
+    ]
+    assert len(numbered) == len(set(numbered))
+
+    summary = events[-1]
+    assert summary["total"] == sum(counts.values())
+    assert summary["years"] == [113, 112, 111]
+    assert summary["failed_years"] == [111]
+    assert summary["elapsed_ms"] >= 0
+
+
+def test_stream_matches_awards_endpoint(api):
+    """award 事件與 /api/awards 的回應相同（含 fields 投影），不支援的格式回傳400"""
+    params = {"pi_name": "李文廷", "years": "113", "fields": "project_no,pi_name"}
+    events = read_ndjson(api.get("/api/awards/stream", params=params).text)
+    awards = [e["data"] for e in events if e["type"] == "award"]
+    assert awards == api.get("/api/awards", params=params).json()
+    assert events[-1]["failed_years"] == []
+
+    r = api.get("/api/awards/stream", params={"pi_name": "李文廷", "format": "xml"})
+    assert r.status_code == 400
@@ -0,0 +1,77 @@
+"""
+測試腳本：以重播伺服器驗證各回應的分段耗時（Server-Timing標頭、串流summary事件與timing記錄）
+
+可以 pytest 執行
+"""
+
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import lambda_handler
+import main
+from conftest import make_client
+from replay_server import ReplayServer
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(main, "AWARD_STORE_PATH", "")
+    with ReplayServer() as server:
+        client = make_client(server)
+        with TestClient(main.create_app(client)) as api:
+            yield api
+
+
+def timing_records(caplog):
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == main.timing_logger.name
+    ]
+
+
+def test_server_timing_header(api, caplog):
+    """一般回應帶有Server-Timing標頭，並寫入同一請求的timing記錄"""
+    caplog.set_level(logging.INFO, logger=main.timing_logger.name)
+    r = api.get(
+        "/api/awards",
+        params={"pi_name": "李文廷", "years": "113", "include_impact": "preview"},
+    )
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith("total;dur=")
+    assert "parse_list;dur=" in r.headers["Server-Timing"]
+    [record] = timing_records(caplog)
+    assert record["route"] == "/api/awards" and "parse_list" in record["stages_ms"]
+
+
+def test_stream_summary_includes_timings(api, caplog):
+    """串流回應的階段耗時放在summary事件，timing記錄在串流結束後才寫入"""
+    caplog.set_level(logging.INFO, logger=main.timing_logger.name)
+    r = api.get(
+        "/api/awards/stream",
+        params={"pi_name": "李文廷", "years": "113", "include_impact": "preview"},
+    )
+    assert r.status_code == 200
+    summary = json.loads(r.text.splitlines()[-1])
+    assert summary["type"] == "summary"
+    assert "parse_list" in summary["timings"]["stages_ms"]
+
+    [record] = timing_records(caplog)
+    assert record["route"] == "/api/awards/stream"
+    assert record["stages_ms"]["parse_list"] >= summary["timings"]["stages_ms"][
+        "parse_list"
+    ]
+    assert record["total_ms"] >= summary["timings"]["total_ms"]
+
+
+def test_lambda_health_check_server_timing():
+    """Lambda健康檢查捷徑同樣帶有Server-Timing標頭"""
+    response = lambda_handler.handler(
+        {"rawPath": "/api/health", "requestContext": {"http": {"method": "GET"}}},
+        None,
+    )
+    assert response["statusCode"] == 200
+    assert response["headers"]["Server-Timing"].startswith("total;dur=")
@@ -64,11 +64,11 @@ export default function App() {
 
     try {
       const response = await fetch(
-        `${API_BASE}/api/awards?pi_name=${encodeURIComponent(trimmed)}`
+        `${API_BASE}/api/awards/stream?pi_name=${encodeURIComponent(trimmed)}`
       );
-      const payload = await response.json().catch(() => null);
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
+        const payload = await response.json().catch(() => null);
         const detail =
           payload && typeof payload === "object" && "detail" in payload
             ? payload.detail
@@ -76,9 +76,47 @@ export default function App() {
         throw new Error(detail);
       }
 
-      const list = Array.isArray(payload) ? payload : [];
-      setItems(list);
-      setStatus(list.length ? `找到 ${list.length} 筆資料` : "沒有符合的資料");
+      // 逐行讀取 NDJSON，每個年度完成即顯示該年度資料
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let received = 0;
+      let summary = null;
+      setItems([]);
+
+      const handleEvent = (event) => {
+        if (event.type === "award") {
+          received += 1;
+          setItems((prev) => [...prev, event.data]);
+          setStatus(`已取得 ${received} 筆資料，持續查詢中...`);
+        } else if (event.type === "summary") {
+          summary = event;
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(Boolean).forEach((line) => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
+
+      if (summary?.failed_years?.length && !received) {
+        throw new Error("查詢失敗，請稍後再試。");
+      }
+      const failedNote = summary?.failed_years?.length
+        ? `（${summary.failed_years.join("、")} 年度查詢失敗）`
+        : "";
+      setStatus(
+        (received ? `找到 ${received} 筆資料` : "沒有符合的資料") + failedNote
+      );
     } catch (err) {
       setItems([]);
       setError(err?.message || "查詢失敗，請稍後再試。");